@@ -0,0 +1,100 @@
+import contextvars
+import threading
+from concurrent.futures import CancelledError, wait
+
+from Profiling import profile_thread, stage
+
+
+class Superseded(CancelledError):
+    """Raised in place of a task's result when a newer run superseded it before it started."""
+
+
+class _Task:
+    def __init__(self, key, generation):
+        self.key = key
+        self.generation = generation
+        self.skipped = False
+        self.future = None
+
+
+class TaskRunner:
+    """
+    Background tasks of one dashboard session, run on an executor shared by every session.
+
+    Each rerun calls start_run() and then submits its sections by name. When a task reaches a
+    worker, it runs only if it still belongs to the latest run. A queued task from an earlier
+    run is skipped unless the newer run submitted the same name and key. In that case the
+    newer run adopts it, and a finished result with that key is simply reused.
+
+    A stale task that is already running cannot be interrupted. Its result is discarded, and
+    the newer task of the same name starts only after it finishes, so the two never draw into
+    the same cached figure. Rapid slider changes therefore leave at most one stale task per
+    section running instead of a queue of them.
+
+    With a shared cache (see SharedCache.SingleFlightCache), results are looked up by
+    (name, key) across every session that uses the cache, so identical sections requested by
+    several sessions at once are computed once and the other sessions wait for that result.
+
+    Parameters:
+    - executor (concurrent.futures.Executor): Worker pool the tasks run on
+    - cache (SingleFlightCache): Optional process-wide cache of task results
+    """
+
+    def __init__(self, executor, cache=None):
+        self.executor = executor
+        self.cache = cache
+        self.generation = 0
+        self._tasks = {}  # name -> latest _Task of that name
+        self._lock = threading.Lock()
+
+    def start_run(self):
+        """Start a new run; tasks of earlier runs that have not started yet are skipped unless resubmitted."""
+        with self._lock:
+            self.generation += 1
+
+    def submit(self, name, key, fn, *args, **kwargs):
+        """
+        Run fn(*args, **kwargs) in the background as section `name` of the current run.
+
+        The task runs in a copy of the caller's context and is timed as stage `name`, so the
+        dashboard's stage timer records it as if it ran in the script thread; an active
+        cProfile dump of the caller includes it as well (see profile_thread).
+
+        Parameters:
+        - name (str): Section name, also the stage the task is timed under
+        - key (hashable): Everything the result depends on; an earlier task of the same name
+          and key is reused instead of running fn again
+        - fn (callable): The task
+
+        Returns:
+        - concurrent.futures.Future: Result of fn, or Superseded if a newer run replaced the task.
+        """
+        with self._lock:
+            previous = self._tasks.get(name)
+            if previous is not None and self._reusable(previous, key):
+                previous.generation = self.generation
+                return previous.future
+            task = _Task(key, self.generation)
+            # A predecessor that may still be running is waited for, not run alongside
+            predecessor = previous.future if previous is not None and not previous.skipped else None
+            context = contextvars.copy_context()
+            task.future = self.executor.submit(context.run, self._run, name, task, predecessor, fn, args, kwargs)
+            self._tasks[name] = task
+        return task.future
+
+    def _reusable(self, task, key):
+        if task.skipped or task.key != key:
+            return False
+        return not task.future.done() or task.future.exception() is None
+
+    def _run(self, name, task, predecessor, fn, args, kwargs):
+        if predecessor is not None:
+            wait([predecessor])
+        with self._lock:
+            if task.generation != self.generation:
+                task.skipped = True
+                raise Superseded(name)
+        with stage(name), profile_thread():
+            if self.cache is not None:
+                return self.cache.get((name, task.key), fn, *args, **kwargs)
+            return fn(*args, **kwargs)
@@ -0,0 +1,293 @@
+import argparse
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import ExitStack
+
+import pandas as pd
+
+from Calculations import process_well_data_optimized
+from CompactFrame import compact_frame, process_well_data_compact
+from CurveCache import DEFAULT_PARAMETERS
+from DataExport import OutputWriter, export_frame
+from LasReader import process_las, read_las_header
+from Pickett import DEFAULT_PICKETT_PARAMETERS, pickett_well
+from Profiling import StageTimer, profile_to, stage
+from WellStore import WellStore
+from Zonation import DEFAULT_ZONE_PARAMETERS, zone_tops, zone_well
+
+# Dashboard defaults of the mandatory sidebar inputs
+DEFAULT_PARAMETER_SET = dict(ssp=-100, sp_baseline=0, shale_phid=0.2, shale_phi_n=0.3, **DEFAULT_PARAMETERS)
+
+
+def output_stem(name):
+    """File name stem of a well's outputs: runs of characters other than letters, digits, '-' and '.' become '_'."""
+    return re.sub(r'[^\w.-]+', '_', str(name)).strip('._') or 'well'
+
+
+def render_plots(df, sp_shift, output_dir, stem, tops=()):
+    """Render both plotter figures of a processed well to PNG with the Agg backend, with zone tops if given."""
+    import matplotlib
+    matplotlib.use('Agg')
+    from WellLogPlotter import WellLogPlotter
+    from SecondWellLogPlotter import SecondWellLogPlotter
+
+    paths = []
+    for plotter_class, suffix in ((WellLogPlotter, 'logs'), (SecondWellLogPlotter, 'saturation')):
+        with stage(suffix):
+            plotter = plotter_class(df, sp_shift=sp_shift, zone_tops=tops)
+            with stage('render'):
+                plotter.plot_all()
+            path = os.path.join(output_dir, f'{stem}_{suffix}.png')
+            with stage('rasterize'):
+                plotter.fig.savefig(path, format='png', dpi=200, bbox_inches='tight')
+        paths.append(path)
+    return paths
+
+
+def process_well_task(task):
+    """
+    Process one well in a worker process and write its outputs.
+
+    Parameters:
+    - task (dict): well, stem (file name stem of its outputs), kind ('store' or 'las'), source
+      details, inputs path, params, output_dir, fmt, plots, and optionally compact (float32
+      output), zone_params (zonation of the processed well), pickett_params (sliding-window
+      Pickett analysis), trace_memory and profile ('cprofile' or 'pyinstrument')
+
+    Returns:
+    - dict: Well name, row count, output paths, timings in seconds and the per-stage timer totals,
+      plus the zone table (a DataFrame) when zoning and the suggested Rw and m (a dict, None if
+      no window qualifies) of the Pickett analysis.
+    """
+    start = time.perf_counter()
+    well, params = task['well'], task['params']
+    output = os.path.join(task['output_dir'], f"{task['stem']}.{task['fmt']}")
+    timer = StageTimer(trace_memory=task.get('trace_memory', False))
+
+    with ExitStack() as stack:
+        stack.enter_context(timer.activate())
+        profile = task.get('profile')
+        if profile:
+            extension = 'html' if profile == 'pyinstrument' else 'prof'
+            stack.enter_context(profile_to(os.path.join(task['output_dir'], f"{task['stem']}.{extension}"), profile))
+
+        with stage('load'):
+            inputs = WellStore(task['inputs']).load_well()
+        if task['kind'] == 'store':
+            with stage('load'):
+                df = WellStore(task['source'], sheet_name=task['sheet']).load_well(well)
+            with stage('process'):
+                if task.get('compact'):
+                    df = process_well_data_compact(compact_frame(df), inputs, **params)
+                else:
+                    df = process_well_data_optimized(df, inputs, **params)
+            with stage('write'):
+                rows = export_frame(df, output, task['fmt'])
+        else:
+            # LAS wells are streamed chunk by chunk and never held in memory as a whole
+            with stage('process'), OutputWriter(output, task['fmt']) as writer:
+                for chunk in process_las(task['source'], inputs, well_name=well, **params):
+                    writer.write(compact_frame(chunk) if task.get('compact') else chunk)
+            rows = writer.rows
+            if task['plots'] or task.get('zone_params') or task.get('pickett_params'):
+                with stage('load'):
+                    df = pd.read_csv(output) if task['fmt'] == 'csv' else pd.read_parquet(output)
+        zones = None
+        if task.get('zone_params'):
+            with stage('zonation'):
+                zones = zone_well(df, **task['zone_params'])[1]
+                zones.insert(0, 'Well', well)
+        pickett = None
+        if task.get('pickett_params'):
+            with stage('pickett'):
+                pickett = pickett_well(df, a=params.get('a', 1), Temp_rw=params.get('Temp_rw', 78),
+                                       **task['pickett_params'])[1]
+        processed = time.perf_counter()
+
+        plots = []
+        if task['plots']:
+            with stage('plots'):
+                plots = render_plots(df, params.get('sp_shift', 0), task['output_dir'], task['stem'],
+                                     zone_tops(zones) if zones is not None else ())
+    result = {
+        'well': well,
+        'rows': rows,
+        'output': output,
+        'plots': plots,
+        'process_seconds': processed - start,
+        'plot_seconds': time.perf_counter() - processed,
+        'seconds': time.perf_counter() - start,
+        'pid': os.getpid(),
+        'stages': timer.totals(),
+    }
+    if zones is not None:
+        result['zones'] = zones
+    if task.get('pickett_params'):
+        result['pickett'] = pickett
+    return result
+
+
+def build_tasks(args, params, zone_params=None, pickett_params=None):
+    """
+    One task per well of the workbook sheet or per LAS file of the directory.
+
+    Outputs of a LAS file are named after the file, those of a workbook well after the well
+    (see output_stem), so well names such as UWIs with '/' are safe in file names.
+
+    Raises:
+    - ValueError: Two tasks have the same well name (e.g. two logging runs of one well in the
+      LAS directory, which should be merged first, see Resampling.py) or output name.
+    """
+    WellStore(args.inputs).refresh()
+    common = dict(inputs=args.inputs, params=params, output_dir=args.output_dir, fmt=args.format, plots=args.plots,
+                  compact=args.compact, zone_params=zone_params, pickett_params=pickett_params,
+                  trace_memory=args.trace_memory,
+                  profile=args.profile)
+    if args.las_dir:
+        tasks = []
+        for name in sorted(os.listdir(args.las_dir)):
+            if name.lower().endswith('.las'):
+                path = os.path.join(args.las_dir, name)
+                well = read_las_header(path)['well'].get('WELL') or os.path.splitext(name)[0]
+                tasks.append(dict(common, well=well, stem=output_stem(os.path.splitext(name)[0]), kind='las',
+                                  source=path))
+    else:
+        # Ingest once in the parent so workers only memory-map their well
+        store = WellStore(args.source, sheet_name=args.sheet)
+        tasks = [dict(common, well=well, stem=output_stem(well), kind='store', source=args.source, sheet=args.sheet)
+                 for well in store.wells()]
+    if args.wells:
+        tasks = [task for task in tasks if task['well'] in args.wells]
+    # Tasks sharing a well or output name would be written concurrently to the same files
+    for field, label in (('well', 'well name'), ('stem', 'output name')):
+        sources = {}
+        for task in tasks:
+            sources.setdefault(task[field], []).append(task['source'] if task['kind'] == 'las' else task['well'])
+        duplicates = {name: found for name, found in sources.items() if len(found) > 1}
+        if duplicates:
+            raise ValueError(f'Duplicate {label}s: ' + '; '.join(f"{name!r} ({', '.join(map(str, found))})"
+                                                                  for name, found in duplicates.items()))
+    return tasks
+
+
+def run_batch(tasks, workers=None):
+    """
+    Fan tasks out over a process pool, one task per well.
+
+    Returns:
+    - dict: Per-well results in completion order plus wall-clock and summed task time.
+    """
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(process_well_task, task): task['well'] for task in tasks}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as exc:
+                result = {'well': futures[future], 'error': repr(exc)}
+            results.append(result)
+            if 'error' in result:
+                print(f"{result['well']:>12}  FAILED  {result['error']}")
+            else:
+                print(f"{result['well']:>12}  {result['rows']:>10,} rows  {result['seconds']:8.2f} s")
+    wall = time.perf_counter() - start
+    busy = sum(result.get('seconds', 0) for result in results)
+    return {
+        'workers': workers or os.cpu_count(),
+        'wall_seconds': wall,
+        'task_seconds': busy,
+        'parallel_speedup': busy / wall if wall else None,
+        'wells': results,
+    }
+
+
+def load_json_argument(value):
+    """Parse a JSON command-line argument given either as a file path or as a JSON string."""
+    if os.path.exists(value):
+        with open(value) as f:
+            return json.load(f)
+    return json.loads(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Process every well headlessly on a process pool.')
+    parser.add_argument('--source', default='Work_data.xlsx', help='Workbook with the well logs')
+    parser.add_argument('--sheet', default='All_Wells', help='Sheet of the workbook with the well logs')
+    parser.add_argument('--las-dir', default=None, help='Directory of LAS files to process instead of the workbook')
+    parser.add_argument('--inputs', default='Raster_logs_data.xlsx', help='Inputs sheet with the well constants')
+    parser.add_argument('--params', default=None,
+                        help='Parameter set as a JSON file or JSON string, e.g. \'{"a": 1, "m": 2, "n": 2}\'')
+    parser.add_argument('--wells', nargs='+', default=None, help='Only process these wells')
+    parser.add_argument('--output-dir', default='batch_output')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='parquet')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: one per core)')
+    parser.add_argument('--plots', action='store_true', help='Also render both plotter figures per well to PNG')
+    parser.add_argument('--compact', action='store_true',
+                        help='Write float32 curves and a categorical Well_Name (about half the size)')
+    parser.add_argument('--zones', action='store_true',
+                        help='Zone every well and write all zone tables to zones.<format>; plots show the zone tops')
+    parser.add_argument('--zone-params', default=None,
+                        help='Zonation cutoffs as a JSON file or JSON string, e.g. \'{"vsh_cutoff": 0.35}\'')
+    parser.add_argument('--pickett', action='store_true',
+                        help='Suggest Rw and m per well from sliding-window Pickett plots, written to '
+                             'pickett.<format>')
+    parser.add_argument('--pickett-params', default=None,
+                        help='Pickett analysis settings as a JSON file or JSON string, e.g. \'{"window": 30}\'')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='Record allocated and peak memory per stage in timings.json (slower)')
+    parser.add_argument('--profile', choices=['cprofile', 'pyinstrument'], default=None,
+                        help='Write a profile of every well next to its output (<well>.prof or <well>.html)')
+    args = parser.parse_args()
+
+    params = dict(DEFAULT_PARAMETER_SET)
+    if args.params:
+        params.update(load_json_argument(args.params))
+    zone_params = None
+    if args.zones or args.zone_params:
+        zone_params = dict(DEFAULT_ZONE_PARAMETERS)
+        if args.zone_params:
+            zone_params.update(load_json_argument(args.zone_params))
+    pickett_params = None
+    if args.pickett or args.pickett_params:
+        pickett_params = dict(DEFAULT_PICKETT_PARAMETERS)
+        if args.pickett_params:
+            pickett_params.update(load_json_argument(args.pickett_params))
+        pickett_params['m_range'] = tuple(pickett_params['m_range'])
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    report = run_batch(build_tasks(args, params, zone_params, pickett_params), args.workers)
+    report['params'] = params
+    if zone_params:
+        # One table of every well's zones, in well order
+        # Sorted by well name only; the tables themselves cannot be compared
+        zones = [table for _, table in sorted(((result['well'], result.pop('zones'))
+                                               for result in report['wells'] if 'zones' in result),
+                                              key=lambda item: item[0])]
+        report['zone_params'] = zone_params
+        report['zones_output'] = os.path.join(args.output_dir, f'zones.{args.format}')
+        with OutputWriter(report['zones_output'], args.format) as writer:
+            for table in zones:
+                writer.write(table)
+    if pickett_params:
+        # One row per well; wells without a qualifying water line have empty values
+        suggestions = sorted(((result['well'], result.pop('pickett'))
+                              for result in report['wells'] if 'pickett' in result), key=lambda item: item[0])
+        table = pd.DataFrame([dict(Well=well, **(suggestion or {})) for well, suggestion in suggestions],
+                             columns=['Well', 'rw', 'm', 'top', 'base', 'r2', 'samples', 'temperature', 'rwa_rw'])
+        report['pickett_params'] = pickett_params
+        report['pickett_output'] = os.path.join(args.output_dir, f'pickett.{args.format}')
+        with OutputWriter(report['pickett_output'], args.format) as writer:
+            writer.write(table)
+    with open(os.path.join(args.output_dir, 'timings.json'), 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"{len(report['wells'])} wells in {report['wall_seconds']:.2f} s wall, "
+          f"{report['task_seconds']:.2f} s of work on {report['workers']} workers "
+          f"({report['parallel_speedup']:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,77 +1,162 @@
 import pandas as pd
 import numpy as np
 
-def process_well_data_optimized(df_, inputs, ssp, sp_baseline, shale_phid, shale_phi_n,
-                                sp_shift=0,Maximum_gr=150, Minimum_gr=15,rw=0.05, Temp_rw=78, invasion= None, rza= None, a=1, m=2, n=2):
-    #The output is (phi average, phi average filtered, Temperature, Rmf corrected, Rw_corrected, Rwa, Sw, Sxo, MHI, Bvw, Delta Bvw)
+from Profiling import stage
+
+from Kernels import (PETROPHYSICS_CURVES, SHALE_CURVES, SXO_INVASION, SXO_RMF, SXO_RZA, petrophysics_kernel,
+                     shale_volume_kernel)
+
+# Invasion depth factor (z) used to mix Rw and Rmf in the flushed zone
+INVASION_DEPTHS = {'very deep': 0.025, 'deep': 0.035, 'average': 0.05, 'shallow': 0.075, 'very shallow': 0.1}
+
+
+def well_parameter_arrays(well_names, inputs):
+    """
+    Map every sample onto the per-well constants of the inputs sheet in one pass.
+
+    The inputs sheet is reduced to one row per well, the well names of the samples are
+    factorized once and the per-well values are gathered with integer indexing, so no
+    Python-level lookup happens per sample.
+
+    Parameters:
+    - well_names (array-like): Well name of every sample (e.g. df['Well_Name'])
+    - inputs (pd.DataFrame): Inputs sheet with Well, TVD, T_max, T_values and Rmf columns
+
+    Returns:
+    - tuple of np.ndarray: (temperature gradient, surface temperature, Rmf), one value per sample.
+    """
+    wells = inputs.drop_duplicates('Well').set_index('Well')
+    gradient = ((wells['T_max'] - wells['T_values']) * 100 / wells['TVD']).to_numpy(dtype=float)
+    surf_temp = wells['T_values'].to_numpy(dtype=float)
+    rmf = wells['Rmf'].to_numpy(dtype=float)
+
+    codes, uniques = pd.factorize(np.asarray(well_names))
+    well_idx = wells.index.get_indexer(uniques)
+    if (well_idx < 0).any():
+        missing = [str(name) for name, idx in zip(uniques, well_idx) if idx < 0]
+        raise KeyError(f"Wells missing from the inputs sheet: {', '.join(missing)}")
+    sample_idx = well_idx[codes]
+    return gradient[sample_idx], surf_temp[sample_idx], rmf[sample_idx]
+
+
+def average_porosity(phin, phid):
+    """Root-mean-square of neutron and density porosity."""
+    return np.sqrt((phin**2 + phid**2) / 2)
+
+
+def filter_porosity(phi_avg):
+    """Replace negative porosities with NaN."""
+    return np.where(phi_avg >= 0, phi_avg, np.nan)
+
+
+def formation_temperature(depth, gradient, surf_temp):
+    """Formation temperature from the well's geothermal gradient (per 100 ft) and surface temperature."""
+    return gradient * depth / 100 + surf_temp
+
+
+def rmf_at_temperature(rmf, rmf_temp, T):
+    """Correct Rmf measured at rmf_temp to formation temperature with Arps' formula."""
+    return rmf * (rmf_temp + 6.77) / (T + 6.77)
 
-    # Precompute gradients and surface temperatures for all wells
-    def temp_grad(well):
-      well_data = inputs.loc[inputs['Well'] == well]
-      gradient = (well_data['T_max'].squeeze() - well_data['T_values'].squeeze()) * 100 / well_data['TVD'].squeeze()
-      surf_temp = well_data['T_values'].squeeze()
-      return gradient, surf_temp
 
-    temp_grad_dict = {
-        well: temp_grad(well) for well in inputs['Well'].unique()
-    }
+def rw_at_temperature(T, rw, Temp_rw):
+    """Correct Rw measured at Temp_rw to formation temperature with Arps' formula."""
+    return rw * (Temp_rw + 6.77) / (T + 6.77)
 
-    def rmf_corr(well):
-      well_data = inputs.loc[inputs['Well'] == well]
-      rmf = well_data['Rmf'].squeeze()
-      T = well_data['T_values'].squeeze()
-      return rmf, T
 
-    rmf_corr_dict = {
-        well: rmf_corr(well) for well in inputs['Well'].unique()
-    }
+def apparent_water_resistivity(deep_res, phi_avg, a, m):
+    """Apparent water resistivity Rwa."""
+    return deep_res * phi_avg**m / a
 
-    # Precompute phi_avg to avoid recalculations
-    df_['phi_avg_calc'] = np.sqrt((df_['PHIN']**2 + df_['PHID']**2) / 2)
-    df_['phi_avg_calc_filtered'] = df_['phi_avg_calc'].apply(lambda x: x if x >= 0 else np.nan)
 
-    # Compute temperature and Rmf corrected values
+def archie_saturation(water_res, res, phi, a, m, n):
+    """Archie water saturation for a water resistivity and a measured resistivity."""
+    return (water_res * a / (res * phi**m))**(1 / n)
 
-    df_['T'] = df_.apply(lambda row: temp_grad_dict[row['Well_Name']][0] * row['DEPTH'] / 100 +
-                         temp_grad_dict[row['Well_Name']][1], axis=1)
 
-    df_['Rmf_corrected'] = df_.apply(lambda row: rmf_corr_dict[row['Well_Name']][0] *
-                           (rmf_corr_dict[row['Well_Name']][1] + 6.77) /
-                           (row['T'] + 6.77), axis=1)
+def flushed_zone_water_resistivity(rw_corrected, rmf_corrected, invasion=None, rza=None):
+    """
+    Water resistivity seen by the shallow tool.
+
+    Rza when given, otherwise Rmf for no invasion class, otherwise a mix of Rw and Rmf
+    weighted by the invasion depth factor of INVASION_DEPTHS.
+    """
+    if rza is not None:
+        return rza
+    if invasion is None:
+        return rmf_corrected
+    z = INVASION_DEPTHS[invasion]
+    return 1 / ((z / rw_corrected) + ((1 - z) / rmf_corrected))
+
+
+def depth_difference(values):
+    """Sample-to-sample difference with the first sample and NaN differences set to 0."""
+    delta = np.empty_like(values)
+    delta[:1] = 0
+    delta[1:] = values[1:] - values[:-1]
+    delta[np.isnan(delta)] = 0
+    return delta
 
-    # Compute temperature and Rmf corrected values
-    df_['Rw_corrected'] = df_.apply(lambda row: rw *(Temp_rw + 6.77) / (row['T'] + 6.77), axis=1)
 
-    #Apparanet water resistivity Rwa
-    df_['Rwa'] = df_['Deep_Resistivity']*df_['phi_avg_calc']**m/a
+def compute_petrophysics(depth, phin, phid, deep_res, shallow_res, gradient, surf_temp, rmf,
+                         rw=0.05, Temp_rw=78, invasion=None, rza=None, a=1, m=2, n=2,
+                         previous_bvw=np.nan, out=None):
+    """
+    Compute the derived petrophysical curves with the fused kernel of Kernels.py.
 
-    # Vectorized Sw calculation
-    df_['Sw'] = (df_['Rw_corrected']*a / (df_['Deep_Resistivity'] * df_['phi_avg_calc_filtered']**m))**(1/n)
+    Parameters:
+    - depth, phin, phid, deep_res, shallow_res (np.ndarray): Raw curves, one value per sample
+    - gradient, surf_temp, rmf (np.ndarray): Per-sample well constants from well_parameter_arrays
+    - rw (float): Formation water resistivity at Temp_rw
+    - Temp_rw (float): Temperature at which rw was measured
+    - invasion (str): Invasion class used to mix Rw and Rmf for Sxo (see INVASION_DEPTHS)
+    - rza (float): Apparent flushed-zone water resistivity, takes precedence over invasion
+    - a, m, n (float): Archie tortuosity, cementation and saturation exponents
+    - previous_bvw (float): Bvw of the sample above depth[0] when processing a well in pieces
+    - out (np.ndarray): Optional preallocated (11, n_samples) buffer
 
+    Returns:
+    - dict: Curve name -> np.ndarray (rows of one buffer), in the column order process_well_data_optimized appends them.
+    """
     if rza is not None:
-      df_['Sxo'] = df_.apply(lambda row:
-                           (a * rza /
-                            (row['Shallow_Resistivity'] * row['phi_avg_calc_filtered']**m))**(1/n), axis=1)
+        sxo_mode, z = SXO_RZA, 0.0
     elif invasion is None:
-      df_['Sxo'] = df_.apply(lambda row:
-                           (a * row['Rmf_corrected'] /
-                            (row['Shallow_Resistivity'] * row['phi_avg_calc_filtered']**m))**(1/n), axis=1)
+        sxo_mode, z = SXO_RMF, 0.0
     else:
-      # Vectorized Sxo calculation
-      inv_depths = {'very deep': 0.025, 'deep': 0.035, 'average': 0.05, 'shallow': 0.075, 'very shallow': 0.1}
-
-      z = inv_depths[invasion]  # Default invasion depth
-      df_['Sxo'] = df_.apply(lambda row:
-                           (a * (1 / ((z / row['Rw_corrected']) + ((1 - z) / row['Rmf_corrected']))) /
-                            (row['Shallow_Resistivity'] * row['phi_avg_calc_filtered']**m))**(1/n), axis=1)
-
-    # MHI and BVW
-    df_['MHI'] = df_['Sw'] / df_['Sxo']
-    df_['Bvw'] = df_['phi_avg_calc_filtered'] * df_['Sw']
-    df_['delta_Bvw'] = df_['Bvw'].diff().fillna(0)
-    df_=calculate_shale_volume(df_,Maximum_gr=Maximum_gr,Minimum_gr=Minimum_gr,
-                              ssp=ssp,sp_baseline=sp_baseline,sp_shift=sp_shift,
-                               shale_phid=shale_phid,shale_phi_n=shale_phi_n)
+        sxo_mode, z = SXO_INVASION, INVASION_DEPTHS[invasion]
+
+    # One fused pass over the samples writing every curve into a row of a single buffer
+    out = petrophysics_kernel(depth, phin, phid, deep_res, shallow_res, gradient, surf_temp, rmf,
+                              rw=rw, Temp_rw=Temp_rw, sxo_mode=sxo_mode, z=z,
+                              rza=np.nan if rza is None else rza, a=a, m=m, n=n,
+                              previous_bvw=previous_bvw, out=out)
+    return dict(zip(PETROPHYSICS_CURVES, out))
+
+
+def process_well_data_optimized(df_, inputs, ssp, sp_baseline, shale_phid, shale_phi_n,
+                                sp_shift=0,Maximum_gr=150, Minimum_gr=15,rw=0.05, Temp_rw=78, invasion= None, rza= None, a=1, m=2, n=2):
+    #The output is (phi average, phi average filtered, Temperature, Rmf corrected, Rw_corrected, Rwa, Sw, Sxo, MHI, Bvw, Delta Bvw)
+
+    # Map each sample to its well's gradient, surface temperature and Rmf once
+    gradient, surf_temp, rmf = well_parameter_arrays(df_['Well_Name'], inputs)
+
+    # Whole-column computation of every derived curve
+    with stage('petrophysics'):
+        curves = compute_petrophysics(
+            df_['DEPTH'].to_numpy(dtype=float),
+            df_['PHIN'].to_numpy(dtype=float),
+            df_['PHID'].to_numpy(dtype=float),
+            df_['Deep_Resistivity'].to_numpy(dtype=float),
+            df_['Shallow_Resistivity'].to_numpy(dtype=float),
+            gradient, surf_temp, rmf,
+            rw=rw, Temp_rw=Temp_rw, invasion=invasion, rza=rza, a=a, m=m, n=n)
+        for name, values in curves.items():
+            df_[name] = values
+
+    with stage('shale_volume'):
+        df_=calculate_shale_volume(df_,Maximum_gr=Maximum_gr,Minimum_gr=Minimum_gr,
+                                  ssp=ssp,sp_baseline=sp_baseline,sp_shift=sp_shift,
+                                   shale_phid=shale_phid,shale_phi_n=shale_phi_n)
     return df_
 
 def calculate_shale_volume(df, Maximum_gr, Minimum_gr, ssp, sp_baseline, sp_shift, shale_phid, shale_phi_n):
@@ -92,15 +177,27 @@ def calculate_shale_volume(df, Maximum_gr, Minimum_gr, ssp, sp_baseline, sp_shif
     - pd.DataFrame: Updated DataFrame with new Vsh columns appended.
     """
 
-    # First Technique: Gamma Ray Deflection Vsh
-    df['Vsh_gamma_ray'] = (df['GR'] - Minimum_gr) / (Maximum_gr - Minimum_gr)
+    # Gamma ray deflection, SP-based and porosity-based Vsh in one fused pass
+    out = shale_volume_kernel(df['GR'].to_numpy(), df['SP'].to_numpy(), df['PHIN'].to_numpy(), df['PHID'].to_numpy(),
+                              Maximum_gr=Maximum_gr, Minimum_gr=Minimum_gr, ssp=ssp, sp_baseline=sp_baseline,
+                              sp_shift=sp_shift, shale_phid=shale_phid, shale_phi_n=shale_phi_n)
+    for name, values in zip(SHALE_CURVES, out):
+        df[name] = values
 
-    # Second Technique: SP-Based Vsh
-    sp_shifted = df['SP'] + sp_shift
-    df['Vsh_sp'] = 1 - (sp_shifted - sp_baseline) / ssp
+    # Return the full DataFrame with new columns
+    return df
 
-    # Third Technique: Porosity-Based Vsh
-    df['Vsh_porosity'] = (df['PHIN'] - df['PHID']) / (shale_phi_n - shale_phid)
 
-    # Return the full DataFrame with new columns
-    return df
\ No newline at end of file
+def vsh_gamma_ray(gr, Maximum_gr, Minimum_gr):
+    """Gamma ray index between the clean (Minimum_gr) and shale (Maximum_gr) lines."""
+    return (gr - Minimum_gr) / (Maximum_gr - Minimum_gr)
+
+
+def vsh_sp(sp, ssp, sp_baseline, sp_shift):
+    """SP-based shale volume after shifting SP by sp_shift."""
+    return 1 - ((sp + sp_shift) - sp_baseline) / ssp
+
+
+def vsh_porosity(phin, phid, shale_phid, shale_phi_n):
+    """Neutron-density separation normalised by the shale separation."""
+    return (phin - phid) / (shale_phi_n - shale_phid)
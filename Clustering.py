@@ -0,0 +1,140 @@
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+from Profiling import stage
+
+# labels: cluster of every kept point; centers: (k, 2) cluster centers;
+# mask: rows of the input that were finite and clustered; source: 'cache', 'warm', 'cold' or 'minibatch'
+ClusterResult = namedtuple('ClusterResult', ['labels', 'centers', 'mask', 'source'])
+
+
+def data_fingerprint(*arrays):
+    """Hash of the raw bytes of the arrays, used to tell whether the crossplot data changed."""
+    digest = hashlib.blake2b(digest_size=16)
+    for array in arrays:
+        digest.update(np.ascontiguousarray(array).view(np.uint8))
+    return digest.hexdigest()
+
+
+def window_overlap(a, b):
+    """Overlap of two (top, base) depth windows as a fraction of the larger one; None bounds are open."""
+    top_a, base_a = (-np.inf if a[0] is None else a[0]), (np.inf if a[1] is None else a[1])
+    top_b, base_b = (-np.inf if b[0] is None else b[0]), (np.inf if b[1] is None else b[1])
+    if (top_a, base_a) == (top_b, base_b):
+        return 1.0
+    overlap = min(base_a, base_b) - max(top_a, top_b)
+    span = max(base_a - top_a, base_b - top_b)
+    if overlap <= 0 or not np.isfinite(span):
+        return 0.0
+    return float(overlap / span)
+
+
+class BvwClusterer:
+    """
+    KMeans clustering service for the BVW (porosity vs Sw) crossplot.
+
+    Rows with NaN or inf are dropped before fitting. Fitted results are cached per
+    (well, depth window, n_clusters, data) with LRU eviction, so reruns that do not touch the
+    crossplot reuse the previous labels. When only the window or the data moved a little, the
+    fit is warm-started from the previous centers with a single initialisation. Above
+    minibatch_threshold points, MiniBatchKMeans is fitted incrementally with partial_fit so
+    multi-million point, multi-well crossplots stay interactive.
+
+    Parameters:
+    - max_results (int): Number of fitted results kept
+    - minibatch_threshold (int): Point count from which mini-batch fitting is used
+    - batch_size (int): Mini-batch size
+    - warm_start_overlap (float): Minimum window overlap for warm-starting from previous centers
+    - random_state (int): Seed of every fit
+    """
+
+    def __init__(self, max_results=32, minibatch_threshold=200_000, batch_size=8192, warm_start_overlap=0.5,
+                 random_state=0):
+        self.max_results = max_results
+        self.minibatch_threshold = minibatch_threshold
+        self.batch_size = batch_size
+        self.warm_start_overlap = warm_start_overlap
+        self.random_state = random_state
+        self._results = OrderedDict()
+        self._latest = {}
+        self._lock = threading.Lock()
+
+    def fit_predict(self, phi, sw, n_clusters, well_key=None, window=(None, None)):
+        """
+        Cluster the (phi, Sw) points of a crossplot.
+
+        Parameters:
+        - phi, sw (array-like): Porosity and water saturation of every point
+        - n_clusters (int): Requested number of clusters, reduced to the number of valid points if needed
+        - well_key (hashable): Identifies the well(s) the points come from
+        - window (tuple): (top, base) depth window of the points
+
+        Returns:
+        - ClusterResult
+        """
+        phi = np.asarray(phi, dtype=float)
+        sw = np.asarray(sw, dtype=float)
+        mask = np.isfinite(phi) & np.isfinite(sw)
+        points = np.column_stack([phi[mask], sw[mask]])
+        n_clusters = min(n_clusters, len(points))
+        if n_clusters == 0:
+            return ClusterResult(np.empty(0, dtype=np.int32), np.empty((0, 2)), mask, 'cold')
+
+        key = (well_key, tuple(window), n_clusters, data_fingerprint(points))
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None:
+                self._results.move_to_end(key)
+                return ClusterResult(cached.labels, cached.centers, mask, 'cache')
+            previous = self._latest.get((well_key, n_clusters))
+
+        init = None
+        if previous is not None and window_overlap(previous[0], window) >= self.warm_start_overlap:
+            init = previous[1]
+
+        with stage('kmeans'):
+            if len(points) >= self.minibatch_threshold:
+                labels, centers = self._fit_minibatch(points, n_clusters, init)
+                source = 'minibatch'
+            else:
+                from sklearn.cluster import KMeans  # scikit-learn is imported on the first fit, not at startup
+                model = KMeans(n_clusters=n_clusters, random_state=self.random_state,
+                               **({'init': init, 'n_init': 1} if init is not None else {}))
+                labels = model.fit_predict(points)
+                centers = model.cluster_centers_
+                source = 'cold' if init is None else 'warm'
+
+        result = ClusterResult(labels, centers, mask, source)
+        with self._lock:
+            self._results[key] = result
+            self._latest[(well_key, n_clusters)] = (tuple(window), centers)
+            while len(self._results) > self.max_results:
+                self._results.popitem(last=False)
+        return result
+
+    def _fit_minibatch(self, points, n_clusters, init=None, epochs=2):
+        """Fit MiniBatchKMeans incrementally over shuffled mini-batches and label every point."""
+        from sklearn.cluster import MiniBatchKMeans
+        model = MiniBatchKMeans(n_clusters=n_clusters, random_state=self.random_state, batch_size=self.batch_size,
+                                **({'init': init, 'n_init': 1} if init is not None else {'n_init': 3}))
+        rng = np.random.default_rng(self.random_state)
+        for _ in range(epochs):
+            order = rng.permutation(len(points))
+            for start in range(0, len(points), self.batch_size):
+                batch = points[order[start:start + self.batch_size]]
+                if len(batch) >= n_clusters or start == 0:
+                    model.partial_fit(batch)
+
+        labels = np.empty(len(points), dtype=np.int32)
+        step = self.batch_size * 64
+        for start in range(0, len(points), step):
+            labels[start:start + step] = model.predict(points[start:start + step])
+        return labels, model.cluster_centers_
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+            self._latest.clear()
@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+
+from Calculations import compute_petrophysics, well_parameter_arrays
+from Kernels import PETROPHYSICS_CURVES, SHALE_CURVES, shale_volume_kernel
+
+# Derived columns of process_well_data_optimized, in its column order
+COMPUTED_CURVES = PETROPHYSICS_CURVES + SHALE_CURVES
+
+# Agreed tolerance of compact curves against float64 results: |compact - exact| <= atol + rtol * |exact|.
+# float32 keeps about 7 significant digits; rounding the raw curves and the outputs costs a few ulps.
+COMPACT_RTOL = 1e-5
+COMPACT_ATOL = 1e-6
+
+# Samples computed per float64 scratch pass; the scratch buffer is the only float64 allocation
+CHUNK_SIZE = 65_536
+
+
+def compact_frame(df, dtype=np.float32, keep=('DEPTH',)):
+    """
+    Compact version of a raw well frame: float32 curves and a categorical Well_Name.
+
+    Columns that are already compact are shared with df rather than copied.
+
+    Parameters:
+    - df (pd.DataFrame): Raw well log data
+    - dtype (np.dtype): Float type of the curves
+    - keep (tuple): Float columns kept at full precision; depth stays float64 so depth
+      windows, merges and cache keys are exact
+
+    Returns:
+    - pd.DataFrame: The compact frame, on df's index.
+    """
+    columns = {}
+    for column in df.columns:
+        values = df[column]
+        if column == 'Well_Name':
+            values = values.astype('category', copy=False)
+        elif column not in keep and pd.api.types.is_float_dtype(values.dtype):
+            values = values.astype(dtype, copy=False)
+        columns[column] = values.array if isinstance(values.dtype, pd.CategoricalDtype) else values.to_numpy()
+    # copy=False keeps every column as its own array instead of consolidating them into a new block
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+
+def process_well_data_compact(df_, inputs, ssp, sp_baseline, shale_phid, shale_phi_n, sp_shift=0, Maximum_gr=150,
+                              Minimum_gr=15, rw=0.05, Temp_rw=78, invasion=None, rza=None, a=1, m=2, n=2,
+                              dtype=np.float32, chunk_size=CHUNK_SIZE):
+    """
+    Compact equivalent of process_well_data_optimized.
+
+    Every derived curve is written into one preallocated (n_curves, n_samples) block of
+    dtype instead of being appended to the frame column by column. The kernels run in
+    float64 over chunks of chunk_size samples in a reusable scratch buffer, and each chunk
+    is rounded into the block, so accuracy is that of float64 math on the compact inputs.
+    The block's rows become the result's columns without another copy.
+
+    Parameters:
+    - df_ (pd.DataFrame): Raw well log data, e.g. from compact_frame (it is not modified)
+    - inputs (pd.DataFrame): Inputs sheet
+    - Remaining parameters as in process_well_data_optimized
+    - dtype (np.dtype): Float type of the derived curves
+    - chunk_size (int): Samples per scratch pass
+
+    Returns:
+    - pd.DataFrame: compact_frame(df_) with the COMPUTED_CURVES columns in place of any existing ones.
+    """
+    n_samples = len(df_)
+    block = np.empty((len(COMPUTED_CURVES), n_samples), dtype=dtype)
+    scratch = np.empty((len(COMPUTED_CURVES), min(chunk_size, n_samples)))
+    petro, shale = scratch[:len(PETROPHYSICS_CURVES)], scratch[len(PETROPHYSICS_CURVES):]
+    columns = {name: df_[name].to_numpy() for name in ('DEPTH', 'PHIN', 'PHID', 'Deep_Resistivity',
+                                                        'Shallow_Resistivity', 'GR', 'SP')}
+    # Well constants are looked up once per well and gathered per chunk by well code
+    codes, wells = pd.factorize(df_['Well_Name'])
+    constants = np.vstack(well_parameter_arrays(np.asarray(wells), inputs)) if len(wells) else np.empty((3, 0))
+
+    previous_bvw = np.nan
+    for start in range(0, n_samples, chunk_size):
+        window = slice(start, min(start + chunk_size, n_samples))
+        size = window.stop - window.start
+        gradient, surf_temp, rmf = constants[:, codes[window]]
+        compute_petrophysics(
+            columns['DEPTH'][window], columns['PHIN'][window], columns['PHID'][window],
+            columns['Deep_Resistivity'][window], columns['Shallow_Resistivity'][window],
+            gradient, surf_temp, rmf, rw=rw, Temp_rw=Temp_rw, invasion=invasion, rza=rza, a=a, m=m, n=n,
+            previous_bvw=previous_bvw, out=petro[:, :size])
+        previous_bvw = petro[PETROPHYSICS_CURVES.index('Bvw'), size - 1]
+        shale_volume_kernel(columns['GR'][window], columns['SP'][window], columns['PHIN'][window],
+                            columns['PHID'][window], Maximum_gr=Maximum_gr, Minimum_gr=Minimum_gr, ssp=ssp,
+                            sp_baseline=sp_baseline, sp_shift=sp_shift, shale_phid=shale_phid,
+                            shale_phi_n=shale_phi_n, out=shale[:, :size])
+        block[:, window] = scratch[:, :size]
+
+    raw = compact_frame(df_, dtype=dtype)
+    columns = {column: raw[column] for column in raw.columns if column not in COMPUTED_CURVES}
+    columns.update(zip(COMPUTED_CURVES, block))
+    return pd.DataFrame(columns, index=df_.index, copy=False)
+
+
+def compact_errors(compact, exact, columns=COMPUTED_CURVES, rtol=COMPACT_RTOL, atol=COMPACT_ATOL):
+    """
+    Compare compact curves with float64 results.
+
+    Parameters:
+    - compact (pd.DataFrame): Result of process_well_data_compact (or a compact CurveCache)
+    - exact (pd.DataFrame): Result of process_well_data_optimized on the float64 frame
+    - columns (tuple): Curves to compare
+    - rtol, atol (float): Tolerance, see COMPACT_RTOL
+
+    Returns:
+    - pd.DataFrame: Per curve the largest absolute and relative error, the largest error as a
+      fraction of the tolerance and whether the curve is within it (NaN must match NaN).
+    """
+    rows = {}
+    for column in columns:
+        approx = compact[column].to_numpy(dtype=float)
+        reference = exact[column].to_numpy(dtype=float)
+        finite = np.isfinite(reference) & np.isfinite(approx)
+        error = np.abs(approx[finite] - reference[finite])
+        allowed = atol + rtol * np.abs(reference[finite])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            relative = error / np.abs(reference[finite])
+        same_gaps = np.array_equal(np.isfinite(approx), np.isfinite(reference))
+        rows[column] = {
+            'max_abs_error': error.max(initial=0.0),
+            'max_rel_error': np.nanmax(relative[np.isfinite(relative)], initial=0.0),
+            'tolerance_used': (error / allowed).max(initial=0.0),
+            'within_tolerance': bool(same_gaps and np.all(error <= allowed)),
+        }
+    return pd.DataFrame.from_dict(rows, orient='index')
+
+
+def frame_nbytes(df):
+    """Memory of a frame in bytes, counting object and categorical columns deeply."""
+    return int(df.memory_usage(index=True, deep=True).sum())
@@ -0,0 +1,199 @@
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+import Calculations as calc
+from CompactFrame import compact_frame
+from Profiling import stage
+
+# Curve-level dependency graph of process_well_data_optimized.
+# Each derived curve lists the curves or raw columns it reads, the user parameters it
+# depends on and the function that computes it. 'inputs' stands for the well's row of the
+# inputs sheet. Insertion order is the column order of process_well_data_optimized.
+CURVE_GRAPH = OrderedDict([
+    ('phi_avg_calc', (('PHIN', 'PHID'), (), calc.average_porosity)),
+    ('phi_avg_calc_filtered', (('phi_avg_calc',), (), calc.filter_porosity)),
+    ('T', (('DEPTH', 'gradient', 'surf_temp'), (), calc.formation_temperature)),
+    ('Rmf_corrected', (('rmf', 'surf_temp', 'T'), (), calc.rmf_at_temperature)),
+    ('Rw_corrected', (('T',), ('rw', 'Temp_rw'), calc.rw_at_temperature)),
+    ('Rwa', (('Deep_Resistivity', 'phi_avg_calc'), ('a', 'm'), calc.apparent_water_resistivity)),
+    ('Sw', (('Rw_corrected', 'Deep_Resistivity', 'phi_avg_calc_filtered'), ('a', 'm', 'n'),
+            calc.archie_saturation)),
+    ('Rxo_water', (('Rw_corrected', 'Rmf_corrected'), ('invasion', 'rza'), calc.flushed_zone_water_resistivity)),
+    ('Sxo', (('Rxo_water', 'Shallow_Resistivity', 'phi_avg_calc_filtered'), ('a', 'm', 'n'),
+             calc.archie_saturation)),
+    ('MHI', (('Sw', 'Sxo'), (), np.divide)),
+    ('Bvw', (('phi_avg_calc_filtered', 'Sw'), (), np.multiply)),
+    ('delta_Bvw', (('Bvw',), (), calc.depth_difference)),
+    ('Vsh_gamma_ray', (('GR',), ('Maximum_gr', 'Minimum_gr'), calc.vsh_gamma_ray)),
+    ('Vsh_sp', (('SP',), ('ssp', 'sp_baseline', 'sp_shift'), calc.vsh_sp)),
+    ('Vsh_porosity', (('PHIN', 'PHID'), ('shale_phid', 'shale_phi_n'), calc.vsh_porosity)),
+])
+
+# Per-well constants looked up from the inputs sheet
+WELL_CONSTANTS = ('gradient', 'surf_temp', 'rmf')
+
+# Intermediate graph nodes that are not columns of process_well_data_optimized
+INTERMEDIATE_CURVES = ('Rxo_water',)
+
+DEFAULT_PARAMETERS = dict(sp_shift=0, Maximum_gr=150, Minimum_gr=15, rw=0.05, Temp_rw=78,
+                          invasion=None, rza=None, a=1, m=2, n=2)
+
+
+@lru_cache(maxsize=None)
+def curve_parameters(curve):
+    """
+    Return every parameter a curve depends on, directly or through its upstream curves.
+
+    Parameters:
+    - curve (str): Name of a derived curve in CURVE_GRAPH
+
+    Returns:
+    - tuple: Sorted parameter names, including 'inputs' when the curve reads the inputs sheet.
+    """
+    sources, params, _ = CURVE_GRAPH[curve]
+    found = set(params)
+    for source in sources:
+        if source in CURVE_GRAPH:
+            found.update(curve_parameters(source))
+        elif source in WELL_CONSTANTS:
+            found.add('inputs')
+    return tuple(sorted(found))
+
+
+def inputs_row(df, inputs):
+    """Hashable snapshot of the inputs sheet rows of the wells in df, used as the 'inputs' parameter."""
+    wells = df['Well_Name'].unique()
+    rows = inputs.loc[inputs['Well'].isin(wells), ['Well', 'TVD', 'T_max', 'T_values', 'Rmf']]
+    return tuple(map(tuple, rows.itertuples(index=False)))
+
+
+class CurveCache:
+    """
+    LRU cache of derived curves keyed by (well, curve, relevant parameter values).
+
+    A curve is recomputed only when a parameter it depends on (see curve_parameters)
+    changes, so moving the SP shift slider recomputes Vsh_sp and reuses every other curve.
+    Eviction is least-recently-used and bounded by the total size of the cached arrays.
+    The cache can be shared by threads processing different wells; curves are computed
+    outside the lock.
+
+    With dtype=np.float32 (compact mode) curves are stored and returned as float32, so the
+    same max_bytes holds twice as many wells; results stay within CompactFrame.COMPACT_RTOL
+    of float64.
+    """
+
+    def __init__(self, max_bytes=512 * 1024**2, dtype=np.float64):
+        self.max_bytes = max_bytes
+        self.dtype = np.dtype(dtype)
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def _lookup(self, key, count=False):
+        # count: record the lookup as a hit or a miss of a curve
+        with self._lock:
+            values = self._entries.get(key)
+            if values is not None:
+                self._entries.move_to_end(key)
+            if count:
+                if values is not None:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+            return values
+
+    def _store(self, key, values):
+        values = values.astype(self.dtype, copy=False)
+        values.flags.writeable = False
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._entries[key].nbytes
+            self._entries[key] = values
+            self.nbytes += values.nbytes
+            while self.nbytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+        return values
+
+    def curve(self, name, well_key, df, inputs, params):
+        """
+        Return one derived curve, computing it and any stale upstream curves on a miss.
+
+        Parameters:
+        - name (str): Curve name in CURVE_GRAPH
+        - well_key (hashable): Identifies the well's raw data, e.g. (source file, mtime, well name)
+        - df (pd.DataFrame): Raw log data of the well
+        - inputs (pd.DataFrame): Inputs sheet
+        - params (dict): Values of every parameter in DEFAULT_PARAMETERS
+
+        Returns:
+        - np.ndarray: Read-only array of the curve, one value per row of df.
+        """
+        if name not in CURVE_GRAPH:
+            return df[name].to_numpy(dtype=float)
+        if 'inputs' not in params:
+            params = {**params, 'inputs': inputs_row(df, inputs)}
+
+        key = (well_key, name) + tuple((param, params[param]) for param in curve_parameters(name))
+        values = self._lookup(key, count=True)
+        if values is not None:
+            return values
+
+        sources, curve_params, func = CURVE_GRAPH[name]
+        args = [self._source(source, well_key, df, inputs, params) for source in sources]
+        args += [params[param] for param in curve_params]
+        with stage(name):
+            values = np.asarray(func(*args), dtype=float)
+        if values.ndim == 0:
+            values = np.full(len(df), values)
+        return self._store(key, values)
+
+    def _source(self, source, well_key, df, inputs, params):
+        if source in WELL_CONSTANTS:
+            return self._well_constants(well_key, df, inputs, params['inputs'])[WELL_CONSTANTS.index(source)]
+        return self.curve(source, well_key, df, inputs, params)
+
+    def _well_constants(self, well_key, df, inputs, row):
+        key = (well_key, 'well_constants', row)
+        constants = self._lookup(key)
+        if constants is not None:
+            return constants
+        constants = np.vstack(calc.well_parameter_arrays(df['Well_Name'], inputs))
+        return self._store(key, constants)
+
+    def process(self, df, inputs, well_key, **params):
+        """
+        Cached equivalent of process_well_data_optimized that leaves df untouched.
+
+        Parameters:
+        - df (pd.DataFrame): Raw log data of the well
+        - inputs (pd.DataFrame): Inputs sheet
+        - well_key (hashable): Identifies the well's raw data
+        - **params: Keyword parameters of process_well_data_optimized
+
+        Returns:
+        - pd.DataFrame: Copy of df with the derived curves appended (compacted in compact mode).
+        """
+        params = {**DEFAULT_PARAMETERS, **params, 'inputs': inputs_row(df, inputs)}
+        curves = {
+            name: self.curve(name, well_key, df, inputs, params)
+            for name in CURVE_GRAPH if name not in INTERMEDIATE_CURVES
+        }
+        result = df.drop(columns=[name for name in curves if name in df.columns])
+        if self.dtype != np.float64:
+            result = compact_frame(result, dtype=self.dtype)
+        return pd.concat([result, pd.DataFrame(curves, index=df.index)], axis=1)
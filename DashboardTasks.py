@@ -0,0 +1,130 @@
+import io
+
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+
+from Calculations import rw_at_temperature
+from Pickett import pickett_well
+from Profiling import stage
+from TrackViewer import ViewerData
+from Zonation import valid_porosity, zone_tops
+
+# Background tasks of the dashboard's single well view. They run on worker threads, so they
+# only compute and return results; the script thread draws them. Figures are built without
+# pyplot, whose global figure registry is not thread-safe. Results may be shared by every
+# session through SharedCache, so they are never modified after they are returned.
+
+
+def process_view(curve_cache, view_df, inputs, well_key, lead, params):
+    # Derived curves of the viewport, without the lead sample above it
+    return curve_cache.process(view_df, inputs=inputs, well_key=well_key, **params).iloc[lead:]
+
+
+def plotter_track_images(plotter_class, df, sp_shift, figure_cache, image_cache, zones=None):
+    # zones is the future of the zonation task, which was submitted first; its tops are drawn on every track
+    tops = zone_tops(zones.result()[1]) if zones is not None else ()
+    plotter = plotter_class(df, sp_shift=sp_shift, figure_cache=figure_cache, zone_tops=tops)
+    return plotter.track_images(image_cache)
+
+
+def saturation_track_images(plotter_class, df, envelope, sp_shift, figure_cache, image_cache, zones=None):
+    # envelope is the future of the uncertainty task, which was submitted first
+    if envelope is not None:
+        df = pd.concat([df, envelope.result()], axis=1)
+    return plotter_track_images(plotter_class, df, sp_shift, figure_cache, image_cache, zones)
+
+
+def viewer_overview(layout, df, envelope, sp_shift, zones=None):
+    # Curves of a layout for the interactive track viewer and their whole-well overview; detail
+    # windows are encoded from the returned ViewerData when the browser asks for them
+    if envelope is not None:
+        df = pd.concat([df, envelope.result()], axis=1)
+    tops = zone_tops(zones.result()[1]) if zones is not None else ()
+    with stage('viewer_payload'):
+        viewer = ViewerData(layout, df, sp_shift=sp_shift, zone_tops=tops)
+        return viewer, viewer.overview()
+
+
+def bvw_scatter_png(scatter_df, n_clusters, clusterer, well_key, window):
+    # Cluster phi_avg_calc vs Sw; rows with NaN or inf are left out, and fitted models are
+    # reused or warm-started across reruns
+    with stage('clustering'):
+        clusters = clusterer.fit_predict(
+            scatter_df['phi_avg_calc'].to_numpy(),
+            scatter_df['Sw'].to_numpy(),
+            n_clusters,
+            well_key=well_key,
+            window=window
+        )
+    phi_values = scatter_df['phi_avg_calc'].to_numpy()[clusters.mask]
+    sw_values = scatter_df['Sw'].to_numpy()[clusters.mask]
+
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+
+    # Plot lines y = k/x for k in 0.02, 0.04, ..., 0.14
+    x = np.linspace(0.01, 0.4, 100)  # Avoid division by zero
+    for k in np.arange(0.02, 0.16, 0.02):
+        ax.plot(x, k / x, label=f'y={k:.2f}/x')
+
+    # Plot scatter points with cluster colors
+    for cluster in range(len(clusters.centers)):
+        in_cluster = clusters.labels == cluster
+        ax.scatter(phi_values[in_cluster], sw_values[in_cluster], label=f'Cluster {cluster + 1}')
+
+    # Plot cluster centers
+    centers = clusters.centers
+    ax.scatter(centers[:, 0], centers[:, 1], c='black', s=200, marker='X', label='Centers')
+
+    ax.set_xlim(0, 0.4)
+    ax.set_ylim(0, 1)
+    ax.set_xlabel('Porosity (Phi)')
+    ax.set_ylabel('Water Saturation (Sw)')
+    ax.legend()
+    # Rasterized here, the way st.pyplot would
+    with stage('scatter_plot'):
+        png = io.BytesIO()
+        fig.savefig(png, format='png', dpi=200, bbox_inches='tight')
+    return png.getvalue()
+
+
+def pickett_analysis(df, a, n, Temp_rw, pickett_params, max_points=20_000):
+    # Sliding-window water line fits and minimum Rwa of the viewport, with a Pickett crossplot
+    # of its clean samples and the suggested water line
+    with stage('pickett'):
+        _, suggestion, candidates = pickett_well(df, a=a, Temp_rw=Temp_rw, **pickett_params)
+
+    phi, rt, depth = (df[column].to_numpy(dtype=float) for column in ('phi_avg_calc', 'Deep_Resistivity', 'DEPTH'))
+    phi = valid_porosity(phi)
+    with np.errstate(invalid='ignore'):
+        clean = ((df[pickett_params['vsh_curve']].to_numpy(dtype=float) <= pickett_params['vsh_cutoff'])
+                 & (phi >= pickett_params['phi_cutoff']) & (rt > 0))
+    rows = np.flatnonzero(clean)
+    if len(rows) > max_points:
+        # A fixed random subset keeps large viewports quick to draw
+        rows = np.sort(np.random.default_rng(0).choice(rows, max_points, replace=False))
+
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    ax.scatter(phi[rows], rt[rows], s=6, alpha=0.3, color='gray', label='Clean samples')
+    if suggestion is not None:
+        in_window = (depth[rows] >= suggestion['top']) & (depth[rows] <= suggestion['base'])
+        ax.scatter(phi[rows][in_window], rt[rows][in_window], s=10, color='tab:blue',
+                   label=f"Water window {suggestion['top']:,.1f}-{suggestion['base']:,.1f}")
+        # Lines of constant Sw for the suggested Rw (at the window's temperature) and m
+        rw = rw_at_temperature(suggestion['temperature'], suggestion['rw'], Temp_rw)
+        phi_line = np.logspace(-2, 0, 50)
+        for sw in (1.0, 0.5, 0.25):
+            ax.plot(phi_line, a * rw / (phi_line**suggestion['m'] * sw**n), label=f'Sw = {sw:g}')
+    ax.set_xscale('log')
+    ax.set_yscale('log')
+    ax.set_xlim(0.01, 1)
+    ax.set_xlabel('Porosity (phi_avg_calc)')
+    ax.set_ylabel('Deep resistivity (ohm.m)')
+    ax.grid(True, which='both', alpha=0.3)
+    ax.legend()
+    with stage('pickett_plot'):
+        png = io.BytesIO()
+        fig.savefig(png, format='png', dpi=120, bbox_inches='tight')
+    return suggestion, candidates, png.getvalue()
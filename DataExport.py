@@ -0,0 +1,93 @@
+# Rows written per chunk by export_frame; bounds the memory of the CSV text or Arrow table built per write
+CHUNK_ROWS = 65_536
+
+# Download MIME type per export format
+EXPORT_MIME = {'csv': 'text/csv', 'parquet': 'application/vnd.apache.parquet'}
+
+
+class OutputWriter:
+    """
+    Append DataFrame chunks to a CSV or Parquet file.
+
+    Parameters:
+    - path (str): Output file
+    - fmt (str): 'csv' or 'parquet'
+    """
+
+    def __init__(self, path, fmt='csv'):
+        if fmt not in ('csv', 'parquet'):
+            raise ValueError(f"Unsupported output format: {fmt}")
+        self.path = path
+        self.fmt = fmt
+        self.rows = 0
+        self._parquet = None
+        self._started = False
+
+    def write(self, df):
+        if self.fmt == 'csv':
+            df.to_csv(self.path, mode='a' if self._started else 'w', header=not self._started, index=False)
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table.cast(self._parquet.schema))
+        self._started = True
+        self.rows += len(df)
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+            self._parquet = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def export_frame(df, path, fmt='csv', columns=None, chunk_rows=CHUNK_ROWS):
+    """
+    Write a processed frame to CSV or Parquet chunk by chunk.
+
+    Only one chunk of the selected columns is copied and encoded at a time, so the whole
+    CSV text or Arrow table of a large well is never held in memory. Every chunk becomes a
+    Parquet row group.
+
+    Parameters:
+    - df (pd.DataFrame): Processed well data
+    - path (str): Output file
+    - fmt (str): 'csv' or 'parquet'
+    - columns (list): Columns to write, all by default
+    - chunk_rows (int): Rows per chunk
+
+    Returns:
+    - int: Number of rows written.
+    """
+    columns = list(df.columns) if columns is None else list(columns)
+    with OutputWriter(path, fmt) as writer:
+        # An empty frame still writes its header (or schema)
+        for start in range(0, max(len(df), 1), chunk_rows):
+            writer.write(df.iloc[start:start + chunk_rows][columns])
+    return writer.rows
+
+
+def table_page(df, page, page_size, columns=None):
+    """
+    One page of a frame, the only part of it the dashboard table sends to the browser.
+
+    Parameters:
+    - df (pd.DataFrame): Rows to page through
+    - page (int): 1-based page number, clamped to the pages of df
+    - page_size (int): Rows per page
+    - columns (list): Columns to show, all by default
+
+    Returns:
+    - tuple: (page DataFrame, first row number, number of pages); row numbers are 0-based.
+    """
+    n_pages = max(1, -(-len(df) // page_size))
+    start = (min(max(page, 1), n_pages) - 1) * page_size
+    rows = df.iloc[start:start + page_size]
+    return (rows if columns is None else rows[list(columns)]), start, n_pages
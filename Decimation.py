@@ -0,0 +1,194 @@
+from contextlib import contextmanager
+
+import numpy as np
+
+# st.pyplot rasterizes figures at 200 dpi
+RENDER_DPI = 200
+
+
+def minmax_indices(depth, values, n_bins, window=None):
+    """
+    Select the samples that keep a depth track visually identical at n_bins pixel rows.
+
+    The depth window is split into n_bins equal bins and, for every bin, the first, last,
+    minimum and maximum samples are kept (M4 decimation turned on its side). Spikes such as
+    thin beds or resistivity peaks survive because the extremes of each bin are always kept.
+    The first NaN of a bin is kept too, so gaps in a curve stay gaps.
+
+    Parameters:
+    - depth (np.ndarray): Depth of every sample, ascending
+    - values (np.ndarray or list of np.ndarray): Curve(s) plotted against depth; extremes of every curve are kept
+    - n_bins (int): Number of depth bins, usually the pixel height of the track divided by 2
+    - window (tuple): (top, base) depth window, the whole depth range by default
+
+    Returns:
+    - np.ndarray: Sorted sample indices to plot.
+    """
+    depth = np.asarray(depth, dtype=float)
+    curves = [np.asarray(v, dtype=float) for v in (values if isinstance(values, (list, tuple)) else [values])]
+
+    # Restrict to the window plus one sample on each side so lines reach the track edges
+    start, stop = 0, len(depth)
+    if window is not None:
+        top, base = min(window), max(window)
+        start = max(np.searchsorted(depth, top, side='left') - 1, 0)
+        stop = min(np.searchsorted(depth, base, side='right') + 1, len(depth))
+    if stop - start <= 4 * n_bins:
+        return np.arange(start, stop)
+
+    d = depth[start:stop]
+    top, base = d[0], d[-1]
+    if base > top:
+        bins = ((d - top) * (n_bins / (base - top))).astype(np.int64)
+        np.minimum(bins, n_bins - 1, out=bins)
+    else:
+        # Every sample at one depth (or no finite span): one bin, so its first, last and extremes are kept
+        bins = np.zeros(len(d), dtype=np.int64)
+    starts = np.flatnonzero(np.r_[True, bins[1:] != bins[:-1]])
+    ends = np.r_[starts[1:], len(d)] - 1
+
+    positions = np.arange(len(d))
+    keep = [starts, ends]
+    for curve in curves:
+        v = curve[start:stop]
+        nan = np.isnan(v)
+        for reduce in (np.fmin, np.fmax):
+            extreme = reduce.reduceat(v, starts)
+            hit = v == np.repeat(extreme, np.diff(np.r_[starts, len(d)]))
+            keep.append(np.minimum.reduceat(np.where(hit, positions, len(d)), starts))
+        keep.append(np.minimum.reduceat(np.where(nan, positions, len(d)), starts))
+
+    selected = np.unique(np.concatenate(keep))
+    return selected[selected < len(d)] + start
+
+
+def depth_ticks(min_depth, max_depth, step=10, max_ticks=100):
+    """
+    Depth ticks every `step` ft, widened to 20, 50, 100, ... ft when more than max_ticks would be drawn.
+
+    Tick labels are far more expensive to draw than line points, so long wells keep a readable grid.
+    """
+    span = max_depth - min_depth
+    candidates = [step * factor * scale for scale in (1, 10, 100, 1000, 10000) for factor in (1, 2, 5)]
+    step = next((c for c in candidates if span / c <= max_ticks), candidates[-1])
+    return np.arange(min_depth, max_depth + step, step)
+
+
+def is_ascending(depth):
+    depth = np.asarray(depth)
+    return len(depth) < 2 or bool(np.all(depth[1:] >= depth[:-1]))
+
+
+def fill_polygons(depth, x1, x2, where):
+    """
+    Polygons fill_betweenx would draw between x1 and x2 where `where` holds.
+
+    Parameters:
+    - depth, x1, x2 (np.ndarray): Depth and the two curves
+    - where (np.ndarray): Boolean mask of the samples to fill; NaN samples are never filled
+
+    Returns:
+    - list of np.ndarray: One (k, 2) vertex array per contiguous run of filled samples.
+    """
+    where = where & np.isfinite(depth) & np.isfinite(x1) & np.isfinite(x2)
+    edges = np.flatnonzero(np.diff(np.r_[0, where.astype(np.int8), 0]))
+    polygons = []
+    for start, stop in zip(edges[::2], edges[1::2]):
+        d = depth[start:stop]
+        polygons.append(np.column_stack([np.r_[x1[start:stop], x2[start:stop][::-1]], np.r_[d, d[::-1]]]))
+    return polygons
+
+
+class DepthDecimator:
+    """
+    Keep depth-track lines and fills decimated to the pixel rows of their figure.
+
+    Registered artists keep a reference to their full resolution data and are re-decimated
+    whenever the depth limits of any registered axes change, so zooming into a depth window
+    brings back every sample inside it. Data is replaced in place with set_line_data and
+    set_fill_data, so artists are never recreated.
+
+    Parameters:
+    - fig (matplotlib.figure.Figure): Figure the tracks are drawn on
+    - axes_height (float): Height of the track axes as a fraction of the figure height
+    - dpi (int): Resolution the figure is rasterized at
+    - points_per_pixel (float): Cap on plotted points per pixel row of the track, None draws every sample
+    """
+
+    def __init__(self, fig, axes_height=0.9, dpi=RENDER_DPI, points_per_pixel=2):
+        self.fig = fig
+        self.axes_height = axes_height
+        self.dpi = dpi
+        self.points_per_pixel = points_per_pixel
+        self._series = {}
+        self._axes = set()
+        self._held = False
+
+    @property
+    def n_bins(self):
+        pixel_rows = self.fig.get_figheight() * self.dpi * self.axes_height
+        # Every bin keeps up to four samples (first, last, min, max)
+        return max(int(pixel_rows * self.points_per_pixel / 4), 1)
+
+    def _indices(self, depth, curves, window):
+        if self.points_per_pixel is None or not is_ascending(depth):
+            return np.arange(len(depth))
+        return minmax_indices(depth, curves, self.n_bins, window)
+
+    def _register(self, ax, artist, kind):
+        if ax not in self._axes:
+            self._axes.add(ax)
+            ax.callbacks.connect('ylim_changed', self._on_ylim_changed)
+        self._series[artist] = {'kind': kind, 'ax': ax, 'data': None, 'window': None}
+
+    def add_line(self, ax, line):
+        """Register a Line2D of ax whose data is set with set_line_data."""
+        self._register(ax, line, 'line')
+
+    def add_fill(self, ax, collection):
+        """Register a PolyCollection of ax whose data is set with set_fill_data."""
+        self._register(ax, collection, 'fill')
+
+    def set_line_data(self, line, x, depth):
+        self._series[line]['data'] = (np.asarray(depth, dtype=float), np.asarray(x, dtype=float))
+        self._redraw(line, force=True)
+
+    def set_fill_data(self, collection, depth, x1, x2, where=None):
+        depth = np.asarray(depth, dtype=float)
+        where = np.ones(len(depth), dtype=bool) if where is None else np.asarray(where, dtype=bool)
+        self._series[collection]['data'] = (depth, np.asarray(x1, dtype=float), np.asarray(x2, dtype=float), where)
+        self._redraw(collection, force=True)
+
+    @contextmanager
+    def hold(self):
+        """Ignore depth limit changes inside the block, e.g. while new data is being set."""
+        self._held = True
+        try:
+            yield
+        finally:
+            self._held = False
+
+    def _redraw(self, artist, force=False):
+        series = self._series[artist]
+        if series['data'] is None:
+            return
+        ylim = series['ax'].get_ylim()
+        window = (min(ylim), max(ylim))
+        if window == series['window'] and not force:
+            return
+        series['window'] = window
+        if series['kind'] == 'line':
+            depth, x = series['data']
+            idx = self._indices(depth, x, window)
+            artist.set_data(x[idx], depth[idx])
+        else:
+            depth, x1, x2, where = series['data']
+            idx = self._indices(depth, [x1, x2], window)
+            artist.set_verts(fill_polygons(depth[idx], x1[idx], x2[idx], where[idx]))
+
+    def _on_ylim_changed(self, ax):
+        if self._held:
+            return
+        # Tracks share the depth axis, so every registered artist follows the new window
+        for artist in self._series:
+            self._redraw(artist)
@@ -0,0 +1,99 @@
+import numpy as np
+
+
+class DepthIndex:
+    """
+    Sorted depth index of one well for O(log n) window extraction.
+
+    Depth is checked once for NaN and for ascending order, and the sampling step is recorded
+    when it is regular. Windows are found with a binary search and returned as positional
+    slices, so df.iloc / array views of a window share memory with the well instead of
+    building boolean masks and copies. Wells whose depth is not ascending, or that have
+    samples without a depth, keep the rows of their sorted depths in `order`; their windows
+    are taken through it and are copies, and rows with a NaN depth are in no window.
+
+    Parameters:
+    - depth (array-like): Depth of every sample of the well
+    - rtol (float): Relative tolerance for treating the sampling step as regular
+    """
+
+    def __init__(self, depth, rtol=1e-6):
+        depth = np.asarray(depth, dtype=float)
+        missing = np.isnan(depth)
+        # Rows with a depth, None when every row has one
+        rows = np.flatnonzero(~missing) if missing.any() else None
+        if rows is not None:
+            depth = depth[rows]
+        steps = np.diff(depth)
+        self.is_sorted = bool(np.all(steps >= 0))
+        self.order = rows
+        if not self.is_sorted:
+            order = np.argsort(depth, kind='stable')
+            self.order = order if rows is None else rows[order]
+            depth = depth[order]
+            steps = np.diff(depth)
+        self.depth = depth
+
+        # Regular sampling interval, None for irregular or too short logs
+        self.step = None
+        if len(steps) and steps[0] > 0 and np.allclose(steps, steps[0], rtol=rtol, atol=0):
+            self.step = float(steps[0])
+
+    def __len__(self):
+        return len(self.depth)
+
+    @property
+    def top(self):
+        return self.depth[0] if len(self.depth) else np.nan
+
+    @property
+    def base(self):
+        return self.depth[-1] if len(self.depth) else np.nan
+
+    def bounds(self, top=None, base=None, lead=0):
+        """
+        Positions of the samples with top <= depth <= base.
+
+        Parameters:
+        - top, base (float): Window limits, None for an open limit
+        - lead (int): Extra samples kept above the window, e.g. for curves that difference the previous sample
+
+        Returns:
+        - tuple: (start, stop) positions in sorted order.
+        """
+        start = 0 if top is None else int(np.searchsorted(self.depth, top, side='left'))
+        stop = len(self.depth) if base is None else int(np.searchsorted(self.depth, base, side='right'))
+        start = max(start - lead, 0)
+        return start, max(start, stop)
+
+    def take(self, values, top=None, base=None, lead=0):
+        """Window of an array aligned with the well's rows; a view when depth is sorted."""
+        start, stop = self.bounds(top, base, lead)
+        if self.order is None:
+            return values[start:stop]
+        return values[self.order[start:stop]]
+
+    def view(self, df, top=None, base=None, lead=0):
+        """
+        Rows of the well within the window.
+
+        Parameters:
+        - df (pd.DataFrame): Well data in the row order the index was built from
+        - top, base (float): Window limits, None for an open limit
+        - lead (int): Extra samples kept above the window
+
+        Returns:
+        - pd.DataFrame: The window, sliced without copying when depth is sorted.
+        """
+        start, stop = self.bounds(top, base, lead)
+        if self.order is None:
+            return df.iloc[start:stop]
+        return df.iloc[self.order[start:stop]]
+
+    def window(self, top=None, base=None, lead=0):
+        """DepthIndex of a window, aligned with the rows returned by view for the same arguments."""
+        start, stop = self.bounds(top, base, lead)
+        sub = DepthIndex.__new__(DepthIndex)
+        sub.depth = self.depth[start:stop]
+        sub.is_sorted, sub.order, sub.step = True, None, self.step
+        return sub
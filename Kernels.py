@@ -0,0 +1,227 @@
+import numpy as np
+
+# Numba is optional: without it the kernels fall back to NumPy ufuncs writing into the same buffers
+try:
+    import numba
+except ImportError:
+    numba = None
+
+NUMBA_AVAILABLE = numba is not None
+
+# Rows of the petrophysics output buffer, in the column order of process_well_data_optimized
+PETROPHYSICS_CURVES = ('phi_avg_calc', 'phi_avg_calc_filtered', 'T', 'Rmf_corrected', 'Rw_corrected', 'Rwa',
+                       'Sw', 'Sxo', 'MHI', 'Bvw', 'delta_Bvw')
+
+# Rows of the shale volume output buffer
+SHALE_CURVES = ('Vsh_gamma_ray', 'Vsh_sp', 'Vsh_porosity')
+
+# Water resistivity used for Sxo: Rza, temperature-corrected Rmf, or the Rw/Rmf mix of an invasion depth
+SXO_RZA, SXO_RMF, SXO_INVASION = 0, 1, 2
+
+
+def petrophysics_numpy(depth, phin, phid, deep_res, shallow_res, gradient, surf_temp, rmf,
+                       rw, Temp_rw, sxo_mode, z, rza, a, m, n, previous_bvw, out):
+    """
+    NumPy version of petrophysics_kernel.
+
+    Every ufunc writes into a row of `out`, and rows that are not final yet double as scratch
+    space, so the only allocations are two boolean masks.
+    """
+    phi_avg, phi_filtered, T, rmf_corrected, rw_corrected, rwa, sw, sxo, mhi, bvw, delta_bvw = out
+
+    np.multiply(phin, phin, out=phi_avg)
+    np.multiply(phid, phid, out=phi_filtered)
+    np.add(phi_avg, phi_filtered, out=phi_avg)
+    np.divide(phi_avg, 2, out=phi_avg)
+    np.sqrt(phi_avg, out=phi_avg)
+    np.copyto(phi_filtered, phi_avg)
+    np.copyto(phi_filtered, np.nan, where=phi_avg < 0)
+
+    np.multiply(gradient, depth, out=T)
+    np.divide(T, 100, out=T)
+    np.add(T, surf_temp, out=T)
+
+    np.add(surf_temp, 6.77, out=rmf_corrected)
+    np.multiply(rmf, rmf_corrected, out=rmf_corrected)
+    np.add(T, 6.77, out=rw_corrected)
+    np.divide(rmf_corrected, rw_corrected, out=rmf_corrected)
+    np.divide(rw * (Temp_rw + 6.77), rw_corrected, out=rw_corrected)
+
+    np.power(phi_avg, m, out=rwa)
+    np.multiply(deep_res, rwa, out=rwa)
+    np.divide(rwa, a, out=rwa)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        np.power(phi_filtered, m, out=sw)
+        np.multiply(deep_res, sw, out=sw)
+        np.multiply(rw_corrected, a, out=mhi)
+        np.divide(mhi, sw, out=sw)
+        np.power(sw, 1 / n, out=sw)
+
+        # Flushed-zone water resistivity times a, staged in the MHI row
+        if sxo_mode == SXO_RZA:
+            mhi.fill(rza * a)
+        elif sxo_mode == SXO_RMF:
+            np.multiply(rmf_corrected, a, out=mhi)
+        else:
+            np.divide(z, rw_corrected, out=mhi)
+            np.divide(1 - z, rmf_corrected, out=bvw)
+            np.add(mhi, bvw, out=mhi)
+            np.divide(1, mhi, out=mhi)
+            np.multiply(mhi, a, out=mhi)
+        np.power(phi_filtered, m, out=sxo)
+        np.multiply(shallow_res, sxo, out=sxo)
+        np.divide(mhi, sxo, out=sxo)
+        np.power(sxo, 1 / n, out=sxo)
+
+        np.divide(sw, sxo, out=mhi)
+    np.multiply(phi_filtered, sw, out=bvw)
+
+    if len(bvw):
+        delta_bvw[0] = bvw[0] - previous_bvw
+        np.subtract(bvw[1:], bvw[:-1], out=delta_bvw[1:])
+        np.copyto(delta_bvw, 0, where=np.isnan(delta_bvw))
+    return out
+
+
+def shale_volume_numpy(gr, sp, phin, phid, Maximum_gr, Minimum_gr, ssp, sp_baseline, sp_shift,
+                       shale_phid, shale_phi_n, out):
+    """NumPy version of shale_volume_kernel."""
+    vsh_gamma_ray, vsh_sp, vsh_porosity = out
+
+    np.subtract(gr, Minimum_gr, out=vsh_gamma_ray)
+    np.divide(vsh_gamma_ray, Maximum_gr - Minimum_gr, out=vsh_gamma_ray)
+
+    np.add(sp, sp_shift, out=vsh_sp)
+    np.subtract(vsh_sp, sp_baseline, out=vsh_sp)
+    np.divide(vsh_sp, ssp, out=vsh_sp)
+    np.subtract(1, vsh_sp, out=vsh_sp)
+
+    np.subtract(phin, phid, out=vsh_porosity)
+    np.divide(vsh_porosity, shale_phi_n - shale_phid, out=vsh_porosity)
+    return out
+
+
+if NUMBA_AVAILABLE:
+    @numba.njit(cache=True, error_model='numpy')
+    def _power(x, p):
+        # pow dominates the loop; the default Archie exponents of 2 (and 1/2) get exact shortcuts
+        if p == 2.0:
+            return x * x
+        if p == 0.5:
+            return np.sqrt(x)
+        return x ** p
+
+    @numba.njit(cache=True, error_model='numpy')
+    def _petrophysics_loop(depth, phin, phid, deep_res, shallow_res, gradient, surf_temp, rmf,
+                           rw, Temp_rw, sxo_mode, z, rza, a, m, n, previous_bvw, out):
+        rw_numerator = rw * (Temp_rw + 6.77)
+        inverse_n = 1 / n
+        previous = previous_bvw
+        for i in range(depth.shape[0]):
+            phi_avg = np.sqrt((phin[i] * phin[i] + phid[i] * phid[i]) / 2)
+            phi = phi_avg if phi_avg >= 0 else np.nan
+            T = gradient[i] * depth[i] / 100 + surf_temp[i]
+            rmf_corrected = rmf[i] * (surf_temp[i] + 6.77) / (T + 6.77)
+            rw_corrected = rw_numerator / (T + 6.77)
+
+            if sxo_mode == 0:
+                rxo_water = rza
+            elif sxo_mode == 1:
+                rxo_water = rmf_corrected
+            else:
+                rxo_water = 1 / ((z / rw_corrected) + ((1 - z) / rmf_corrected))
+
+            # phi_avg is a square root, so phi equals it wherever it is not NaN and phi_avg**m serves Rwa, Sw and Sxo
+            phi_m = _power(phi_avg, m)
+            sw = _power(rw_corrected * a / (deep_res[i] * phi_m), inverse_n)
+            sxo = _power(rxo_water * a / (shallow_res[i] * phi_m), inverse_n)
+            bvw = phi * sw
+            delta = bvw - previous
+            previous = bvw
+
+            out[0, i] = phi_avg
+            out[1, i] = phi
+            out[2, i] = T
+            out[3, i] = rmf_corrected
+            out[4, i] = rw_corrected
+            out[5, i] = deep_res[i] * phi_m / a
+            out[6, i] = sw
+            out[7, i] = sxo
+            out[8, i] = sw / sxo
+            out[9, i] = bvw
+            out[10, i] = 0.0 if np.isnan(delta) else delta
+        return out
+
+    @numba.njit(cache=True, error_model='numpy')
+    def _shale_volume_loop(gr, sp, phin, phid, Maximum_gr, Minimum_gr, ssp, sp_baseline, sp_shift,
+                           shale_phid, shale_phi_n, out):
+        gr_range = Maximum_gr - Minimum_gr
+        shale_separation = shale_phi_n - shale_phid
+        for i in range(gr.shape[0]):
+            out[0, i] = (gr[i] - Minimum_gr) / gr_range
+            out[1, i] = 1 - ((sp[i] + sp_shift) - sp_baseline) / ssp
+            out[2, i] = (phin[i] - phid[i]) / shale_separation
+        return out
+
+    petrophysics_compiled = _petrophysics_loop
+    shale_volume_compiled = _shale_volume_loop
+else:
+    petrophysics_compiled = petrophysics_numpy
+    shale_volume_compiled = shale_volume_numpy
+
+
+def as_float_array(values, length=None):
+    """Contiguous float64 view of values (no copy when it already is one), broadcast to length if needed."""
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    if length is not None and values.shape != (length,):
+        values = np.ascontiguousarray(np.broadcast_to(values, (length,)))
+    return values
+
+
+def petrophysics_kernel(depth, phin, phid, deep_res, shallow_res, gradient, surf_temp, rmf,
+                        rw=0.05, Temp_rw=78, sxo_mode=SXO_RMF, z=0.0, rza=np.nan, a=1, m=2, n=2,
+                        previous_bvw=np.nan, out=None):
+    """
+    Fused single-pass computation of every curve of PETROPHYSICS_CURVES.
+
+    Porosity, temperature corrections, Rwa, Archie Sw and Sxo, MHI, Bvw and delta_Bvw are
+    computed in one loop (Numba) or one chain of in-place ufuncs (NumPy fallback) and written
+    into rows of a preallocated (11, n_samples) buffer.
+
+    Parameters:
+    - depth, phin, phid, deep_res, shallow_res (np.ndarray): Raw curves, one value per sample
+    - gradient, surf_temp, rmf (np.ndarray): Per-sample well constants
+    - rw, Temp_rw, a, m, n (float): As in compute_petrophysics
+    - sxo_mode (int): SXO_RZA, SXO_RMF or SXO_INVASION
+    - z (float): Invasion depth factor for SXO_INVASION
+    - rza (float): Flushed-zone water resistivity for SXO_RZA
+    - previous_bvw (float): Bvw of the sample before depth[0], NaN when there is none
+    - out (np.ndarray): Optional (11, n_samples) float64 buffer to write into
+
+    Returns:
+    - np.ndarray: The output buffer, one row per curve of PETROPHYSICS_CURVES.
+    """
+    depth = as_float_array(depth)
+    size = len(depth)
+    arrays = [as_float_array(values, size) for values in (phin, phid, deep_res, shallow_res, gradient, surf_temp, rmf)]
+    if out is None:
+        out = np.empty((len(PETROPHYSICS_CURVES), size))
+    return petrophysics_compiled(depth, *arrays, float(rw), float(Temp_rw), int(sxo_mode), float(z),
+                                 float(rza), float(a), float(m), float(n), float(previous_bvw), out)
+
+
+def shale_volume_kernel(gr, sp, phin, phid, Maximum_gr=150, Minimum_gr=15, ssp=-100, sp_baseline=0,
+                        sp_shift=0, shale_phid=0.2, shale_phi_n=0.3, out=None):
+    """
+    Fused single-pass computation of the three shale volume curves of SHALE_CURVES.
+
+    Returns:
+    - np.ndarray: The (3, n_samples) output buffer.
+    """
+    gr = as_float_array(gr)
+    sp, phin, phid = (as_float_array(values, len(gr)) for values in (sp, phin, phid))
+    if out is None:
+        out = np.empty((len(SHALE_CURVES), len(gr)))
+    return shale_volume_compiled(gr, sp, phin, phid, float(Maximum_gr), float(Minimum_gr), float(ssp),
+                                 float(sp_baseline), float(sp_shift), float(shale_phid), float(shale_phi_n), out)
@@ -0,0 +1,227 @@
+import argparse
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+from Calculations import well_parameter_arrays, compute_petrophysics, calculate_shale_volume
+from Profiling import stage
+
+# LAS mnemonics (upper case) mapped to the column names Calculations.py and the plotters expect.
+# The first mnemonic of a file that maps to a column wins.
+MNEMONIC_MAP = {
+    'DEPT': 'DEPTH', 'DEPTH': 'DEPTH', 'MD': 'DEPTH',
+    'GR': 'GR', 'GRC': 'GR', 'SGR': 'GR', 'GRGC': 'GR',
+    'SP': 'SP', 'SPC': 'SP',
+    'PHIN': 'PHIN', 'NPHI': 'PHIN', 'NPOR': 'PHIN', 'TNPH': 'PHIN', 'CNL': 'PHIN',
+    'PHID': 'PHID', 'DPHI': 'PHID', 'DPOR': 'PHID',
+    'ILD': 'Deep_Resistivity', 'RILD': 'Deep_Resistivity', 'LLD': 'Deep_Resistivity', 'RD': 'Deep_Resistivity',
+    'RT': 'Deep_Resistivity', 'AT90': 'Deep_Resistivity', 'DEEP_RESISTIVITY': 'Deep_Resistivity',
+    # RM is not mapped: it is conventionally the mud resistivity, not a medium-induction curve
+    'ILM': 'Medium_Resistivity', 'RILM': 'Medium_Resistivity',
+    'AT30': 'Medium_Resistivity', 'MEDIUM_RESISTIVITY': 'Medium_Resistivity',
+    'SFL': 'Shallow_Resistivity', 'SFLU': 'Shallow_Resistivity', 'LLS': 'Shallow_Resistivity',
+    'RS': 'Shallow_Resistivity', 'AT10': 'Shallow_Resistivity', 'SHALLOW_RESISTIVITY': 'Shallow_Resistivity',
+    'RNML': 'RNML', 'MNOR': 'RNML',
+    'RLML': 'RLML', 'MINV': 'RLML',
+    'CALI': 'CALI', 'CAL': 'CALI', 'HCAL': 'CALI', 'CALS': 'CALI',
+    'BIT': 'BIT', 'BS': 'BIT',
+    'CORR': 'CORR', 'DRHO': 'CORR', 'HDRA': 'CORR',
+}
+
+# Columns process_well_data_optimized and the plotters read; missing ones are filled with NaN
+EXPECTED_COLUMNS = ['DEPTH', 'GR', 'SP', 'PHIN', 'PHID', 'Deep_Resistivity', 'Medium_Resistivity',
+                    'Shallow_Resistivity', 'RNML', 'RLML', 'CALI', 'BIT', 'CORR']
+
+
+def read_las_header(path):
+    """
+    Parse the header sections of a LAS 2.0 file, stopping at the ~A section.
+
+    Parameters:
+    - path (str): LAS file path
+
+    Returns:
+    - dict: 'version' and 'well' (mnemonic -> value), 'curves' (mnemonics in data order),
+      'null' (null value or None), 'wrap' (bool) and 'data_line' (line number of the first data line).
+    """
+    sections = {'V': {}, 'W': {}}
+    curves = []
+    section = None
+    with open(path, 'r', errors='replace') as f:
+        for line_no, line in enumerate(f):
+            stripped = line.strip()
+            if not stripped or stripped.startswith('#'):
+                continue
+            if stripped.startswith('~'):
+                section = stripped[1:2].upper()
+                if section == 'A':
+                    break
+                continue
+            if section not in ('V', 'W', 'C'):
+                continue
+            # MNEM.UNIT  VALUE : DESCRIPTION
+            mnemonic, _, rest = stripped.partition('.')
+            value = rest.split(' ', 1)[1] if ' ' in rest else ''
+            value = value.rsplit(':', 1)[0].strip()
+            if section == 'C':
+                curves.append(mnemonic.strip())
+            else:
+                sections[section][mnemonic.strip().upper()] = value
+        else:
+            raise ValueError(f'{path}: no ~A data section found')
+
+    null = sections['W'].get('NULL')
+    return {
+        'version': sections['V'],
+        'well': sections['W'],
+        'curves': curves,
+        'null': float(null) if null not in (None, '') else None,
+        'wrap': sections['V'].get('WRAP', 'NO').upper().startswith('Y'),
+        'data_line': line_no + 1,
+    }
+
+
+def column_names(curves, mnemonic_map=MNEMONIC_MAP):
+    """Rename LAS curve mnemonics to dashboard column names, keeping unknown mnemonics as they are."""
+    names, taken = [], set()
+    for mnemonic in curves:
+        name = mnemonic_map.get(mnemonic.upper(), mnemonic)
+        if name in taken:
+            name = mnemonic
+        taken.add(name)
+        names.append(name)
+    return names
+
+
+def iter_las_chunks(path, chunk_size=100_000, mnemonic_map=MNEMONIC_MAP):
+    """
+    Stream the ~A section of an unwrapped LAS 2.0 file in fixed-size depth chunks.
+
+    Null values are replaced with NaN and columns are renamed with mnemonic_map. Only one
+    chunk of text and values is held in memory at a time.
+
+    Parameters:
+    - path (str): LAS file path
+    - chunk_size (int): Number of depth samples per chunk
+    - mnemonic_map (dict): LAS mnemonic (upper case) -> column name
+
+    Yields:
+    - pd.DataFrame: Up to chunk_size rows, with every column of EXPECTED_COLUMNS present.
+    """
+    header = read_las_header(path)
+    if header['wrap']:
+        raise ValueError(f'{path}: wrapped LAS files (WRAP YES) are not supported')
+    names = column_names(header['curves'], mnemonic_map)
+    n_curves = len(names)
+
+    with open(path, 'r', errors='replace') as f:
+        lines = (line for line in islice(f, header['data_line'], None)
+                 if line.strip() and not line.lstrip().startswith('#'))
+        while True:
+            block = list(islice(lines, chunk_size))
+            if not block:
+                break
+            values = np.array(' '.join(block).replace(',', ' ').split(), dtype=float)
+            if values.size % n_curves:
+                raise ValueError(f'{path}: data rows do not match the {n_curves} curves of the ~C section')
+            values = values.reshape(-1, n_curves)
+            if header['null'] is not None:
+                values[values == header['null']] = np.nan
+
+            chunk = pd.DataFrame(values, columns=names)
+            for column in EXPECTED_COLUMNS:
+                if column not in chunk.columns:
+                    chunk[column] = np.nan
+            yield chunk
+
+
+def process_las(path, inputs, ssp, sp_baseline, shale_phid, shale_phi_n, well_name=None, chunk_size=100_000,
+                sp_shift=0, Maximum_gr=150, Minimum_gr=15, rw=0.05, Temp_rw=78, invasion=None, rza=None,
+                a=1, m=2, n=2):
+    """
+    Run the process_well_data_optimized calculations over a LAS file chunk by chunk.
+
+    Every curve except delta_Bvw is computed sample by sample, so chunks are independent;
+    the last Bvw of each chunk is carried into the next so delta_Bvw matches a whole-well run.
+
+    Parameters:
+    - path (str): LAS file path
+    - inputs (pd.DataFrame): Inputs sheet with the well's TVD, T_max, T_values and Rmf
+    - well_name (str): Well to look up in inputs, defaults to the WELL entry of the ~W section
+    - chunk_size (int): Number of depth samples per chunk
+    - Remaining parameters as in process_well_data_optimized
+
+    Yields:
+    - pd.DataFrame: Processed chunk with Well_Name, the raw curves and the derived curves.
+    """
+    if well_name is None:
+        well_name = read_las_header(path)['well'].get('WELL', '')
+    yield from process_chunks(iter_las_chunks(path, chunk_size), inputs, ssp, sp_baseline, shale_phid, shale_phi_n,
+                              well_name, sp_shift=sp_shift, Maximum_gr=Maximum_gr, Minimum_gr=Minimum_gr, rw=rw,
+                              Temp_rw=Temp_rw, invasion=invasion, rza=rza, a=a, m=m, n=n)
+
+
+def process_chunks(chunks, inputs, ssp, sp_baseline, shale_phid, shale_phi_n, well_name, sp_shift=0, Maximum_gr=150,
+                   Minimum_gr=15, rw=0.05, Temp_rw=78, invasion=None, rza=None, a=1, m=2, n=2):
+    """
+    Run the process_well_data_optimized calculations over consecutive depth chunks of one well.
+
+    Parameters:
+    - chunks (iterable): pd.DataFrame chunks in depth order, with every column of EXPECTED_COLUMNS
+    - inputs (pd.DataFrame): Inputs sheet with the well's TVD, T_max, T_values and Rmf
+    - well_name (str): Well to look up in inputs
+    - Remaining parameters as in process_well_data_optimized
+
+    Yields:
+    - pd.DataFrame: Processed chunk with Well_Name, the raw curves and the derived curves.
+    """
+    gradient, surf_temp, rmf = well_parameter_arrays([well_name], inputs)
+
+    previous_bvw = np.nan
+    for chunk in chunks:
+        chunk.insert(0, 'Well_Name', well_name)
+        with stage('petrophysics'):
+            curves = compute_petrophysics(
+                chunk['DEPTH'].to_numpy(), chunk['PHIN'].to_numpy(), chunk['PHID'].to_numpy(),
+                chunk['Deep_Resistivity'].to_numpy(), chunk['Shallow_Resistivity'].to_numpy(),
+                gradient, surf_temp, rmf,
+                rw=rw, Temp_rw=Temp_rw, invasion=invasion, rza=rza, a=a, m=m, n=n,
+                previous_bvw=previous_bvw)  # Difference across the chunk boundary
+            previous_bvw = curves['Bvw'][-1]
+
+            for name, values in curves.items():
+                chunk[name] = values
+        with stage('shale_volume'):
+            chunk = calculate_shale_volume(chunk, Maximum_gr=Maximum_gr, Minimum_gr=Minimum_gr,
+                                           ssp=ssp, sp_baseline=sp_baseline, sp_shift=sp_shift,
+                                           shale_phid=shale_phid, shale_phi_n=shale_phi_n)
+        yield chunk
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Process a LAS 2.0 file chunk by chunk and write the results to CSV.')
+    parser.add_argument('las', help='LAS 2.0 file')
+    parser.add_argument('output', help='Output CSV file')
+    parser.add_argument('--inputs', default='Raster_logs_data.xlsx', help='Inputs sheet with the well constants')
+    parser.add_argument('--well', default=None, help='Well name in the inputs sheet (default: WELL from the LAS header)')
+    parser.add_argument('--chunk-size', type=int, default=100_000)
+    parser.add_argument('--ssp', type=float, default=-100)
+    parser.add_argument('--sp-baseline', type=float, default=0)
+    parser.add_argument('--shale-phid', type=float, default=0.2)
+    parser.add_argument('--shale-phi-n', type=float, default=0.3)
+    args = parser.parse_args()
+
+    inputs = pd.read_excel(args.inputs)
+    chunks = process_las(args.las, inputs, ssp=args.ssp, sp_baseline=args.sp_baseline,
+                         shale_phid=args.shale_phid, shale_phi_n=args.shale_phi_n,
+                         well_name=args.well, chunk_size=args.chunk_size)
+    rows = 0
+    for i, chunk in enumerate(chunks):
+        chunk.to_csv(args.output, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+        rows += len(chunk)
+    print(f'{args.las}: {rows} samples written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,259 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from Calculations import INVASION_DEPTHS, compute_petrophysics, well_parameter_arrays
+from Kernels import PETROPHYSICS_CURVES, SHALE_CURVES, shale_volume_kernel
+from LasReader import EXPECTED_COLUMNS, MNEMONIC_MAP, column_names, read_las_header
+
+# Samples the store of a live well has room for before its first growth
+INITIAL_CAPACITY = 4096
+
+
+class GrowableCurves:
+    """
+    Columnar store of float64 curves that grows by appending rows.
+
+    Curves are rows of one 2-D buffer whose capacity doubles when it is full, so appending k
+    rows costs O(k) amortized however many rows are stored. Views of the filled part are
+    handed out without copying; they stay valid until the next growth.
+
+    Parameters:
+    - names (list): Curve names, in buffer row order
+    - capacity (int): Initial number of samples
+    """
+
+    def __init__(self, names, capacity=INITIAL_CAPACITY):
+        self.names = list(names)
+        self.rows = {name: row for row, name in enumerate(self.names)}
+        self.buffer = np.full((len(self.names), max(capacity, 1)), np.nan)
+        self.size = 0
+
+    def reserve(self, n_new):
+        """Room for n_new more samples; returns the (n_curves, n_new) buffer slice they go into."""
+        needed = self.size + n_new
+        if needed > self.buffer.shape[1]:
+            capacity = max(needed, 2 * self.buffer.shape[1])
+            grown = np.full((len(self.names), capacity), np.nan)
+            grown[:, :self.size] = self.buffer[:, :self.size]
+            self.buffer = grown
+        return self.buffer[:, self.size:needed]
+
+    def commit(self, n_new):
+        """Count the n_new samples written into the slice of reserve as stored."""
+        self.size += n_new
+
+    def column(self, name):
+        """View of one curve's stored samples."""
+        return self.buffer[self.rows[name], :self.size]
+
+    def frame(self, start=0):
+        """DataFrame of views of the stored samples from row start on (no copy)."""
+        return pd.DataFrame({name: self.buffer[row, start:self.size] for row, name in enumerate(self.names)},
+                            copy=False)
+
+
+class LiveWell:
+    """
+    Processed curves of a well that grows while it is drilled.
+
+    New depth samples are processed on their own: every curve of process_well_data_optimized
+    is computed sample by sample, except delta_Bvw, whose first new sample is differenced with
+    the last stored Bvw. The raw and derived curves are written straight into a GrowableCurves
+    store, so an append costs O(new samples) and matches a whole-well run of the same samples.
+
+    Samples must arrive in increasing depth; samples at or above the last stored depth (e.g.
+    a re-logged interval) are dropped. Changing the processing parameters with
+    set_parameters recomputes the derived curves of the whole well once.
+
+    Parameters:
+    - well_name (str): Well to look up in inputs
+    - inputs (pd.DataFrame): Inputs sheet with the well's TVD, T_max, T_values and Rmf
+    - **params: Parameters of process_well_data_optimized (ssp, sp_baseline, shale_phid, shale_phi_n, ...)
+    """
+
+    CURVES = EXPECTED_COLUMNS + list(PETROPHYSICS_CURVES) + list(SHALE_CURVES)
+
+    def __init__(self, well_name, inputs, capacity=INITIAL_CAPACITY, **params):
+        self.well_name = well_name
+        # The well constants are looked up once, not per append
+        gradient, surf_temp, rmf = well_parameter_arrays([well_name], inputs)
+        self.constants = (gradient[0], surf_temp[0], rmf[0])
+        self.store = GrowableCurves(self.CURVES, capacity)
+        self.params = {}
+        self.set_parameters(**params)
+
+    def __len__(self):
+        return self.store.size
+
+    @property
+    def last_depth(self):
+        return self.store.column('DEPTH')[-1] if len(self) else -np.inf
+
+    def set_parameters(self, ssp, sp_baseline, shale_phid, shale_phi_n, sp_shift=0, Maximum_gr=150, Minimum_gr=15,
+                       rw=0.05, Temp_rw=78, invasion=None, rza=None, a=1, m=2, n=2):
+        """
+        Set the processing parameters; returns True and reprocesses the stored samples if they changed.
+        """
+        if invasion is not None and invasion not in INVASION_DEPTHS:
+            raise ValueError(f"Unknown invasion class: {invasion}")
+        params = dict(ssp=ssp, sp_baseline=sp_baseline, shale_phid=shale_phid, shale_phi_n=shale_phi_n,
+                      sp_shift=sp_shift, Maximum_gr=Maximum_gr, Minimum_gr=Minimum_gr, rw=rw, Temp_rw=Temp_rw,
+                      invasion=invasion, rza=rza, a=a, m=m, n=n)
+        if params == self.params:
+            return False
+        self.params = params
+        if len(self):
+            self._process(self.store.buffer[:, :len(self)], previous_bvw=np.nan)
+        return True
+
+    def append(self, rows):
+        """
+        Process and store newly acquired samples.
+
+        Parameters:
+        - rows (pd.DataFrame): New samples with a DEPTH column and any of EXPECTED_COLUMNS
+          (missing curves are NaN), in increasing depth
+
+        Returns:
+        - int: Number of samples stored; rows not below the last stored depth are dropped.
+        """
+        depth = rows['DEPTH'].to_numpy(dtype=float)
+        # Keep the strictly increasing run below the last stored depth
+        keep = depth > np.fmax.accumulate(np.r_[self.last_depth, depth[:-1]])
+        n_new = int(np.count_nonzero(keep))
+        if not n_new:
+            return 0
+
+        previous_bvw = self.store.column('Bvw')[-1] if len(self) else np.nan
+        block = self.store.reserve(n_new)
+        for column in EXPECTED_COLUMNS:
+            values = block[self.store.rows[column]]
+            if column in rows:
+                values[:] = rows[column].to_numpy(dtype=float)[keep]
+            else:
+                values.fill(np.nan)
+        self._process(block, previous_bvw)
+        self.store.commit(n_new)
+        return n_new
+
+    def _process(self, block, previous_bvw):
+        # Derived curves of the raw curves in block, written into their rows of the same block
+        row = self.store.rows
+        raw = {column: block[row[column]] for column in EXPECTED_COLUMNS}
+        params = self.params
+        # The kernels broadcast the scalar well constants over the samples
+        gradient, surf_temp, rmf = self.constants
+        petrophysics = block[row[PETROPHYSICS_CURVES[0]]:row[PETROPHYSICS_CURVES[-1]] + 1]
+        compute_petrophysics(raw['DEPTH'], raw['PHIN'], raw['PHID'], raw['Deep_Resistivity'],
+                             raw['Shallow_Resistivity'], gradient, surf_temp, rmf,
+                             rw=params['rw'], Temp_rw=params['Temp_rw'], invasion=params['invasion'],
+                             rza=params['rza'], a=params['a'], m=params['m'], n=params['n'],
+                             previous_bvw=previous_bvw, out=petrophysics)
+        shale = block[row[SHALE_CURVES[0]]:row[SHALE_CURVES[-1]] + 1]
+        shale_volume_kernel(raw['GR'], raw['SP'], raw['PHIN'], raw['PHID'], Maximum_gr=params['Maximum_gr'],
+                            Minimum_gr=params['Minimum_gr'], ssp=params['ssp'], sp_baseline=params['sp_baseline'],
+                            sp_shift=params['sp_shift'], shale_phid=params['shale_phid'],
+                            shale_phi_n=params['shale_phi_n'], out=shale)
+
+    def frame(self, top=None):
+        """
+        Processed samples as a DataFrame of views of the store (no copy), from depth top on.
+
+        The depth of the first row is found by binary search, so a trailing window of a long
+        well costs O(window).
+        """
+        start = 0 if top is None else int(np.searchsorted(self.store.column('DEPTH'), top, side='left'))
+        return self.store.frame(start)
+
+
+class LasTail:
+    """
+    Read the depth samples appended to a LAS 2.0 file since the last read, like `tail -f`.
+
+    The file position after the last complete data line is remembered, so every read parses
+    only the new lines; a line still being written (without its newline) is left for the
+    next read. The header is parsed once, so the curves of the file must not change.
+
+    Parameters:
+    - path (str): LAS file being written, e.g. by an acquisition system
+    - mnemonic_map (dict): LAS mnemonic (upper case) -> column name
+    """
+
+    def __init__(self, path, mnemonic_map=MNEMONIC_MAP):
+        self.path = path
+        self.header = read_las_header(path)
+        if self.header['wrap']:
+            raise ValueError(f'{path}: wrapped LAS files (WRAP YES) are not supported')
+        self.names = column_names(self.header['curves'], mnemonic_map)
+        # Byte offset of the first data line
+        with open(path, 'rb') as f:
+            for _ in range(self.header['data_line']):
+                f.readline()
+            self.offset = f.tell()
+
+    def read(self):
+        """
+        New complete data lines of the file.
+
+        Returns:
+        - pd.DataFrame: One row per new sample with every column of EXPECTED_COLUMNS, possibly empty.
+        """
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read()
+        end = data.rfind(b'\n') + 1
+        self.offset += end
+        lines = [line for line in data[:end].decode(errors='replace').splitlines()
+                 if line.strip() and not line.lstrip().startswith('#')]
+        values = np.array(' '.join(lines).replace(',', ' ').split(), dtype=float)
+        if values.size % len(self.names):
+            raise ValueError(f'{self.path}: data rows do not match the {len(self.names)} curves of the ~C section')
+        values = values.reshape(-1, len(self.names))
+        if self.header['null'] is not None:
+            values[values == self.header['null']] = np.nan
+
+        rows = pd.DataFrame(values, columns=self.names)
+        for column in EXPECTED_COLUMNS:
+            if column not in rows.columns:
+                rows[column] = np.nan
+        return rows
+
+
+def simulate_drilling(source, target, rows_per_second=20.0, batch=10):
+    """
+    Write the header of a LAS file to target and append its data lines a batch at a time.
+
+    A stand-in for an acquisition system writing LWD data while drilling, e.g. to watch
+    target with the dashboard's live view.
+    """
+    header = read_las_header(source)
+    with open(source, 'r', errors='replace') as f:
+        lines = f.readlines()
+    data_line = header['data_line']
+    with open(target, 'w') as f:
+        f.writelines(lines[:data_line])
+    for start in range(data_line, len(lines), batch):
+        with open(target, 'a') as f:
+            f.writelines(lines[start:start + batch])
+        time.sleep(batch / rows_per_second)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulate drilling: append the data lines of a LAS file to a '
+                                                 'new LAS file over time.')
+    parser.add_argument('source', help='LAS 2.0 file to replay')
+    parser.add_argument('target', help='LAS file to write, e.g. watched by the dashboard')
+    parser.add_argument('--rows-per-second', type=float, default=20.0)
+    parser.add_argument('--batch', type=int, default=10, help='Data lines appended at a time')
+    args = parser.parse_args()
+    if os.path.abspath(args.source) == os.path.abspath(args.target):
+        parser.error('source and target must be different files')
+    simulate_drilling(args.source, args.target, args.rows_per_second, args.batch)
+
+
+if __name__ == '__main__':
+    main()
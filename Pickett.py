@@ -0,0 +1,219 @@
+import numpy as np
+import pandas as pd
+
+from Calculations import rw_at_temperature
+from DepthIndex import DepthIndex
+from Zonation import valid_porosity
+
+# Sliding window length (depth units), clean-sample cutoffs and the checks a window's water line must pass
+DEFAULT_PICKETT_PARAMETERS = dict(window=50.0, vsh_curve='Vsh_gamma_ray', vsh_cutoff=0.4, phi_cutoff=0.08,
+                                  min_samples=20, min_r2=0.8, m_range=(1.3, 3.0))
+
+# Rows of the window sums of the water line fits: clean sample count, x = log10(phi), y = log10(Rt),
+# their squares and product, and formation temperature
+_COUNT, _X, _Y, _XX, _XY, _YY, _T = range(7)
+
+
+def window_sums(values, width):
+    """
+    Sums of every window of width consecutive samples, from prefix sums in O(n).
+
+    Parameters:
+    - values (np.ndarray): (n_rows, n_samples) values, summed row by row
+    - width (int): Samples per window
+
+    Returns:
+    - np.ndarray: (n_rows, n_samples - width + 1) sums; column i is the window starting at sample i.
+    """
+    sums = np.zeros((len(values), values.shape[1] + 1))
+    np.cumsum(values, axis=1, out=sums[:, 1:])
+    return sums[:, width:] - sums[:, :-width]
+
+
+def window_minimum(values, width):
+    """
+    Minimum of every window of width consecutive values, and its position, in O(n).
+
+    The values are cut into blocks of width samples (van Herk/Gil-Werman). A window spans the
+    end of the block it starts in and the start of the next, so its minimum is the smaller of
+    a suffix minimum and a prefix minimum, both running minima of the blocks.
+
+    Returns:
+    - tuple: (minima, positions), one per window start 0 .. len(values) - width.
+    """
+    n = len(values)
+    if n < width:
+        return np.empty(0), np.empty(0, dtype=np.int64)
+    blocks = -(-n // width)
+    padded = np.full(blocks * width, np.inf)
+    padded[:n] = values
+    padded = padded.reshape(blocks, width)
+    position = np.arange(blocks * width).reshape(blocks, width)
+
+    prefix = np.minimum.accumulate(padded, axis=1)
+    # The running minimum was last set by the latest sample equal to it
+    prefix_at = np.maximum.accumulate(np.where(padded == prefix, position, -1), axis=1)
+    suffix = np.minimum.accumulate(padded[:, ::-1], axis=1)[:, ::-1]
+    suffix_at = np.minimum.accumulate(np.where(padded == suffix, position, blocks * width)[:, ::-1], axis=1)[:, ::-1]
+
+    start = np.arange(n - width + 1)
+    end = start + width - 1
+    prefix, prefix_at, suffix, suffix_at = prefix.ravel(), prefix_at.ravel(), suffix.ravel(), suffix_at.ravel()
+    from_suffix = suffix[start] <= prefix[end]
+    return (np.where(from_suffix, suffix[start], prefix[end]),
+            np.where(from_suffix, suffix_at[start], prefix_at[end]))
+
+
+def pickett_windows(df, window=50.0, a=1, Temp_rw=78, vsh_curve='Vsh_gamma_ray', vsh_cutoff=0.4, phi_cutoff=0.08):
+    """
+    Water line of a Pickett plot and the minimum Rwa of every sliding depth window of a well.
+
+    In water-bearing rock Archie's law is log10(Rt) = log10(a Rw) - m log10(phi), so a
+    straight-line fit of log10(Rt) against log10(phi) gives m (minus the slope) and Rw (from
+    the intercept). Only clean samples are fitted: Vsh at most vsh_cutoff and porosity
+    (phi_avg_calc) at least phi_cutoff; null porosity is missing (see valid_porosity). Every
+    window of window depth units starting at every sample is fitted from prefix sums of the
+    counts, x, y, x², xy and y² of the clean samples, so the fits of all windows cost O(n)
+    together instead of O(n × window). The minimum Rwa (the Rwa curve, at formation
+    temperature) of every window, the classic water-zone estimate of Rw, is found in O(n) as
+    well (see window_minimum).
+
+    Windows are a fixed number of samples, window / the sampling step; irregularly sampled
+    wells can be put on a regular grid with Resampling first.
+
+    Parameters:
+    - df (pd.DataFrame): One well processed by process_well_data_optimized
+    - window (float): Window length in depth units
+    - a (float): Archie tortuosity factor the Rw intercept is divided by
+    - Temp_rw (float): Temperature Rw is reported at, like the sidebar's Rw
+    - vsh_curve (str): Shale volume curve the Vsh cutoff applies to
+    - vsh_cutoff, phi_cutoff (float): Clean sample cutoffs
+
+    Returns:
+    - pd.DataFrame: One row per window: Top and Base depth, clean Samples, fitted m, Rw (at
+      Temp_rw) and R2, mean formation Temperature, Rwa_min with its depth and Rwa_min_rw (at
+      Temp_rw). Fits need at least three clean samples and are NaN otherwise.
+    """
+    index = DepthIndex(df['DEPTH'].to_numpy())
+    depth = index.depth
+
+    def curve(column):
+        return index.take(df[column].to_numpy(dtype=float))
+
+    phi, rt, temperature = valid_porosity(curve('phi_avg_calc')), curve('Deep_Resistivity'), curve('T')
+    steps = np.diff(depth)
+    step = index.step or (float(np.median(steps[steps > 0])) if np.any(steps > 0) else 1.0)
+    width = max(int(round(window / step)), 2)
+    columns = ['Top', 'Base', 'Samples', 'm', 'Rw', 'R2', 'Temperature', 'Rwa_min', 'Rwa_min_depth', 'Rwa_min_rw']
+    if len(depth) < width:
+        return pd.DataFrame(columns=columns)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        clean = ((curve(vsh_curve) <= vsh_cutoff) & (phi >= phi_cutoff) & (rt > 0) & np.isfinite(temperature))
+        x = np.where(clean, np.log10(phi), 0.0)
+        y = np.where(clean, np.log10(rt), 0.0)
+    # Centred on the clean samples' means, so the window sums do not lose precision over long wells
+    x_mean = x[clean].mean() if clean.any() else 0.0
+    y_mean = y[clean].mean() if clean.any() else 0.0
+    x = np.where(clean, x - x_mean, 0.0)
+    y = np.where(clean, y - y_mean, 0.0)
+    sums = window_sums(np.stack([clean.astype(float), x, y, x * x, x * y, y * y, np.where(clean, temperature, 0.0)]),
+                       width)
+
+    count = sums[_COUNT]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        fitted = count >= 3
+        sxx = sums[_XX] - sums[_X]**2 / count
+        sxy = sums[_XY] - sums[_X] * sums[_Y] / count
+        syy = sums[_YY] - sums[_Y]**2 / count
+        slope = np.where(fitted, sxy / sxx, np.nan)
+        intercept = sums[_Y] / count + y_mean - slope * (sums[_X] / count + x_mean)
+        r2 = np.where(fitted, sxy**2 / (sxx * syy), np.nan)
+        window_temperature = sums[_T] / count
+        # Rw at the window's formation temperature, reported at Temp_rw with Arps' formula
+        rw = rw_at_temperature(Temp_rw, 10**intercept / a, window_temperature)
+
+        rwa_min, at = window_minimum(np.where(clean, curve('Rwa'), np.inf), width)
+        at = np.minimum(at, len(depth) - 1)  # Windows without clean samples point into the block padding
+        found = np.isfinite(rwa_min)
+        rwa_min = np.where(found, rwa_min, np.nan)
+        rwa_min_rw = rw_at_temperature(Temp_rw, rwa_min, temperature[at])
+
+    start = np.arange(len(count))
+    return pd.DataFrame({
+        'Top': depth[start],
+        'Base': depth[start + width - 1],
+        'Samples': count.astype(np.int64),
+        'm': -slope,
+        'Rw': rw,
+        'R2': r2,
+        'Temperature': window_temperature,
+        'Rwa_min': rwa_min,
+        'Rwa_min_depth': np.where(found, depth[at], np.nan),
+        'Rwa_min_rw': rwa_min_rw,
+    }, columns=columns)
+
+
+def suggest_parameters(windows, min_samples=20, min_r2=0.8, m_range=(1.3, 3.0)):
+    """
+    Rw and m for the sidebar from the best water line of pickett_windows.
+
+    A window qualifies when it has min_samples clean samples, a fit with at least min_r2 and
+    an m within m_range. Water-bearing samples fall on one line, while varying hydrocarbon
+    saturation scatters samples above it, so the qualifying window with the tightest fit
+    (highest R2) is taken as the water zone; of fits within 0.01 of each other, the one with
+    the most samples.
+
+    Returns:
+    - dict: rw (at Temp_rw) and m rounded for the sidebar, the window's top, base, r2, samples
+      and mean formation temperature, and rwa_rw, its minimum Rwa at Temp_rw as a cross-check;
+      None if no window qualifies.
+    """
+    low, high = m_range
+    qualifying = windows[(windows['Samples'] >= min_samples) & (windows['R2'] >= min_r2)
+                         & windows['m'].between(low, high) & (windows['Rw'] > 0)]
+    if qualifying.empty:
+        return None
+    best = qualifying.iloc[np.lexsort((qualifying['Samples'], qualifying['R2'].round(2)))[-1]]
+    return {
+        'rw': round(float(best['Rw']), 4),
+        'm': round(float(best['m']), 2),
+        'top': float(best['Top']),
+        'base': float(best['Base']),
+        'r2': float(best['R2']),
+        'samples': int(best['Samples']),
+        'temperature': float(best['Temperature']),
+        'rwa_rw': float(best['Rwa_min_rw']),
+    }
+
+
+def water_zone_candidates(windows, count=5):
+    """
+    Depths of the lowest minimum-Rwa samples of the windows, the likeliest water zones.
+
+    Returns:
+    - pd.DataFrame: Depth, Rwa, Rw (Rwa at Temp_rw) and the number of Windows whose minimum
+      Rwa is at that depth, lowest Rwa first, at most count rows.
+    """
+    found = windows.dropna(subset=['Rwa_min_depth'])
+    candidates = (found.groupby('Rwa_min_depth', sort=False)
+                  .agg(Rwa=('Rwa_min', 'first'), Rw=('Rwa_min_rw', 'first'), Windows=('Rwa_min', 'size'))
+                  .rename_axis('Depth').reset_index())
+    return candidates.nsmallest(count, 'Rwa').reset_index(drop=True)
+
+
+def pickett_well(df, window=50.0, a=1, Temp_rw=78, vsh_curve='Vsh_gamma_ray', vsh_cutoff=0.4, phi_cutoff=0.08,
+                 min_samples=20, min_r2=0.8, m_range=(1.3, 3.0)):
+    """
+    Sliding-window Pickett analysis of one processed well.
+
+    Parameters:
+    - df (pd.DataFrame): One well processed by process_well_data_optimized
+    - Remaining parameters as in pickett_windows and suggest_parameters
+
+    Returns:
+    - tuple: (window table of pickett_windows, suggested parameters of suggest_parameters or
+      None, water zone candidates of water_zone_candidates)
+    """
+    windows = pickett_windows(df, window, a, Temp_rw, vsh_curve, vsh_cutoff, phi_cutoff)
+    return windows, suggest_parameters(windows, min_samples, min_r2, m_range), water_zone_candidates(windows)
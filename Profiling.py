@@ -0,0 +1,185 @@
+import contextvars
+import cProfile
+import json
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Timer that stage() records into; unset outside of a profiled run, which makes stage() a no-op
+_ACTIVE_TIMER = contextvars.ContextVar('active_stage_timer', default=None)
+
+# Profiles of the worker threads of an active profile_to (cProfile only); unset outside of one
+_ACTIVE_PROFILE = contextvars.ContextVar('active_profile', default=None)
+
+
+class StageTimer:
+    """
+    Wall time and memory of the named stages of one run (a dashboard rerun or one batch well).
+
+    Stages nest: a stage opened inside another is recorded as 'outer/inner'. With trace_memory
+    every stage also records the bytes it left allocated and the peak of Python allocations
+    (NumPy buffers included) reached during it, measured with tracemalloc, which slows the
+    run down noticeably, so it is off by default.
+
+    Stages may run on several threads at once (background tasks of the dashboard); each thread
+    nests its own stages. tracemalloc counts the whole process, so the memory counters of
+    concurrent stages include each other's allocations.
+
+    Parameters:
+    - trace_memory (bool): Record tracemalloc memory counters per stage
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.records = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._started_tracing = False
+        self._origin = time.perf_counter()
+
+    @property
+    def _stack(self):
+        # Open stages of the calling thread, innermost last
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block as stage `name`."""
+        # [name, traced bytes at entry, highest absolute peak of finished inner stages]
+        frame = [name, 0, 0]
+        path = '/'.join([entry[0] for entry in self._stack] + [name])
+        self._stack.append(frame)
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            frame[1] = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record = {'stage': path, 'start': start - self._origin, 'seconds': time.perf_counter() - start}
+            self._stack.pop()
+            if self.trace_memory:
+                # Inner stages reset the tracemalloc peak, so their peaks are carried up explicitly
+                current, peak = tracemalloc.get_traced_memory()
+                peak = max(peak, frame[2])
+                record['allocated_bytes'] = current - frame[1]
+                record['peak_bytes'] = peak - frame[1]
+                if self._stack:
+                    self._stack[-1][2] = max(self._stack[-1][2], peak)
+            with self._lock:
+                self.records.append(record)
+
+    @contextmanager
+    def activate(self):
+        """Make this timer the one module-level stage() calls record into."""
+        token = _ACTIVE_TIMER.set(self)
+        try:
+            yield self
+        finally:
+            if self._started_tracing:
+                tracemalloc.stop()
+                self._started_tracing = False
+            _ACTIVE_TIMER.reset(token)
+
+    def totals(self):
+        """Stage -> summed seconds (and memory counters), in the order stages were first entered."""
+        totals = {}
+        for record in sorted(self.records, key=lambda record: record['start']):
+            entry = totals.setdefault(record['stage'], {'calls': 0, 'seconds': 0.0})
+            entry['calls'] += 1
+            entry['seconds'] += record['seconds']
+            if 'peak_bytes' in record:
+                entry['allocated_bytes'] = entry.get('allocated_bytes', 0) + record['allocated_bytes']
+                entry['peak_bytes'] = max(entry.get('peak_bytes', 0), record['peak_bytes'])
+        return totals
+
+    def to_dict(self):
+        return {'stages': self.totals(), 'records': sorted(self.records, key=lambda record: record['start'])}
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), **kwargs)
+
+
+@contextmanager
+def stage(name):
+    """
+    Time the enclosed block as a stage of the active StageTimer.
+
+    Pipeline code marks its stages with this unconditionally; without an active timer it only
+    costs a context variable lookup.
+    """
+    timer = _ACTIVE_TIMER.get()
+    if timer is None:
+        yield
+    else:
+        with timer.stage(name):
+            yield
+
+
+@contextmanager
+def profile_to(path, profiler='cprofile'):
+    """
+    Profile the enclosed block and write the result to path.
+
+    cProfile only sees the thread it runs on; code on other threads that runs in a copy of this
+    context inside profile_thread (the dashboard's background tasks) is profiled on its own
+    thread and merged into the dump when the block ends, if it has finished by then.
+
+    Parameters:
+    - path (str): Output file; cProfile writes pstats data (open with snakeviz or pstats),
+      pyinstrument writes an HTML report
+    - profiler (str): 'cprofile' or 'pyinstrument' (optional dependency)
+    """
+    if profiler == 'pyinstrument':
+        from pyinstrument import Profiler
+        instrument = Profiler()
+        instrument.start()
+        try:
+            yield
+        finally:
+            instrument.stop()
+            with open(path, 'w') as f:
+                f.write(instrument.output_html())
+    elif profiler == 'cprofile':
+        profile = cProfile.Profile()
+        threads = []
+        token = _ACTIVE_PROFILE.set(threads)
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            stats = pstats.Stats(profile)
+            for thread_profile in list(threads):
+                stats.add(thread_profile)
+            stats.dump_stats(path)
+            _ACTIVE_PROFILE.reset(token)
+    else:
+        raise ValueError(f"Unknown profiler: {profiler}")
+
+
+@contextmanager
+def profile_thread():
+    """
+    Profile the enclosed block on the calling thread into the active profile_to, if any.
+
+    Without an active cProfile profile_to in the context it only costs a context variable lookup.
+    """
+    threads = _ACTIVE_PROFILE.get()
+    if threads is None:
+        yield
+        return
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        threads.append(profile)
@@ -0,0 +1,270 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from LasReader import EXPECTED_COLUMNS, MNEMONIC_MAP, iter_las_chunks, process_chunks
+
+# Source samples further apart than this many median sampling steps of their run are a gap,
+# and grid depths inside a gap are left NaN instead of being interpolated across it
+GAP_FACTOR = 2.0
+
+RESAMPLING_METHODS = ('auto', 'linear', 'nearest', 'mean')
+
+
+class CurveRun:
+    """
+    Curves logged together on one depth column, e.g. one logging run, LAS file or image-derived log.
+
+    Curves of a run are resampled in batches: each grid depth is located in a batch's depth
+    column once (np.searchsorted) and every curve of the batch is gathered and weighted with
+    the same positions. A run is normalized once: samples are sorted by depth, NaN depths are
+    dropped, and null and NaN values are missing samples, which are interpolated across like
+    depth gaps. Curves with the same shift and the same missing samples (usually all curves
+    of a run without nulls) share a batch, whose depth column leaves those samples out.
+
+    Parameters:
+    - depth (array-like): Depth of every sample, in any order
+    - curves (dict): Curve name -> values aligned with depth
+    - shift (float or dict): Depth correction added to depth (e.g. from depth matching to a
+      reference run), one for the whole run or per curve name (unlisted curves are not shifted)
+    - null (float): Value marking missing samples, e.g. -999.25 of a LAS file
+    - method (str): 'linear', 'nearest', 'mean' (average of the samples within half a grid
+      step) or 'auto': 'mean' when the run is sampled finer than the grid, 'linear' otherwise
+    - max_gap (float): Widest spacing of source samples interpolated across, GAP_FACTOR
+      median steps of the run by default
+    """
+
+    def __init__(self, depth, curves, shift=0.0, null=None, method='auto', max_gap=None):
+        if method not in RESAMPLING_METHODS:
+            raise ValueError(f"Unknown resampling method: {method}")
+        depth = np.asarray(depth, dtype=float)
+        shifts = shift if isinstance(shift, dict) else dict.fromkeys(curves, shift)
+        self.method = method
+
+        order = np.flatnonzero(np.isfinite(depth))
+        order = order[np.argsort(depth[order], kind='stable')]
+        depth = depth[order]
+        groups = []  # [shift, valid samples, names, values]
+        for name, values in curves.items():
+            values = np.asarray(values, dtype=float)[order]
+            valid = ~np.isnan(values) if null is None else ~np.isnan(values) & (values != null)
+            curve_shift = float(shifts.get(name, 0.0))
+            for group in groups:
+                if group[0] == curve_shift and np.array_equal(group[1], valid):
+                    break
+            else:
+                group = [curve_shift, valid, [], []]
+                groups.append(group)
+            group[2].append(name)
+            group[3].append(values)
+        # (names, shifted depth, values (n_curves, n_samples)) per batch, without its missing samples
+        self.batches = []
+        for batch_shift, valid, names, values in groups:
+            batch = np.empty((len(names), np.count_nonzero(valid)))
+            for row, curve in enumerate(values):
+                np.compress(valid, curve, out=batch[row])
+            self.batches.append((names, depth[valid] + batch_shift, batch))
+
+        steps = np.diff(depth)
+        steps = steps[steps > 0]
+        self.step = float(np.median(steps)) if len(steps) else np.inf
+        self.max_gap = GAP_FACTOR * self.step if max_gap is None else max_gap
+
+    @classmethod
+    def from_frame(cls, df, depth_column='DEPTH', columns=None, **kwargs):
+        """Run of the columns of a DataFrame (every numeric column but depth_column by default) on its depth column."""
+        if columns is None:
+            columns = [c for c in df.select_dtypes('number').columns if c != depth_column]
+        return cls(df[depth_column].to_numpy(dtype=float), {c: df[c].to_numpy(dtype=float) for c in columns},
+                   **kwargs)
+
+    @property
+    def names(self):
+        return [name for names, _, _ in self.batches for name in names]
+
+    @property
+    def depth_range(self):
+        """Shallowest and deepest shifted depth of any curve of the run."""
+        depths = [depth for _, depth, _ in self.batches if len(depth)]
+        if not depths:
+            return np.nan, np.nan
+        return min(depth[0] for depth in depths), max(depth[-1] for depth in depths)
+
+    def resample(self, grid, step):
+        """
+        Values of every curve of the run at the grid depths.
+
+        Parameters:
+        - grid (np.ndarray): Ascending grid depths
+        - step (float): Grid sampling step, the averaging window of the 'mean' method
+
+        Returns:
+        - list: (names, values (n_curves, len(grid))) per batch; NaN outside the run and in gaps.
+        """
+        method = self.method
+        if method == 'auto':
+            method = 'mean' if self.step < step else 'linear'
+        return [(names, _resample_batch(depth, values, grid, step, method, self.max_gap))
+                for names, depth, values in self.batches]
+
+
+def _resample_batch(depth, values, grid, step, method, max_gap):
+    # Every curve of the batch shares depth, so the grid is located in it once for all of them
+    if len(depth) == 0:
+        return np.full((len(values), len(grid)), np.nan)
+
+    if method == 'mean':
+        # Sums and counts of the non-NaN samples within half a step of each grid depth, from
+        # prefix sums over the samples of this grid chunk only; windows without samples stay NaN
+        first, last = np.searchsorted(depth, [grid[0] - step / 2, grid[-1] + step / 2], side='left')
+        depth, values = depth[first:last], values[:, first:last]
+        valid = ~np.isnan(values)
+        sums = np.zeros((len(values), len(depth) + 1))
+        np.cumsum(np.where(valid, values, 0.0), axis=1, out=sums[:, 1:])
+        counts = np.zeros((len(values), len(depth) + 1))
+        np.cumsum(valid, axis=1, out=counts[:, 1:])
+        start = np.searchsorted(depth, grid - step / 2, side='left')
+        stop = np.searchsorted(depth, grid + step / 2, side='left')
+        n = counts[:, stop] - counts[:, start]
+        out = np.full((len(values), len(grid)), np.nan)
+        np.divide(sums[:, stop] - sums[:, start], n, out=out, where=n > 0)
+        return out
+
+    # Bracketing samples depth[lo] <= grid <= depth[hi]
+    hi = np.searchsorted(depth, grid, side='right')
+    outside = (hi == 0) | (grid > depth[-1])
+    hi = np.clip(hi, min(1, len(depth) - 1), len(depth) - 1)
+    lo = np.maximum(hi - 1, 0)
+    d0, d1 = depth[lo], depth[hi]
+    # Grid depths on a sample take exactly that sample; the others must not straddle a gap
+    on_lo, on_hi = grid == d0, grid == d1
+    outside |= ~(on_lo | on_hi) & (d1 - d0 > max_gap)
+    if method == 'nearest':
+        out = values.take(np.where(grid - d0 <= d1 - grid, lo, hi), axis=1)
+    else:
+        hi[on_lo] = lo[on_lo]
+        lo[on_hi] = hi[on_hi]
+        weight = np.divide(grid - d0, d1 - d0, out=np.zeros_like(grid), where=d1 > d0)
+        # v0 + (v1 - v0) * weight, in place for every curve at once
+        out = values.take(hi, axis=1)
+        v0 = values.take(lo, axis=1)
+        out -= v0
+        out *= weight
+        out += v0
+    if outside.any():
+        out[:, outside] = np.nan
+    return out
+
+
+def depth_grid(top, base, step):
+    """Regular depths from top to base (inclusive, within rounding) every step."""
+    n = int(np.floor((base - top) / step + 1e-9)) + 1
+    return top + step * np.arange(max(n, 0))
+
+
+def iter_resampled(runs, step, top=None, base=None, chunk_size=100_000):
+    """
+    Merge curve runs onto one regular depth grid, chunk by chunk.
+
+    Every chunk of grid depths is located in each run's depth column by binary search, so a
+    chunk costs O(chunk_size log n) however long the runs are, and only one chunk of output
+    is held at a time. A curve logged by several runs (e.g. overlapping logging passes) is
+    spliced: the first run listing it supplies its values and later runs fill its NaNs.
+
+    Parameters:
+    - runs (list): CurveRun objects, in splicing priority order
+    - step (float): Grid sampling step
+    - top, base (float): Grid limits, by default the multiples of step from the shallowest to the
+      deepest depth of any run
+    - chunk_size (int): Grid depths per chunk
+
+    Yields:
+    - pd.DataFrame: Up to chunk_size rows with DEPTH, every column of EXPECTED_COLUMNS (NaN when
+      no run has the curve) and every other curve of the runs, as contiguous float64 columns.
+    """
+    ranges = np.array([run.depth_range for run in runs], dtype=float).reshape(-1, 2)
+    # Default limits are the multiples of step within the runs, so grid depths are round numbers
+    top = np.ceil(np.nanmin(ranges[:, 0]) / step - 1e-9) * step if top is None else top
+    base = np.floor(np.nanmax(ranges[:, 1]) / step + 1e-9) * step if base is None else base
+    names = list(dict.fromkeys(EXPECTED_COLUMNS[1:] + [name for run in runs for name in run.names]))
+    row = {name: position for position, name in enumerate(names, start=1)}
+
+    grid = depth_grid(top, base, step)
+    for start in range(0, len(grid), chunk_size):
+        depth = grid[start:start + chunk_size]
+        # One block for the whole chunk; every column of the frame is a contiguous row of it
+        block = np.full((len(names) + 1, len(depth)), np.nan)
+        block[0] = depth
+        for run in runs:
+            for batch_names, values in run.resample(depth, step):
+                for name, curve in zip(batch_names, values):
+                    target = block[row[name]]
+                    np.copyto(target, curve, where=np.isnan(target))
+        yield pd.DataFrame(dict(zip(['DEPTH'] + names, block)), copy=False)
+
+
+def resample_runs(runs, step, top=None, base=None):
+    """Every chunk of iter_resampled as one DataFrame, e.g. for process_well_data_optimized (with a Well_Name column)."""
+    chunks = list(iter_resampled(runs, step, top, base))
+    return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=['DEPTH'] + EXPECTED_COLUMNS[1:])
+
+
+def read_las_run(path, shift=0.0, method='auto', max_gap=None, mnemonic_map=MNEMONIC_MAP):
+    """CurveRun of every curve a LAS file logged (columns that are entirely NaN are left out)."""
+    df = pd.concat(iter_las_chunks(path, mnemonic_map=mnemonic_map), ignore_index=True)
+    columns = [c for c in df.columns if c != 'DEPTH' and df[c].notna().any()]
+    return CurveRun.from_frame(df, columns=columns, shift=shift, method=method, max_gap=max_gap)
+
+
+def parse_shifts(specs):
+    """'NAME=SHIFT' arguments as a dict; a bare number shifts every curve of the run."""
+    shifts = {}
+    for spec in specs:
+        name, _, value = spec.rpartition('=')
+        shifts[name or None] = float(value)
+    return shifts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Merge LAS files logged at different depth steps onto one depth '
+                                                 'grid, process the merged well chunk by chunk and write CSV.')
+    parser.add_argument('output', help='Output CSV file')
+    parser.add_argument('las', nargs='+', help='LAS 2.0 files, in splicing priority order')
+    parser.add_argument('--step', type=float, default=0.5, help='Grid depth step')
+    parser.add_argument('--shift', action='append', default=[], metavar='FILE:SHIFT or FILE:NAME=SHIFT',
+                        help='Depth shift of a file or of one of its curves (repeatable)')
+    parser.add_argument('--inputs', default='Raster_logs_data.xlsx', help='Inputs sheet with the well constants')
+    parser.add_argument('--well', required=True, help='Well name in the inputs sheet')
+    parser.add_argument('--chunk-size', type=int, default=100_000)
+    parser.add_argument('--ssp', type=float, default=-100)
+    parser.add_argument('--sp-baseline', type=float, default=0)
+    parser.add_argument('--shale-phid', type=float, default=0.2)
+    parser.add_argument('--shale-phi-n', type=float, default=0.3)
+    args = parser.parse_args()
+
+    shift_specs = {}
+    for spec in args.shift:
+        path, _, shift = spec.rpartition(':')
+        shift_specs.setdefault(path, []).append(shift)
+    runs = []
+    for path in args.las:
+        shifts = parse_shifts(shift_specs.get(path, []))
+        run_shift = shifts.pop(None, 0.0)
+        if shifts and run_shift:
+            parser.error(f'{path}: give either one shift for the file or per-curve shifts')
+        runs.append(read_las_run(path, shift=shifts if shifts else run_shift))
+
+    inputs = pd.read_excel(args.inputs)
+    chunks = process_chunks(iter_resampled(runs, args.step, chunk_size=args.chunk_size), inputs, ssp=args.ssp,
+                            sp_baseline=args.sp_baseline, shale_phid=args.shale_phid, shale_phi_n=args.shale_phi_n,
+                            well_name=args.well)
+    rows = 0
+    for i, chunk in enumerate(chunks):
+        chunk.to_csv(args.output, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+        rows += len(chunk)
+    print(f'{len(runs)} runs merged onto a {args.step} depth grid: {rows} samples written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import CancelledError, Future
+
+import numpy as np
+import pandas as pd
+
+
+def result_nbytes(value):
+    """
+    Approximate memory held by a cached result.
+
+    Arrays and frames count their buffers, bytes and strings their length, and containers and
+    plain objects (one level of attributes) the sum of their items; anything else counts its
+    sys.getsizeof. Buffers shared between results are counted once per result.
+    """
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(np.sum(value.memory_usage(index=True)))
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    if isinstance(value, (list, tuple)):
+        return sum(result_nbytes(item) for item in value)
+    if isinstance(value, dict):
+        return sum(result_nbytes(item) for item in value.values())
+    if hasattr(value, '__dict__'):
+        return sum(result_nbytes(item) for item in vars(value).values() if not hasattr(item, '__dict__'))
+    return sys.getsizeof(value)
+
+
+class SingleFlightCache:
+    """
+    Process-wide LRU cache of computed results that coalesces concurrent identical requests.
+
+    The first caller of a key computes the result (outside the lock) while later callers of
+    the same key wait for it instead of computing it again, so N sessions asking for the same
+    well and parameters at once cost one computation. Results are kept least-recently-used
+    within max_bytes (see result_nbytes). Failures are not cached: waiters get the same
+    exception, except when the computing caller was cancelled (e.g. a superseded background
+    task), in which case one of the waiters computes the result itself.
+
+    Cached results are shared between sessions and must not be modified by callers.
+
+    Parameters:
+    - max_bytes (int): Bound on the total size of the cached results
+    - nbytes (callable): Size estimate of a result, result_nbytes by default
+    """
+
+    def __init__(self, max_bytes=1024**3, nbytes=result_nbytes):
+        self.max_bytes = max_bytes
+        self._nbytes = nbytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (result, size)
+        self._in_flight = {}  # key -> Future of the caller computing it
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        """Hit, miss, wait and eviction counters plus the entries and bytes held."""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'waits': self.waits, 'evictions': self.evictions,
+                    'in_flight': len(self._in_flight), 'entries': len(self._entries), 'nbytes': self.nbytes}
+
+    def get(self, key, fn, *args, **kwargs):
+        """
+        Cached result of fn(*args, **kwargs) for key, computing it only if no one else is.
+
+        Parameters:
+        - key (hashable): Everything the result depends on
+        - fn (callable): Computes the result on a miss
+
+        Returns:
+        - The cached, awaited or newly computed result.
+        """
+        while True:
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return self._entries[key][0]
+                flight = self._in_flight.get(key)
+                if flight is None:
+                    flight = self._in_flight[key] = Future()
+                    self.misses += 1
+                    break
+                self.waits += 1
+            try:
+                return flight.result()
+            except CancelledError:
+                # The computing caller gave up; compute it here (or wait for whoever does)
+                continue
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as exc:
+            with self._lock:
+                del self._in_flight[key]
+            flight.set_exception(exc)
+            raise
+        self._store(key, result)
+        flight.set_result(result)
+        return result
+
+    def _store(self, key, result):
+        size = self._nbytes(result)
+        with self._lock:
+            del self._in_flight[key]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (result, size)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= evicted
+                self.evictions += 1
@@ -0,0 +1,206 @@
+import math
+
+# Declarative track layouts of the two dashboard figures, rendered by TrackRenderer.TrackFigure.
+# Within a track, the first curve owns the axes and every further curve is twinned above it.
+# Ticks are plain lists: the app imports this module before the sidebar is drawn, without NumPy.
+
+DASHED = (0, (5, 5))
+MAJOR_GRID = dict(visible=True, which='major', linestyle='-', linewidth=2, alpha=0.9)  # Solid major grid
+
+
+def tick_range(start, stop, step):
+    """Ticks from start up to (excluding) stop every step, the same values as np.arange."""
+    count = max(math.ceil((stop - start) / step), 0)
+    delta = (start + step) - start
+    return [start + i * delta for i in range(count)]
+
+
+def tick_space(start, stop, num):
+    """num ticks evenly spaced from start to stop inclusive, the same values as np.linspace."""
+    step = (stop - start) / (num - 1)
+    return [start + i * step for i in range(num - 1)] + [stop]
+
+
+def int_labels(ticks):
+    return [str(int(tick)) for tick in ticks]
+
+
+def percent_labels(ticks):
+    return [f"{int(tick * 100)}%" for tick in ticks]
+
+
+def rounded_percent_labels(ticks):
+    return [f"{round(tick * 100)}%" for tick in ticks]
+
+
+def decimal_labels(digits):
+    return lambda ticks: [f"{tick:.{digits}f}" for tick in ticks]
+
+
+def sp_scale(df, params):
+    # 200 mV window starting at the minimum of the unshifted SP
+    sp_min = df['SP'].min()
+    return sp_min, sp_min + 20 * 10
+
+
+def sp_ticks(df, params):
+    sp_min = df['SP'].min()
+    return tick_range(sp_min, sp_min + 20 * 10 + 1, 20)
+
+
+def micro_log_scale(column):
+    # Dynamic scaling for RNML and RLML axes
+    return lambda df, params: (0, 20 if df[column].max() <= 20 else 60)
+
+
+def micro_log_ticks(column):
+    return lambda df, params: tick_range(0, micro_log_scale(column)(df, params)[1] + 10, 10)
+
+
+GAMMA_RAY = dict(values='GR', fmt=('g-',), label="GAMMA RAY", color='green', xlim=(0, 150),
+                 ticks=tick_range(0, 151, 15), tick_labels=int_labels, grid=[MAJOR_GRID])
+BIT_SIZE = dict(values='BIT', fmt=('orange',), label="BIT SIZE", color='orange', xlim=(6, 16),
+                ticks=tick_range(6, 17, 1), tick_labels=int_labels)
+CALIPER = dict(values='CALI', fmt=('b--',), label="CALIPER", color='blue', linestyle=DASHED, xlim=(6, 16),
+               ticks=tick_range(6, 17, 1), tick_labels=int_labels)
+SP_LOG = dict(values=lambda df, params: df['SP'] + params.get('sp_shift', 0), fmt=('purple',),
+              label="SP LOG (20 mV)", color='purple', xlim=sp_scale, ticks=sp_ticks, tick_labels=int_labels,
+              inputs=('SP',), params=('sp_shift',))
+RWA = dict(values='Rwa', fmt=('black',), label="Rwa", color='black', xlim=(0, 0.5),
+           ticks=tick_range(0, 0.55, 0.05), tick_labels=decimal_labels(2))
+
+# Shade area between Bit Size and Caliper where Bit Size > Caliper (Mud Cake)
+MUD_CAKE = dict(curve=1, x1='BIT', x2='CALI', kwargs=dict(facecolor='brown', alpha=0.3, label='Mud Cake'))
+
+LOG_TICKS = [0.2, 1, 10, 100, 2000]
+RESISTIVITY = dict(xscale='log', xlim=(0.2, 2000), ticks=LOG_TICKS, tick_labels=lambda ticks: [str(t) for t in ticks])
+
+# Porosity tracks run from 45% on the left to -15% on the right
+POROSITY_SCALE = (0.45, -0.15)
+POROSITY = dict(xlim=POROSITY_SCALE, ticks=tick_space(-0.15, 0.45, 5), tick_labels=rounded_percent_labels,
+                minor_ticks=tick_range(-0.15, 0.45 + 0.03, 0.03))
+
+VSH = dict(xlim=(0, 1), ticks=tick_space(0, 1, 11), tick_labels=percent_labels)
+SATURATION = dict(xlim=(-0.2, 1.2), ticks=tick_range(-0.2, 1.3, 0.2), tick_labels=percent_labels)
+
+# Single-curve tracks of the multi-well comparison view (WellComparison.py), with sparser ticks for narrow tracks
+COMPARISON_TRACKS = {
+    'GR': dict(GAMMA_RAY, label="GR", ticks=tick_range(0, 151, 75), tick_fontsize=10),
+    'Resistivity': dict(RESISTIVITY, values='Deep_Resistivity', fmt=('r-',), label="DEEP RES", color='red',
+                        ticks=[1, 100], tick_fontsize=10, grid=[MAJOR_GRID]),
+    'Sw': dict(SATURATION, values='Sw', fmt=('b-',), label="Sw", color='blue', ticks=tick_range(0, 1.01, 0.5),
+               tick_fontsize=10, grid=[dict(visible=True, which='major', linestyle='-', linewidth=1.5, alpha=0.8)]),
+}
+
+# Zone boundaries of Zonation.py, drawn across every track of the two dashboard figures
+ZONE_TOPS = dict(colors='darkred', linestyles='--', linewidths=2)
+
+WELL_LOG_LAYOUT = {
+    'name': 'well_log',
+    'figsize': (30, 18),
+    'zone_tops': ZONE_TOPS,
+    'tracks': [
+        {
+            'position': [0, 0.05, 0.2, 0.9],
+            'curves': [GAMMA_RAY, BIT_SIZE, CALIPER, SP_LOG, RWA],
+            'fills': [MUD_CAKE],
+        },
+        {
+            'position': [0.25, 0.05, 0.2, 0.9],
+            'curves': [
+                dict(RESISTIVITY, values='Deep_Resistivity', fmt=('r-',), label="DEEP RESISTIVITY", color='red',
+                     grid=[MAJOR_GRID, dict(visible=True, which='minor', linestyle='--', linewidth=0.5, alpha=0.5)]),
+                dict(RESISTIVITY, values='Medium_Resistivity', fmt=('purple',), label="MEDIUM RESISTIVITY",
+                     color='purple'),
+                dict(RESISTIVITY, values='Shallow_Resistivity', fmt=('brown',), label="SHALLOW RESISTIVITY",
+                     color='brown'),
+            ],
+        },
+        {
+            'position': [0.5, 0.05, 0.2, 0.9],
+            'curves': [
+                dict(POROSITY, values='PHID', fmt=('r-',), label="DENSITY POROSITY (%)", color='red',
+                     grid=[MAJOR_GRID, dict(visible=True, which='minor', linestyle='--', linewidth=1, alpha=0.7)]),
+                dict(POROSITY, values='PHIN', fmt=('b--',), label="NEUTRON POROSITY (%)", color='blue',
+                     linestyle=DASHED),
+                dict(POROSITY, values='phi_avg_calc', fmt=('k-',), plot_kwargs=dict(label='Average Porosity'),
+                     label="AVERAGE POROSITY (%)", color='black'),
+                dict(values='RNML', fmt=('g--',), plot_kwargs=dict(label='RNML'), label="RNML (OHM.M)",
+                     color='green', linestyle=DASHED, xlim=micro_log_scale('RNML'), ticks=micro_log_ticks('RNML'),
+                     tick_labels=int_labels),
+                dict(values='RLML', fmt=('g-',), plot_kwargs=dict(label='RLML'), label="RLML (OHM.M)",
+                     color='green', xlim=micro_log_scale('RLML'), ticks=micro_log_ticks('RLML'),
+                     tick_labels=int_labels),
+                dict(values='CORR', fmt=('m-',), plot_kwargs=dict(label='Density Correction'),
+                     label="DENSITY CORR (g/cm³)", color='magenta', xlim=(-0.5, 0.5),
+                     ticks=tick_space(-0.5, 0.5, 6), tick_labels=decimal_labels(1)),
+            ],
+            'fills': [
+                # Shade area where PHID > PHIN (Density > Neutron) to represent sandstone
+                dict(curve=0, x1='PHID', x2='PHIN', kwargs=dict(color='yellow', alpha=0.3)),
+                # Shade areas where RNML > RLML (Mudcake zones)
+                dict(curve=3, x1='RNML', x2='RLML', kwargs=dict(facecolor='brown', alpha=0.5, label='Mudcake Zone')),
+            ],
+        },
+        {
+            'position': [0.75, 0.05, 0.2, 0.9],
+            'curves': [
+                dict(VSH, values='Vsh_gamma_ray', fmt=('g-',), plot_kwargs=dict(label='Vsh Gamma Ray'),
+                     label="Vsh Gamma Ray (%)", color='green', grid=[dict(visible=True, linestyle='--')]),
+                dict(VSH, values='Vsh_sp', fmt=('purple',), plot_kwargs=dict(label='Vsh SP'),
+                     label="Vsh SP (%)", color='purple'),
+                dict(VSH, values='Vsh_porosity', fmt=('orange',), plot_kwargs=dict(label='Vsh Porosity'),
+                     label="Vsh Porosity (%)", color='orange'),
+            ],
+        },
+    ],
+}
+
+SECOND_WELL_LOG_LAYOUT = {
+    'name': 'second_well_log',
+    'figsize': (30, 18),
+    'zone_tops': ZONE_TOPS,
+    'tracks': [
+        {
+            'position': [0, 0.05, 0.3, 0.9],
+            'curves': [GAMMA_RAY, BIT_SIZE, CALIPER, SP_LOG],
+        },
+        {
+            'position': [0.35, 0.05, 0.3, 0.9],
+            'curves': [
+                dict(SATURATION, values='Sw', fmt=('b-',), plot_kwargs=dict(label='Sw'), label="Sw (%)",
+                     color='blue', grid=[dict(visible=True, which='major', linestyle='-', linewidth=1.5, alpha=0.8)]),
+                dict(SATURATION, values='Sxo', fmt=('r--',), plot_kwargs=dict(label='Sxo'), label="Sxo (%)",
+                     color='red'),
+                dict(values='Bvw', fmt=('purple',), plot_kwargs=dict(label='BVW'), label="BVW (%)", color='purple',
+                     xlim=(0, 0.5), ticks=tick_range(0, 0.55, 0.05), tick_labels=percent_labels),
+            ],
+            # P10-P90 envelopes of the uncertainty mode (Uncertainty.py), empty unless its columns are present
+            'fills': [
+                dict(curve=0, x1='Sw_P90', x2='Sw_P10', kwargs=dict(color='blue', alpha=0.15, label='Sw P10-P90')),
+                dict(curve=2, x1='Bvw_P90', x2='Bvw_P10', kwargs=dict(color='purple', alpha=0.15, label='BVW P10-P90')),
+            ],
+            'overlays': [
+                dict(curve=0, values='Sw_P50', fmt=('b:',), plot_kwargs=dict(label='Sw P50')),
+            ],
+        },
+        {
+            'position': [0.7, 0.05, 0.1, 0.9],
+            'curves': [
+                dict(values='MHI', fmt=('k-',), label="MHI", color='black', xlim=(0, 1.2),
+                     ticks=tick_range(0, 1.3, 0.2), tick_labels=decimal_labels(1), grid=[dict(visible=True)]),
+            ],
+            'fills': [
+                dict(curve=0, x1='MHI_P90', x2='MHI_P10', kwargs=dict(color='gray', alpha=0.3, label='MHI P10-P90')),
+            ],
+        },
+        {
+            'position': [0.85, 0.05, 0.1, 0.9],
+            'curves': [
+                dict(values='delta_Bvw', plot_kwargs=dict(color='#008080', label='Delta BVW'), label="Delta BVW",
+                     color='#008080', xlim=(-0.02, 0.02), ticks=tick_space(-0.02, 0.02, 5),
+                     tick_labels=decimal_labels(3), grid=[dict(visible=True)]),
+            ],
+        },
+    ],
+}
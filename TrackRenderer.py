@@ -0,0 +1,452 @@
+import base64
+import hashlib
+import io
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.figure import Figure
+from matplotlib.transforms import Bbox
+
+from Decimation import RENDER_DPI, DepthDecimator, depth_ticks
+from Profiling import stage
+
+TEXT_SPACING_ABOVE_AXIS = 0.02
+AXIS_SPACING = 0.04
+
+# Margins in inches around the tracks of a track image: depth tick labels on the left of the
+# first track, the axis title above the highest stacked spine, and slack below and to the right
+TICK_LABEL_MARGIN = 0.7
+TITLE_MARGIN = 0.45
+BOTTOM_MARGIN = 0.2
+RIGHT_MARGIN = 0.35
+
+
+def configure_axis(axis, label, color, x_ticks, tick_labels, linestyle='-', label_coord_offset=0.02,
+                   tick_fontsize=14):  # Increased fontsize for better visibility
+    axis.set_xlabel(label, fontsize=14, weight='bold', color=color)
+    axis.xaxis.set_label_position('top')
+    axis.xaxis.set_label_coords(0.5, 1 + label_coord_offset)
+    axis.tick_params(axis='x', colors=color, labeltop=True, labelbottom=False,
+                     labelsize=tick_fontsize)  # Set tick label size
+    axis.spines['top'].set_color(color)
+    axis.spines['top'].set_linestyle(linestyle)
+    axis.set_xticks(x_ticks)
+    axis.set_xticklabels(tick_labels, fontsize=tick_fontsize, color=color)
+
+
+def resolve(value, df, params):
+    """Evaluate a layout entry that is either a constant or a callable of (df, params)."""
+    return value(df, params) if callable(value) else value
+
+
+class TrackFigure:
+    """
+    Figure skeleton for one track layout, built once and refreshed with render.
+
+    The layout (see TrackLayouts.py) is a dict with the figure size and a list of tracks, and
+    optionally the dpi the figure is shown at and the height fraction of the track axes, which
+    size the decimation bins.
+    Every track has a position and a list of curves; the first curve owns the track's axes
+    and each further curve gets a twinned axes stacked above it. Building the skeleton creates
+    all axes, spines, labels, ticks and empty artists; render only replaces line and fill data
+    and re-applies the scales that depend on the data (for example the SP scale).
+
+    Curve entries:
+    - values: column name or callable(df, params) returning the curve
+    - fmt, plot_kwargs: format string and keyword arguments of the line
+    - label, color, linestyle: axis title, axis colour and top spine linestyle
+    - xlim, ticks: constants or callables(df, params); a reversed xlim inverts the axis
+    - tick_labels: callable(ticks) returning the tick labels
+    - minor_ticks, xscale, grid: optional minor ticks, axis scale and list of ax.grid kwargs
+    - tick_fontsize: optional tick label size, 14 by default
+    - inputs, params: extra columns and render parameters a curve's callables read (e.g. 'SP'
+      and 'sp_shift' for the shifted SP), so cached track images are invalidated by them
+
+    Fill entries: curve (index of the curve axes to draw on), x1, x2 (column names) and
+    kwargs of the PolyCollection; the area is filled where x1 > x2.
+
+    Overlay entries draw an extra line on the axes of an existing curve: curve (index of the
+    curve axes), values, fmt and plot_kwargs as for curves. Fills and overlays whose columns
+    are missing from the rendered DataFrame stay empty, so optional curves such as uncertainty
+    envelopes can be part of a layout.
+
+    A layout may also have zone_tops, the LineCollection kwargs of horizontal lines drawn
+    across every track at the depths given by the zone_tops render parameter (a tuple of
+    depths, see Zonation.zone_tops); without that parameter no lines are drawn.
+    """
+
+    def __init__(self, layout):
+        self.layout = layout
+        self.fig = Figure(figsize=layout['figsize'])
+        self.decimator = DepthDecimator(self.fig, axes_height=layout.get('axes_height', 0.9),
+                                        dpi=layout.get('dpi', RENDER_DPI))
+        self.depth_ax = None
+        self.track_axes = []
+        self.curves = []
+        self.fills = []
+        self.overlays = []
+        self.zone_lines = []
+        self._applied = {}
+        for track in layout['tracks']:
+            self._build_track(track)
+        if 'zone_tops' in layout:
+            for axes in self.track_axes:
+                # x in axes fractions, y in depth: every line spans the full track width
+                lines = LineCollection([], transform=axes[0].get_yaxis_transform(), zorder=5, **layout['zone_tops'])
+                axes[-1].add_collection(lines, autolim=False)
+                self.zone_lines.append(lines)
+
+    def _build_track(self, track):
+        host = self.fig.add_axes(track['position'], sharey=self.depth_ax)
+        if self.depth_ax is None:
+            self.depth_ax = host
+        axes = [host] + [host.twiny() for _ in track['curves'][1:]]
+        self.track_axes.append(axes)
+
+        for position, (ax, spec) in enumerate(zip(axes, track['curves'])):
+            line, = ax.plot([], [], *spec.get('fmt', ()), **spec.get('plot_kwargs', {}))
+            self.decimator.add_line(ax, line)
+            if 'xscale' in spec:
+                ax.set_xscale(spec['xscale'])
+            if position:
+                ax.spines['top'].set_position(('axes', 1 + position * AXIS_SPACING))
+            if not callable(spec['xlim']) and not callable(spec['ticks']):
+                self._apply_scale(ax, spec, position, spec['xlim'], spec['ticks'])
+            for grid in spec.get('grid', []):
+                ax.grid(**grid)
+            self.curves.append((spec, ax, position, line))
+
+        for spec in track.get('fills', []):
+            ax = axes[spec['curve']]
+            collection = PolyCollection([], **spec.get('kwargs', {}))
+            ax.add_collection(collection, autolim=False)
+            self.decimator.add_fill(ax, collection)
+            self.fills.append((spec, collection))
+
+        for spec in track.get('overlays', []):
+            ax = axes[spec['curve']]
+            line, = ax.plot([], [], *spec.get('fmt', ()), **spec.get('plot_kwargs', {}))
+            self.decimator.add_line(ax, line)
+            self.overlays.append((spec, line))
+
+    def _apply_scale(self, ax, spec, position, xlim, ticks):
+        if self._applied.get(ax) == (tuple(xlim), tuple(ticks)):
+            return
+        self._applied[ax] = (tuple(xlim), tuple(ticks))
+        ax.set_xlim(*xlim)
+        configure_axis(ax, spec['label'], spec['color'], ticks, spec['tick_labels'](ticks),
+                       linestyle=spec.get('linestyle', '-'),
+                       label_coord_offset=position * AXIS_SPACING + TEXT_SPACING_ABOVE_AXIS,
+                       tick_fontsize=spec.get('tick_fontsize', 14))
+        if 'minor_ticks' in spec:
+            ax.set_xticks(spec['minor_ticks'], minor=True)
+
+    def render(self, df, **params):
+        """
+        Show df on the skeleton, updating artists in place.
+
+        Parameters:
+        - df (pd.DataFrame): Processed well data with a DEPTH column
+        - **params: Values the layout's callables read, e.g. sp_shift
+
+        Returns:
+        - matplotlib.figure.Figure: The rendered figure.
+        """
+        depth = df['DEPTH'].to_numpy(dtype=float)
+        min_depth, max_depth = np.nanmin(depth), np.nanmax(depth)
+
+        with self.decimator.hold():
+            self.depth_ax.set_ylim(max_depth, min_depth)
+            self.depth_ax.set_yticks(depth_ticks(min_depth, max_depth))
+
+        for spec, ax, position, line in self.curves:
+            values = df[spec['values']] if isinstance(spec['values'], str) else spec['values'](df, params)
+            self.decimator.set_line_data(line, values, depth)
+            if callable(spec['xlim']) or callable(spec['ticks']):
+                self._apply_scale(ax, spec, position, resolve(spec['xlim'], df, params),
+                                  resolve(spec['ticks'], df, params))
+
+        missing = np.full(len(df), np.nan)
+        for spec, collection in self.fills:
+            x1 = df[spec['x1']].to_numpy(dtype=float) if spec['x1'] in df else missing
+            x2 = df[spec['x2']].to_numpy(dtype=float) if spec['x2'] in df else missing
+            self.decimator.set_fill_data(collection, depth, x1, x2, x1 > x2)
+
+        for spec, line in self.overlays:
+            values = df[spec['values']] if spec['values'] in df else missing
+            self.decimator.set_line_data(line, values, depth)
+
+        segments = [[(0, top), (1, top)] for top in params.get('zone_tops', ())]
+        for lines in self.zone_lines:
+            lines.set_segments(segments)
+        return self.fig
+
+    def follow(self, df, span, **params):
+        """
+        Show the last `span` depth units of a well that grows while drilling (see LiveWell).
+
+        The window's rows are found by binary search on the ascending depth and only they are
+        drawn, updating the artists in place like render, so a refresh costs O(window) however
+        long the well has grown.
+        """
+        depth = df['DEPTH'].to_numpy(dtype=float)
+        start = int(np.searchsorted(depth, depth[-1] - span, side='left'))
+        return self.render(df.iloc[start:], **params)
+
+    def track_key(self, index, df, params, digests=None):
+        """
+        Hash identifying the image of one track.
+
+        Covers the layout, the track's position in it, the depth column, every column the
+        track's curves, fills and overlays draw (or their absence) and the render parameters
+        its curves declare, plus the zone tops of layouts that draw them.
+        """
+        track = self.layout['tracks'][index]
+        specs = track['curves'] + track.get('overlays', [])
+        columns = ['DEPTH'] + [spec['values'] for spec in specs if isinstance(spec['values'], str)]
+        columns += [column for spec in specs for column in spec.get('inputs', ())]
+        columns += [column for spec in track.get('fills', []) for column in (spec['x1'], spec['x2'])]
+        names = {name for spec in specs for name in spec.get('params', ())}
+        names = sorted(names | {'zone_tops'} if 'zone_tops' in self.layout else names)
+
+        digests = {} if digests is None else digests
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr((self.layout['name'], index, self.layout['figsize'], self.decimator.dpi,
+                            [(name, params.get(name)) for name in names])).encode())
+        for column in columns:
+            if column not in digests:
+                values = df[column].to_numpy(dtype=float) if column in df else None
+                digests[column] = b'missing' if values is None else \
+                    hashlib.blake2b(np.ascontiguousarray(values).view(np.uint8), digest_size=16).digest()
+            digest.update(column.encode() + digests[column])
+        return digest.hexdigest()
+
+    def track_bounds(self):
+        """
+        Extent in inches (left, bottom, right, top) of every track's image.
+
+        The images share one vertical extent and tile the figure from left to right, split
+        halfway between neighbouring tracks, so placing them side by side rebuilds the figure.
+        Extents come from the layout geometry alone, so they do not change between renders.
+        """
+        width, height = self.layout['figsize']
+        dpi = self.decimator.dpi
+        positions = [track['position'] for track in self.layout['tracks']]
+        top = max((bottom + axes_height * (1 + (len(track['curves']) - 1) * AXIS_SPACING + TEXT_SPACING_ABOVE_AXIS))
+                  for track, (_, bottom, _, axes_height) in zip(self.layout['tracks'], positions))
+        top = top * height + TITLE_MARGIN
+        bottom = min(position[1] for position in positions) * height - BOTTOM_MARGIN
+
+        edges = [positions[0][0] * width - TICK_LABEL_MARGIN]
+        edges += [(left + track_width + next_left) / 2 * width
+                  for (left, _, track_width, _), (next_left, *_) in zip(positions, positions[1:])]
+        edges.append((positions[-1][0] + positions[-1][2]) * width + RIGHT_MARGIN)
+        # Whole pixels, so the images line up exactly when placed side by side
+        edges = [round(edge * dpi) / dpi for edge in edges]
+        bottom, top = round(bottom * dpi) / dpi, round(top * dpi) / dpi
+        return [(left, bottom, right, top) for left, right in zip(edges, edges[1:])]
+
+    def render_track_images(self, df, image_cache, **params):
+        """
+        PNG image of every track, re-rasterizing only tracks whose key is not in image_cache.
+
+        Parameters:
+        - df (pd.DataFrame): Processed well data with a DEPTH column
+        - image_cache (TrackImageCache): Cache of track images by track_key
+        - **params: Values the layout's callables read, e.g. sp_shift
+
+        Returns:
+        - list: (png bytes, width in inches) of every track, left to right.
+        """
+        digests = {}
+        keys = [self.track_key(index, df, params, digests) for index in range(len(self.track_axes))]
+        images = [image_cache.get(key) for key in keys]
+        bounds = self.track_bounds()
+        missing = [index for index, image in enumerate(images) if image is None]
+        if missing:
+            with stage('render'):
+                self.render(df, **params)
+            with stage('rasterize'):
+                for index in missing:
+                    images[index] = self._track_png(index, bounds[index])
+                    image_cache.put(keys[index], images[index])
+        return [(image, right - left) for image, (left, _, right, _) in zip(images, bounds)]
+
+    def _track_png(self, index, bounds):
+        # Draw only this track's axes, cropped to its extent
+        shown = set(self.track_axes[index])
+        hidden = [artist for artist in self.fig.axes + self.fig.texts if artist not in shown and artist.get_visible()]
+        for artist in hidden:
+            artist.set_visible(False)
+        try:
+            buffer = io.BytesIO()
+            self.fig.savefig(buffer, format='png', dpi=self.decimator.dpi, bbox_inches=Bbox.from_extents(*bounds))
+            return buffer.getvalue()
+        finally:
+            for artist in hidden:
+                artist.set_visible(True)
+
+    def close(self):
+        """Release the figure's artists; the skeleton cannot be rendered afterwards."""
+        self.fig.clear()
+        self.curves, self.fills, self.overlays, self.track_axes, self.zone_lines = [], [], [], [], []
+
+
+class FigureCache:
+    """
+    Figure skeletons per layout name, reused across reruns.
+
+    Figures are plain matplotlib Figures (not pyplot-managed), so nothing accumulates in
+    pyplot's figure registry; skeletons evicted beyond max_figures are closed explicitly.
+    A skeleton is mutable, so a cache should be owned by one session at a time.
+    """
+
+    def __init__(self, max_figures=4):
+        self.max_figures = max_figures
+        self._figures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, layout, factory=TrackFigure):
+        """Skeleton of layout, built with factory (TrackFigure or a subclass) when missing or stale."""
+        with self._lock:
+            name = layout['name']
+            figure = self._figures.get(name)
+            if figure is None or figure.layout is not layout or type(figure) is not factory:
+                if figure is not None:
+                    figure.close()
+                with stage('build_figure'):
+                    figure = self._figures[name] = factory(layout)
+            self._figures.move_to_end(name)
+            while len(self._figures) > self.max_figures:
+                _, evicted = self._figures.popitem(last=False)
+                evicted.close()
+            return figure
+
+    def clear(self):
+        with self._lock:
+            for figure in self._figures.values():
+                figure.close()
+            self._figures.clear()
+
+
+class TrackImageCache:
+    """
+    Bounded cache of rendered track images by track key.
+
+    Images are kept in memory up to max_bytes with least-recently-used eviction and, when a
+    directory is given, also written to disk, where the least recently used files are removed
+    beyond max_disk_bytes. Keys are content hashes, so one cache can be shared by every session.
+
+    Files are written under a temporary name and renamed into place, so a concurrent reader
+    never sees a partial image, and a file trimmed away between lookup and read is a miss.
+    """
+
+    def __init__(self, max_bytes=64 * 1024**2, directory=None, max_disk_bytes=512 * 1024**2):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._images = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()  # Serializes trimming of the directory
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.png')
+
+    def get(self, key):
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+                self.hits += 1
+                return image
+        if self.directory is not None:
+            try:
+                with open(self._path(key), 'rb') as f:
+                    image = f.read()
+                os.utime(self._path(key))
+            except FileNotFoundError:
+                # Never written, or trimmed by another thread in the meantime
+                pass
+            else:
+                with self._lock:
+                    self.hits += 1
+                self._remember(key, image)
+                return image
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, image):
+        self._remember(key, image)
+        if self.directory is not None:
+            # Written next to its final path and renamed, which replaces the file atomically
+            handle, temporary = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+            try:
+                with os.fdopen(handle, 'wb') as f:
+                    f.write(image)
+                os.replace(temporary, self._path(key))
+            except BaseException:
+                os.remove(temporary)
+                raise
+            self._trim_disk()
+
+    def _remember(self, key, image):
+        with self._lock:
+            if key in self._images:
+                self.nbytes -= len(self._images[key])
+            self._images[key] = image
+            self.nbytes += len(image)
+            while self.nbytes > self.max_bytes and len(self._images) > 1:
+                _, evicted = self._images.popitem(last=False)
+                self.nbytes -= len(evicted)
+
+    def _trim_disk(self):
+        with self._disk_lock:
+            files = []  # (mtime, size, path)
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith('.png'):
+                    try:
+                        info = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    files.append((info.st_mtime, info.st_size, entry.path))
+            total = sum(size for _, size, _ in files)
+            for _, size, path in sorted(files):
+                if total <= self.max_disk_bytes:
+                    break
+                total -= size
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+
+def track_images_html(images):
+    """
+    HTML placing track images side by side, scaled together to the container width.
+
+    Parameters:
+    - images (list): (png bytes, width in inches) per track, as returned by render_track_images
+
+    Returns:
+    - str: A flex row of inline PNG images.
+    """
+    total = sum(width for _, width in images)
+    tags = ''.join(
+        f'<img src="data:image/png;base64,{base64.b64encode(image).decode()}" '
+        f'style="width:{100 * width / total:.4f}%;height:auto;display:block">'
+        for image, width in images)
+    return f'<div style="display:flex;align-items:flex-start;width:100%">{tags}</div>'
+
+
+# Skeleton cache used when a plotter is not given one
+FIGURE_CACHE = FigureCache()
@@ -0,0 +1,117 @@
+import os
+
+import numpy as np
+from matplotlib.colors import to_hex
+
+from Decimation import is_ascending, minmax_indices
+from TrackRenderer import resolve
+
+# Static frontend of the interactive track viewer, served by Streamlit as a custom component
+VIEWER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'track_viewer')
+
+# Depth bins of the whole-well overview and of a zoomed-in detail window; every bin keeps up to
+# four samples per curve (see minmax_indices), so a curve costs at most 32 bytes per bin
+OVERVIEW_BINS = 1024
+DETAIL_BINS = 1024
+
+
+def curve_style(spec):
+    """Colour and dash pattern of a layout curve or overlay, from its fmt string or axis colour."""
+    fmt = ''.join(spec.get('fmt', ()))
+    dashed = '--' in fmt or ':' in fmt or spec.get('linestyle', '-') != '-'
+    color = spec.get('plot_kwargs', {}).get('color') or spec.get('color') or 'black'
+    return to_hex(color), dashed
+
+
+class ViewerData:
+    """
+    Track layout and curves of one processed well, encoded for the interactive track viewer.
+
+    The tracks of a TrackRenderer layout (the ones WellLogPlotter and SecondWellLogPlotter
+    draw) are described as plain JSON: curve labels, colours, axis limits and log scales,
+    fills and zone tops. Curves are sent as one float32 buffer instead of JSON numbers. Each
+    curve is min/max-decimated on its own (see minmax_indices) and stored as its depths
+    followed by its values; fills store depth, x1 and x2. The browser gets a decimated
+    overview of the whole well once, and detail for a depth window only when it zooms in
+    beyond the overview's resolution.
+
+    Parameters:
+    - layout (dict): Track layout of TrackLayouts.py
+    - df (pd.DataFrame): Processed well data with a DEPTH column, ascending
+    - **params: Values the layout's callables read, e.g. sp_shift and zone_tops
+    """
+
+    def __init__(self, layout, df, **params):
+        self.depth = df['DEPTH'].to_numpy(dtype=float)
+        if not is_ascending(self.depth):
+            raise ValueError('The track viewer needs ascending depth')
+        self.series = []  # (name, kind, arrays)
+        tracks = []
+        for index, track in enumerate(layout['tracks']):
+            curves = []
+            for position, spec in enumerate(track['curves']):
+                name = f'{index}.{position}'
+                values = df[spec['values']] if isinstance(spec['values'], str) else spec['values'](df, params)
+                color, dashed = curve_style(spec)
+                xlim = [float(x) for x in resolve(spec['xlim'], df, params)]
+                curves.append(dict(name=name, label=spec['label'], color=color, dashed=dashed, xlim=xlim,
+                                   log=spec.get('xscale') == 'log'))
+                self.series.append((name, 'line', [np.asarray(values, dtype=float)]))
+            overlays = []
+            for position, spec in enumerate(track.get('overlays', [])):
+                if spec['values'] not in df:
+                    continue
+                name = f'{index}.overlay{position}'
+                color, dashed = curve_style(dict(spec, color=track['curves'][spec['curve']]['color']))
+                overlays.append(dict(name=name, curve=spec['curve'], color=color, dashed=dashed))
+                self.series.append((name, 'line', [df[spec['values']].to_numpy(dtype=float)]))
+            fills = []
+            for position, spec in enumerate(track.get('fills', [])):
+                if spec['x1'] not in df or spec['x2'] not in df:
+                    continue
+                name = f'{index}.fill{position}'
+                kwargs = spec.get('kwargs', {})
+                fills.append(dict(name=name, curve=spec['curve'],
+                                  color=to_hex(kwargs.get('color', kwargs.get('facecolor', 'gray'))),
+                                  alpha=float(kwargs.get('alpha', 0.3))))
+                self.series.append((name, 'fill', [df[spec['x1']].to_numpy(dtype=float),
+                                                   df[spec['x2']].to_numpy(dtype=float)]))
+            tracks.append(dict(width=float(track['position'][2]), curves=curves, overlays=overlays, fills=fills))
+
+        finite = self.depth[np.isfinite(self.depth)]
+        self.spec = {
+            'layout': layout['name'],
+            'tracks': tracks,
+            'depth_range': [float(finite[0]), float(finite[-1])] if len(finite) else [0.0, 1.0],
+            'zone_tops': [float(top) for top in params.get('zone_tops', ())] if 'zone_tops' in layout else [],
+            'overview_bins': OVERVIEW_BINS,
+        }
+
+    def encode(self, window=None, n_bins=OVERVIEW_BINS):
+        """
+        Decimated curves of a depth window (the whole well by default) as one float32 buffer.
+
+        Returns:
+        - tuple: (bytes of the buffer, index of every series: name -> [offset, length] in float32 values).
+        """
+        parts, index, offset = [], {}, 0
+        for name, kind, arrays in self.series:
+            # Fills keep the extremes of both of their curves
+            rows = minmax_indices(self.depth, arrays, n_bins, window)
+            block = np.empty((1 + len(arrays), len(rows)), dtype=np.float32)
+            block[0] = self.depth[rows]
+            for row, values in enumerate(arrays, start=1):
+                block[row] = values[rows]
+            parts.append(block.ravel())
+            index[name] = [offset, len(rows)]
+            offset += block.size
+        buffer = np.concatenate(parts) if parts else np.empty(0, dtype=np.float32)
+        return buffer.tobytes(), index
+
+    def overview(self):
+        """Decimated curves of the whole well, sent once per well and parameter set."""
+        return self.encode()
+
+    def detail(self, top, base, n_bins=DETAIL_BINS):
+        """Decimated curves of the window top-base; only the samples inside it are read."""
+        return self.encode((top, base), n_bins)
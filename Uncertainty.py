@@ -0,0 +1,188 @@
+import numpy as np
+import pandas as pd
+
+from Calculations import INVASION_DEPTHS, average_porosity, formation_temperature, rmf_at_temperature, \
+    well_parameter_arrays
+
+# Parameters that can vary per realization, with the dashboard defaults used when a parameter is not given
+SWEEP_DEFAULTS = dict(a=1.0, m=2.0, n=2.0, rw=0.05, Temp_rw=78.0, invasion=None, rza=None)
+
+# Curves summarised by the envelope
+ENVELOPE_CURVES = ('Sw', 'Bvw', 'MHI')
+
+
+def grid_realizations(**values):
+    """
+    Every combination of the given parameter values.
+
+    Parameters:
+    - **values: Parameter name -> list of values, e.g. a=[0.8, 1.0], m=np.linspace(1.8, 2.2, 5),
+      invasion=[None, 'average']
+
+    Returns:
+    - dict: Parameter name -> np.ndarray with one entry per combination.
+    """
+    names = list(values)
+    choices = [np.asarray(values[name], dtype=object if name in ('invasion', 'rza') else float) for name in names]
+    index = np.indices([len(choice) for choice in choices]).reshape(len(choices), -1)
+    return {name: choice[idx] for name, choice, idx in zip(names, choices, index)}
+
+
+def monte_carlo_realizations(n_realizations, seed=0, **distributions):
+    """
+    Random parameter realizations.
+
+    Parameters:
+    - n_realizations (int): Number of realizations
+    - seed (int): Seed of the random generator
+    - **distributions: Parameter name -> a constant, a list of choices sampled with equal probability,
+      or a tuple ('uniform', low, high), ('normal', mean, std), ('lognormal', mean, sigma)
+      or ('triangular', left, mode, right)
+
+    Returns:
+    - dict: Parameter name -> np.ndarray of n_realizations values.
+    """
+    rng = np.random.default_rng(seed)
+    realizations = {}
+    for name, spec in distributions.items():
+        if isinstance(spec, tuple):
+            kind, *args = spec
+            if kind not in ('uniform', 'normal', 'lognormal', 'triangular'):
+                raise ValueError(f"Unknown distribution for {name}: {kind}")
+            realizations[name] = getattr(rng, kind)(*args, size=n_realizations)
+        elif isinstance(spec, list):
+            choices = np.asarray(spec, dtype=object)
+            realizations[name] = choices[rng.integers(len(choices), size=n_realizations)]
+        else:
+            realizations[name] = np.full(n_realizations, spec, dtype=object if spec is None else float)
+    return realizations
+
+
+def _realization_arrays(realizations):
+    """Per-realization a, m, n, log(rw * (Temp_rw + 6.77)), invasion factor z and Rza (NaN when absent)."""
+    sizes = {len(np.atleast_1d(values)) for values in realizations.values()} or {1}
+    if len(sizes) > 1:
+        raise ValueError("All parameter realizations must have the same length")
+    size = sizes.pop()
+
+    def column(name):
+        values = realizations.get(name, SWEEP_DEFAULTS[name])
+        return np.broadcast_to(np.asarray(values, dtype=object), (size,))
+
+    a, m, n, rw, temp_rw = (column(name).astype(float) for name in ('a', 'm', 'n', 'rw', 'Temp_rw'))
+    z = np.array([np.nan if value is None else INVASION_DEPTHS[value] for value in column('invasion')])
+    rza = np.array([np.nan if value is None else float(value) for value in column('rza')])
+    return a, m, n, np.log(rw * (temp_rw + 6.77)), z, rza
+
+
+def saturation_percentiles(depth, phin, phid, deep_res, shallow_res, gradient, surf_temp, rmf, realizations,
+                           percentiles=(10, 50, 90), max_bytes=256 * 1024**2):
+    """
+    Percentiles of Sw, Bvw and MHI over parameter realizations, per depth sample.
+
+    Every realization is evaluated at once by broadcasting over a trailing parameter axis:
+    Archie's equation is taken in log space, log Sw = (log(Rw a) - log Rt - m log phi) / n,
+    so the per-sample terms are computed once and each realization costs a few adds and
+    one exp per sample. Depth is processed in chunks sized so the (samples x realizations)
+    work arrays stay under max_bytes, and only the percentile curves are kept.
+
+    Parameters:
+    - depth, phin, phid, deep_res, shallow_res (np.ndarray): Raw curves, one value per sample
+    - gradient, surf_temp, rmf (np.ndarray): Per-sample well constants from well_parameter_arrays
+    - realizations (dict): Parameter name -> per-realization values of a, m, n, rw, Temp_rw,
+      invasion and rza (see grid_realizations and monte_carlo_realizations); missing parameters
+      use SWEEP_DEFAULTS, and rza takes precedence over invasion as in process_well_data_optimized
+    - percentiles (tuple): Percentiles to return, 10/50/90 by default
+    - max_bytes (int): Memory budget of the work arrays of one chunk
+
+    Returns:
+    - dict: Curve name of ENVELOPE_CURVES -> np.ndarray of shape (len(percentiles), n_samples).
+    """
+    a, m, n, log_rw_numerator, z, rza = _realization_arrays(realizations)
+    n_realizations, n_samples = len(a), len(depth)
+
+    # Per-sample terms that do not depend on the swept parameters
+    phi = average_porosity(np.asarray(phin, dtype=float), np.asarray(phid, dtype=float))
+    phi[phi < 0] = np.nan
+    T = formation_temperature(np.asarray(depth, dtype=float), gradient, surf_temp)
+    rmf_corrected = rmf_at_temperature(rmf, surf_temp, T)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_phi = np.log(phi)
+        log_temperature = np.log(T + 6.77)
+        log_deep = np.log(np.asarray(deep_res, dtype=float))
+        log_shallow = np.log(np.asarray(shallow_res, dtype=float))
+        log_rmf = np.log(rmf_corrected)
+        log_rza = np.log(rza)
+
+    inverse_n, log_a = 1 / n, np.log(a)
+    mixed = np.flatnonzero(np.isnan(rza) & ~np.isnan(z))
+    given = np.flatnonzero(~np.isnan(rza))
+    positions = np.asarray(percentiles, dtype=float) / 100 * (n_realizations - 1)
+    low = np.floor(positions).astype(int)
+    high = np.minimum(low + 1, n_realizations - 1)
+    fraction = positions - low
+
+    def percentile_rows(values):
+        # Sorting contiguous rows is much faster than np.percentile across them; same linear interpolation
+        values.sort(axis=1)
+        result = values[:, low] + (values[:, high] - values[:, low]) * fraction
+        result[np.isnan(values[:, -1])] = np.nan  # NaN sorts last; any NaN realization gives NaN like np.percentile
+        return result.T
+
+    envelope = {curve: np.empty((len(percentiles), n_samples)) for curve in ENVELOPE_CURVES}
+    chunk = max(1, int(max_bytes // (n_realizations * 8 * 8)))  # Four work arrays plus temporaries
+    for start in range(0, n_samples, chunk):
+        window = slice(start, min(start + chunk, n_samples))
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            # (samples, realizations) work arrays; log(a / phi^m) is shared by Sw and Sxo
+            log_a_phi_m = log_phi[window, None] * m
+            np.subtract(log_a, log_a_phi_m, out=log_a_phi_m)
+
+            # Sw: Rw corrected to formation temperature is exp(log_rw_numerator - log_temperature)
+            log_rw = log_rw_numerator - log_temperature[window, None]
+            log_sw = log_rw + log_a_phi_m
+            log_sw -= log_deep[window, None]
+            log_sw *= inverse_n
+
+            # Sxo: Rmf by default, Rza where given, Rw/Rmf mixed by invasion depth otherwise
+            log_sxo = np.repeat(log_rmf[window, None], n_realizations, axis=1)
+            if len(mixed):
+                rw_corrected = np.exp(log_rw[:, mixed])
+                log_sxo[:, mixed] = -np.log(z[mixed] / rw_corrected + (1 - z[mixed]) / rmf_corrected[window, None])
+            if len(given):
+                log_sxo[:, given] = log_rza[given]
+            log_sxo += log_a_phi_m
+            log_sxo -= log_shallow[window, None]
+            log_sxo *= inverse_n
+
+            # MHI = Sw / Sxo
+            np.subtract(log_sw, log_sxo, out=log_sxo)
+            np.exp(log_sxo, out=log_sxo)
+            np.exp(log_sw, out=log_sw)
+            sw = percentile_rows(log_sw)
+            envelope['Sw'][:, window] = sw
+            # phi does not vary between realizations, so Bvw percentiles are phi times Sw percentiles
+            envelope['Bvw'][:, window] = sw * phi[window]
+            envelope['MHI'][:, window] = percentile_rows(log_sxo)
+    return envelope
+
+
+def uncertainty_envelope(df, inputs, realizations, percentiles=(10, 50, 90), max_bytes=256 * 1024**2):
+    """
+    P10/P50/P90 (or other percentile) curves of Sw, Bvw and MHI for the rows of df.
+
+    Parameters:
+    - df (pd.DataFrame): Raw well log data with Well_Name, DEPTH, PHIN, PHID and resistivity columns
+    - inputs (pd.DataFrame): Inputs sheet
+    - realizations (dict): Per-realization parameter values, see saturation_percentiles
+
+    Returns:
+    - pd.DataFrame: One column per curve and percentile, e.g. Sw_P10, Sw_P50, Sw_P90, on df's index.
+    """
+    gradient, surf_temp, rmf = well_parameter_arrays(df['Well_Name'], inputs)
+    envelope = saturation_percentiles(
+        df['DEPTH'].to_numpy(dtype=float), df['PHIN'].to_numpy(dtype=float), df['PHID'].to_numpy(dtype=float),
+        df['Deep_Resistivity'].to_numpy(dtype=float), df['Shallow_Resistivity'].to_numpy(dtype=float),
+        gradient, surf_temp, rmf, realizations, percentiles=percentiles, max_bytes=max_bytes)
+    columns = {f'{curve}_P{p:g}': values[i] for curve, values in envelope.items() for i, p in enumerate(percentiles)}
+    return pd.DataFrame(columns, index=df.index)
@@ -0,0 +1,128 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+
+from Decimation import depth_ticks
+from TrackLayouts import COMPARISON_TRACKS
+from TrackRenderer import TrackFigure
+
+# Figure width per comparison track in inches, and the dpi the comparison figure is shown at
+TRACK_WIDTH = 1.6
+COMPARISON_DPI = 100
+
+# Depth ticks per track; tick artists dominate drawing time with dozens of tracks
+MAX_DEPTH_TICKS = 20
+
+
+def process_wells(load_well, wells, inputs, curve_cache, well_key, max_workers=8, **params):
+    """
+    Load and process several wells concurrently on a thread pool.
+
+    NumPy and the memory-mapped store release the GIL for the heavy work, and every well is
+    cached independently in curve_cache, so adding a well to the selection only processes
+    that well.
+
+    Parameters:
+    - load_well (callable): well -> raw DataFrame of the well, e.g. WellStore.load_well
+    - wells (list): Wells to process
+    - inputs (pd.DataFrame): Inputs sheet
+    - curve_cache (CurveCache): Cache shared by all wells
+    - well_key (callable): well -> cache key of the well's raw data
+    - max_workers (int): Threads of the pool
+    - **params: Keyword parameters of process_well_data_optimized
+
+    Returns:
+    - dict: Well -> processed DataFrame, in the order of wells.
+    """
+    def process(well):
+        return curve_cache.process(load_well(well), inputs=inputs, well_key=well_key(well), **params)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(wells)))) as pool:
+        return dict(zip(wells, pool.map(process, wells)))
+
+
+@lru_cache(maxsize=8)
+def comparison_layout(wells, tracks=('GR', 'Resistivity', 'Sw')):
+    """
+    Track layout with one column of tracks per well.
+
+    Cached per (wells, tracks) so reruns with the same selection reuse the figure skeleton.
+
+    Parameters:
+    - wells (tuple): Well names, one column each from left to right
+    - tracks (tuple): Keys of TrackLayouts.COMPARISON_TRACKS shown for every well
+
+    Returns:
+    - dict: Layout for ComparisonFigure; every track carries the well it shows.
+    """
+    column_width = 1 / len(wells)
+    track_width = column_width * 0.85 / len(tracks)
+    layout_tracks = []
+    for i, well in enumerate(wells):
+        for j, track in enumerate(tracks):
+            left = i * column_width + j * track_width + column_width * 0.05
+            layout_tracks.append({
+                'position': [left, 0.04, track_width * 0.9, 0.86],
+                'curves': [COMPARISON_TRACKS[track]],
+                'well': well,
+            })
+    return {
+        'name': 'comparison',
+        'figsize': (max(12, TRACK_WIDTH * len(wells) * len(tracks)), 12),
+        'dpi': COMPARISON_DPI,
+        'axes_height': 0.86,
+        'tracks': layout_tracks,
+        'wells': wells,
+    }
+
+
+class ComparisonFigure(TrackFigure):
+    """
+    Side-by-side tracks of several wells on one shared depth axis.
+
+    Each well keeps its own depth samples; with datums the depth axis is flattened, showing
+    depth minus the well's datum so a marker lines up across wells. Curves are decimated per
+    pixel row like the single-well plots.
+    """
+
+    def __init__(self, layout):
+        super().__init__(layout)
+        self.track_wells = [track['well'] for track in layout['tracks'] for _ in track['curves']]
+        # Depth labels only on the first track of every well
+        previous = None
+        for axes, track in zip(self.track_axes, layout['tracks']):
+            if track['well'] == previous:
+                axes[0].tick_params(axis='y', labelleft=False)
+            previous = track['well']
+        column_width = 1 / len(layout['wells'])
+        for i, well in enumerate(layout['wells']):
+            self.fig.text((i + 0.5) * column_width, 0.99, well, ha='center', va='top', fontsize=16, weight='bold')
+
+    def render(self, frames, datums=None, **params):
+        """
+        Show the processed wells on the skeleton.
+
+        Parameters:
+        - frames (dict): Well -> processed DataFrame with a DEPTH column
+        - datums (dict): Well -> datum depth subtracted from its depth, None for a shared depth axis
+        - **params: Values the layout's callables read
+
+        Returns:
+        - matplotlib.figure.Figure: The rendered figure.
+        """
+        depths = {well: frames[well]['DEPTH'].to_numpy(dtype=float) - (datums or {}).get(well, 0)
+                  for well in self.layout['wells']}
+        min_depth = min(np.nanmin(depth) for depth in depths.values())
+        max_depth = max(np.nanmax(depth) for depth in depths.values())
+
+        with self.decimator.hold():
+            self.depth_ax.set_ylim(max_depth, min_depth)
+            # Every track draws the shared depth ticks, so they are kept sparse
+            self.depth_ax.set_yticks(depth_ticks(min_depth, max_depth, max_ticks=MAX_DEPTH_TICKS))
+
+        for (spec, ax, position, line), well in zip(self.curves, self.track_wells):
+            df = frames[well]
+            values = df[spec['values']] if isinstance(spec['values'], str) else spec['values'](df, params)
+            self.decimator.set_line_data(line, values, depths[well])
+        return self.fig
@@ -0,0 +1,221 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+from DepthIndex import DepthIndex
+from Profiling import stage
+
+STORE_DIR = '.well_store'
+
+
+def file_sha256(path, block_size=1024**2):
+    """SHA-256 of a file, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class WellStore:
+    """
+    Columnar on-disk copy of an Excel sheet, partitioned by well.
+
+    The sheet is parsed once and every column of every well is written to its own .npy file,
+    which is memory-mapped on load, so reading a well only touches the columns asked for and
+    does not copy them. The store is rebuilt when the source file changes: a changed mtime or
+    size triggers a SHA-256 comparison, and only a changed hash re-ingests the workbook.
+    One store can be shared by sessions and threads: refresh checks and ingests under a lock,
+    so a changed workbook is read and swapped in once.
+    """
+
+    def __init__(self, source_path, sheet_name=0, partition_column='Well_Name', store_dir=STORE_DIR):
+        self.source_path = source_path
+        self.sheet_name = sheet_name
+        self.partition_column = partition_column
+        stem = os.path.splitext(os.path.basename(source_path))[0]
+        suffix = f'_{sheet_name}' if isinstance(sheet_name, str) else ''
+        self.path = os.path.join(store_dir, stem + suffix)
+        self.manifest = None
+        self._depth_indexes = {}
+        self._lock = threading.Lock()
+
+    @property
+    def fingerprint(self):
+        """SHA-256 of the ingested source file, usable as a cache key for its data."""
+        return self.refresh()['sha256']
+
+    def wells(self):
+        """Names of the partitions in source order."""
+        return list(self.refresh()['partitions'])
+
+    def columns(self):
+        return list(self.refresh()['columns'])
+
+    def refresh(self):
+        """
+        Make sure the store matches the source file, ingesting it if needed.
+
+        Returns:
+        - dict: The store manifest.
+        """
+        with self._lock:
+            stat = os.stat(self.source_path)
+            if self.manifest is None:
+                self.manifest = self._read_manifest()
+            manifest = self.manifest
+            if manifest is not None and (manifest['mtime_ns'], manifest['size']) == (stat.st_mtime_ns, stat.st_size):
+                return manifest
+
+            sha256 = file_sha256(self.source_path)
+            if manifest is not None and manifest['sha256'] == sha256:
+                # Touched but unchanged, e.g. re-saved or copied: keep the data, remember the new stat
+                manifest.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+                self._write_manifest(self.path, manifest)
+                return manifest
+
+            self.manifest = self.ingest(stat, sha256)
+            return self.manifest
+
+    def ingest(self, stat=None, sha256=None):
+        """
+        Parse the source sheet and write it to the store, replacing any previous copy.
+
+        Returns:
+        - dict: The new store manifest.
+        """
+        stat = stat or os.stat(self.source_path)
+        sha256 = sha256 or file_sha256(self.source_path)
+        with stage('read_excel'):
+            df = pd.read_excel(self.source_path, sheet_name=self.sheet_name)
+
+        if self.partition_column in df.columns:
+            groups = df.groupby(self.partition_column, sort=False)
+        else:
+            groups = [(None, df)]
+
+        parent = os.path.dirname(self.path) or '.'
+        os.makedirs(parent, exist_ok=True)
+        staging = tempfile.mkdtemp(dir=parent, prefix='.ingest-')
+        os.chmod(staging, 0o755)
+        partitions = {}
+        for i, (name, part) in enumerate(groups):
+            folder = f'part_{i:04d}'
+            os.makedirs(os.path.join(staging, folder))
+            for column in df.columns:
+                if column == self.partition_column:
+                    continue
+                values = part[column].to_numpy()
+                np.save(os.path.join(staging, folder, f'{df.columns.get_loc(column)}.npy'), values,
+                        allow_pickle=values.dtype == object)
+            partitions[str(name)] = {'folder': folder, 'rows': len(part), 'value': name}
+
+        manifest = {
+            'source': os.path.abspath(self.source_path),
+            'sheet_name': self.sheet_name,
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'sha256': sha256,
+            'partition_column': self.partition_column if self.partition_column in df.columns else None,
+            'columns': [str(column) for column in df.columns],
+            'partitions': partitions,
+        }
+        self._write_manifest(staging, manifest)
+
+        # Swap the new store in place of the old one
+        if os.path.exists(self.path):
+            retired = tempfile.mkdtemp(dir=parent, prefix='.retired-')
+            os.replace(self.path, os.path.join(retired, 'store'))
+            os.replace(staging, self.path)
+            shutil.rmtree(retired, ignore_errors=True)
+        else:
+            os.replace(staging, self.path)
+        return manifest
+
+    def load_well(self, well=None, columns=None):
+        """
+        Load one partition as a DataFrame backed by read-only memory maps.
+
+        Parameters:
+        - well (str): Partition value, e.g. a Well_Name; None loads an unpartitioned sheet
+        - columns (list): Columns to load, all columns by default
+
+        Returns:
+        - pd.DataFrame: The well's rows with the requested columns.
+        """
+        manifest = self.refresh()
+        partition = manifest['partitions'][str(well)]
+        columns = manifest['columns'] if columns is None else list(columns)
+        folder = os.path.join(self.path, partition['folder'])
+
+        data = {}
+        for column in columns:
+            if column == manifest['partition_column']:
+                data[column] = pd.Categorical.from_codes(np.zeros(partition['rows'], dtype=np.int8),
+                                                         [partition['value']])
+                continue
+            path = os.path.join(folder, f"{manifest['columns'].index(column)}.npy")
+            try:
+                data[column] = np.asarray(np.load(path, mmap_mode='r'))
+            except ValueError:
+                # Object columns cannot be memory-mapped
+                data[column] = np.load(path, allow_pickle=True)
+        return pd.DataFrame(data, copy=False)
+
+    def depth_index(self, well=None, column='DEPTH'):
+        """
+        Sorted depth index of one partition, built once per ingested version of the source.
+
+        Returns:
+        - DepthIndex: Index aligned with the rows of load_well(well).
+        """
+        key = (self.fingerprint, str(well), column)
+        index = self._depth_indexes.get(key)
+        if index is None:
+            self._depth_indexes = {k: v for k, v in self._depth_indexes.items() if k[0] == key[0]}
+            index = self._depth_indexes[key] = DepthIndex(self.load_well(well, columns=[column])[column])
+        return index
+
+    def load_all(self, columns=None):
+        """Load every partition and concatenate them in source order."""
+        frames = [self.load_well(well, columns) for well in self.wells()]
+        return pd.concat(frames, ignore_index=True)
+
+    def _read_manifest(self):
+        try:
+            with open(os.path.join(self.path, 'manifest.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_manifest(path, manifest):
+        tmp = os.path.join(path, 'manifest.json.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(manifest, f, indent=2, default=str)
+        os.replace(tmp, os.path.join(path, 'manifest.json'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert an Excel sheet into the columnar well store.')
+    parser.add_argument('source', help='Excel workbook, e.g. Work_data.xlsx')
+    parser.add_argument('--sheet', default=0, help='Sheet name (defaults to the first sheet)')
+    parser.add_argument('--partition-column', default='Well_Name')
+    parser.add_argument('--store-dir', default=STORE_DIR)
+    args = parser.parse_args()
+
+    store = WellStore(args.source, sheet_name=args.sheet, partition_column=args.partition_column,
+                      store_dir=args.store_dir)
+    manifest = store.refresh()
+    print(f"{args.source}: {len(manifest['partitions'])} partition(s), {len(manifest['columns'])} columns -> {store.path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,244 @@
+import numpy as np
+import pandas as pd
+
+from DepthIndex import DepthIndex
+
+# Net reservoir: Vsh at most vsh_cutoff and porosity at least phi_cutoff; pay: net with Sw at most sw_cutoff
+DEFAULT_ZONE_PARAMETERS = dict(vsh_curve='Vsh_gamma_ray', vsh_cutoff=0.4, phi_cutoff=0.08, sw_cutoff=0.6,
+                               change_sigma=4.0, min_thickness=5.0)
+
+# Sample and zone classes
+NON_RESERVOIR, RESERVOIR, PAY = 0, 1, 2
+ZONE_CLASSES = ('non-reservoir', 'reservoir', 'pay')
+
+# Rows of the cumulative sums of IntervalSummary: thickness-weighted sums per sample
+_GROSS, _NET, _PAY, _PHI_H, _SW_WEIGHT, _SW_PHI_H, _BVW_WEIGHT, _BVW_H = range(8)
+
+# MAD of normally distributed values times this factor estimates their standard deviation
+MAD_TO_SIGMA = 1.4826
+
+# Null value of the workbooks and LAS files
+NULL_VALUE = -999.25
+
+
+def sample_thickness(depth):
+    """
+    Thickness every sample stands for: from halfway to the sample above to halfway to the sample below.
+
+    The first and last samples end at their own depth, so the thicknesses of a well add up to
+    its base minus its top and those of adjacent intervals add up to the combined interval.
+    """
+    edges = np.empty(len(depth) + 1)
+    if len(depth):
+        edges[0], edges[-1] = depth[0], depth[-1]
+        edges[1:-1] = (depth[1:] + depth[:-1]) / 2
+    return np.diff(edges)
+
+
+def valid_porosity(phi):
+    """
+    Porosity with missing samples as NaN.
+
+    Null values (NULL_VALUE) and porosities outside 0-1 are missing: null PHIN and PHID give
+    a phi_avg_calc of 999.25, which would otherwise pass any porosity cutoff.
+    """
+    phi = np.asarray(phi, dtype=float)
+    with np.errstate(invalid='ignore'):
+        return np.where((phi == NULL_VALUE) | (phi < 0) | (phi > 1), np.nan, phi)
+
+
+def classify_samples(vsh, phi, sw, vsh_cutoff, phi_cutoff, sw_cutoff):
+    """
+    Class of every sample: NON_RESERVOIR, RESERVOIR or PAY (np.int8).
+
+    Samples with a missing Vsh or porosity (see valid_porosity) are non-reservoir; net samples
+    with a missing Sw are reservoir.
+    """
+    net = (vsh <= vsh_cutoff) & (valid_porosity(phi) >= phi_cutoff)
+    return net.astype(np.int8) + (net & (sw <= sw_cutoff))
+
+
+def bvw_change_points(delta_bvw, change_sigma=4.0):
+    """
+    Samples where BVW steps, flagged as change points.
+
+    A step is a delta_Bvw larger in magnitude than change_sigma robust standard deviations
+    (MAD_TO_SIGMA times the median absolute deviation) of the well's delta_Bvw. The median
+    is found by selection, so the whole test is O(n).
+
+    Parameters:
+    - delta_bvw (np.ndarray): delta_Bvw of process_well_data_optimized
+    - change_sigma (float): Threshold in robust standard deviations
+
+    Returns:
+    - np.ndarray: Boolean mask of change points.
+    """
+    finite = delta_bvw[np.isfinite(delta_bvw)]
+    if not len(finite):
+        return np.zeros(len(delta_bvw), dtype=bool)
+    center = np.median(finite)
+    threshold = change_sigma * MAD_TO_SIGMA * np.median(np.abs(finite - center))
+    if not threshold > 0:
+        # Constant BVW: no steps to find
+        return np.zeros(len(delta_bvw), dtype=bool)
+    with np.errstate(invalid='ignore'):
+        return np.abs(delta_bvw - center) > threshold
+
+
+def segment(depth, classes, change, min_thickness):
+    """
+    Start rows of the zones of a well.
+
+    Candidate boundaries are the rows where the sample class changes or, between two net
+    reservoir samples, BVW steps (BVW of shale is not meaningful). One pass over them keeps
+    a boundary only if the zone it closes is at least min_thickness thick, so thin beds and
+    isolated spikes are absorbed into the zone above; a thin last zone is absorbed the same way.
+
+    Parameters:
+    - depth (np.ndarray): Ascending depth
+    - classes (np.ndarray): Sample classes of classify_samples
+    - change (np.ndarray): Boolean change points of bvw_change_points
+    - min_thickness (float): Minimum zone thickness in depth units
+
+    Returns:
+    - np.ndarray: Start row of every zone, beginning with 0 (empty for an empty well).
+    """
+    if not len(depth):
+        return np.empty(0, dtype=np.int64)
+    net = classes >= RESERVOIR
+    candidates = np.flatnonzero((classes[1:] != classes[:-1]) | (change[1:] & net[1:] & net[:-1])) + 1
+    starts = [0]
+    top = depth[0]
+    depths = depth[candidates].tolist()
+    for row, boundary in zip(candidates.tolist(), depths):
+        if boundary - top >= min_thickness:
+            starts.append(row)
+            top = boundary
+    if len(starts) > 1 and depth[-1] - top < min_thickness:
+        starts.pop()
+    return np.asarray(starts, dtype=np.int64)
+
+
+class IntervalSummary:
+    """
+    Cumulative sums of a processed well that summarize any depth interval in O(1).
+
+    Samples are classified with the cutoffs once; the thickness-weighted gross, net and pay
+    thickness and the net sums of porosity, pore-volume-weighted Sw and BVW are stored as
+    prefix sums in depth order. An interval's totals are then the difference of two prefix
+    entries: O(1) for row bounds, plus an O(log n) binary search for depth bounds.
+
+    Averages are over net reservoir: porosity and BVW are thickness-weighted and Sw is
+    weighted by porosity times thickness (pore volume). Samples with missing porosity (NaN or
+    nulls, see valid_porosity) are never net; missing Sw or BVW values are left out of their
+    average.
+
+    Parameters:
+    - df (pd.DataFrame): One well processed by process_well_data_optimized
+    - vsh_curve (str): Shale volume curve the Vsh cutoff applies to
+    - vsh_cutoff, phi_cutoff, sw_cutoff (float): Net reservoir and pay cutoffs
+    """
+
+    def __init__(self, df, vsh_curve='Vsh_gamma_ray', vsh_cutoff=0.4, phi_cutoff=0.08, sw_cutoff=0.6):
+        self.index = DepthIndex(df['DEPTH'].to_numpy())
+        self.depth = self.index.depth
+
+        def curve(column):
+            return self.index.take(df[column].to_numpy(dtype=float))
+
+        phi, sw, bvw = valid_porosity(curve('phi_avg_calc')), curve('Sw'), curve('Bvw')
+        with np.errstate(invalid='ignore'):
+            self.classes = classify_samples(curve(vsh_curve), phi, sw, vsh_cutoff, phi_cutoff, sw_cutoff)
+
+        thickness = sample_thickness(self.depth)
+        net = thickness * (self.classes >= RESERVOIR)
+        net_phi = net * np.nan_to_num(phi)
+        has_sw, has_bvw = np.isfinite(sw), np.isfinite(bvw)
+        weights = [thickness, net, thickness * (self.classes == PAY), net_phi, net_phi * has_sw,
+                   net_phi * np.where(has_sw, sw, 0), net * has_bvw, net * np.where(has_bvw, bvw, 0)]
+        self._sums = np.zeros((len(weights), len(self.depth) + 1))
+        for row, values in enumerate(weights):
+            np.cumsum(values, out=self._sums[row, 1:])
+
+    def totals(self, start, stop):
+        """Summary of rows start:stop in depth order; start and stop may be arrays of zones."""
+        sums = self._sums[:, stop] - self._sums[:, start]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return {
+                'Gross': sums[_GROSS],
+                'Net': sums[_NET],
+                'Pay': sums[_PAY],
+                'Net_to_Gross': sums[_NET] / sums[_GROSS],
+                'Phi_avg': sums[_PHI_H] / sums[_NET],
+                'Sw_avg': sums[_SW_PHI_H] / sums[_SW_WEIGHT],
+                'Bvw_avg': sums[_BVW_H] / sums[_BVW_WEIGHT],
+            }
+
+    def interval(self, top=None, base=None):
+        """
+        Summary of the samples with top <= depth <= base.
+
+        Returns:
+        - dict: Gross, Net and Pay thickness, Net_to_Gross and the net averages Phi_avg,
+          Sw_avg and Bvw_avg (NaN without net reservoir).
+        """
+        start, stop = self.index.bounds(top, base)
+        return {name: float(value) for name, value in self.totals(start, stop).items()}
+
+    def zones(self, starts):
+        """
+        Summary table of the zones starting at rows starts (see segment).
+
+        Returns:
+        - pd.DataFrame: Zone number, Top and Base depth (first and last sample), Class and
+          the totals of every zone.
+        """
+        stops = np.append(starts[1:], len(self.depth)).astype(np.int64)
+        totals = self.totals(starts, stops)
+        # A zone is pay or reservoir when at least half of its thickness is
+        zone_class = np.where(totals['Pay'] >= totals['Gross'] / 2, PAY,
+                              np.where(totals['Net'] >= totals['Gross'] / 2, RESERVOIR, NON_RESERVOIR))
+        return pd.DataFrame({
+            'Zone': np.arange(1, len(starts) + 1),
+            'Top': self.depth[starts],
+            'Base': self.depth[stops - 1],
+            'Class': np.asarray(ZONE_CLASSES, dtype=object)[zone_class],
+            **totals,
+        })
+
+
+def zone_well(df, vsh_curve='Vsh_gamma_ray', vsh_cutoff=0.4, phi_cutoff=0.08, sw_cutoff=0.6, change_sigma=4.0,
+              min_thickness=5.0):
+    """
+    Split one processed well into zones and summarize every zone.
+
+    Zones are bounded where the sample class (non-reservoir, reservoir or pay from the Vsh,
+    porosity and Sw cutoffs) changes or BVW steps (see bvw_change_points), and are at least
+    min_thickness thick; neighbouring non-reservoir zones are joined. Everything is a constant
+    number of passes over the samples.
+
+    Parameters:
+    - df (pd.DataFrame): One well processed by process_well_data_optimized
+    - vsh_curve (str): Shale volume curve the Vsh cutoff applies to
+    - vsh_cutoff, phi_cutoff, sw_cutoff (float): Net reservoir and pay cutoffs
+    - change_sigma (float): BVW step threshold in robust standard deviations of delta_Bvw
+    - min_thickness (float): Minimum zone thickness in depth units
+
+    Returns:
+    - tuple: (IntervalSummary of the well for further depth intervals, zone table of IntervalSummary.zones)
+    """
+    summary = IntervalSummary(df, vsh_curve, vsh_cutoff, phi_cutoff, sw_cutoff)
+    change = bvw_change_points(summary.index.take(df['delta_Bvw'].to_numpy(dtype=float)), change_sigma)
+    starts = segment(summary.depth, summary.classes, change, min_thickness)
+    zones = summary.zones(starts)
+    # Absorbed thin beds can leave neighbouring non-reservoir zones, which BVW steps never separate; join them
+    shale = (zones['Class'] == ZONE_CLASSES[NON_RESERVOIR]).to_numpy()
+    joined = shale[1:] & shale[:-1]
+    if joined.any():
+        zones = summary.zones(starts[np.concatenate([[True], ~joined])])
+    return summary, zones
+
+
+def zone_tops(zones):
+    """Depths of the boundaries between zones (the tops of every zone but the first), for the plotters."""
+    return tuple(float(top) for top in zones['Top'].iloc[1:])
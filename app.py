@@ -1,25 +1,202 @@
+import io
+import os
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import ExitStack
+
 import streamlit as st
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-from sklearn.cluster import KMeans
 
-from WellLogPlotter import WellLogPlotter  # Assuming the class is in a file named WellLogPlotter.py
-from Calculations import process_well_data_optimized
-from SecondWellLogPlotter import SecondWellLogPlotter
+from BackgroundTasks import TaskRunner
+from DataExport import EXPORT_MIME, export_frame, table_page
+from Profiling import StageTimer, profile_to, stage
+from TrackLayouts import COMPARISON_TRACKS, SECOND_WELL_LOG_LAYOUT, WELL_LOG_LAYOUT
+
+# Only Streamlit and light modules that do not import NumPy are imported up front. The
+# sidebar is drawn first; NumPy/pandas, the workbooks, matplotlib and scikit-learn are loaded
+# afterwards, on first use, by the st.cache_resource loaders below, so they are imported and
+# parsed once per server process and shared by every session.
 
 # Load data
 file_path = 'Work_data.xlsx'  # Use the actual path to your file
-df = pd.read_excel(file_path, sheet_name='All_Wells')
-inputs_df= pd.read_excel('Raster_logs_data.xlsx')
 
-# Sidebar: Well Selection
-st.sidebar.header("Well Selection")
-well_names = df['Well_Name'].unique()
-selected_well = st.sidebar.selectbox('Select Well Name', well_names)
+# Live view figures are rasterized on every refresh, at a lower resolution than the other plots
+LIVE_DPI = 80
+
+# Height in pixels of the interactive track viewers
+VIEWER_HEIGHT = 1000
+
+
+@st.cache_resource(show_spinner='Loading calculation modules...')
+def calculation_modules():
+    # NumPy, pandas and the processing modules
+    import numpy as np
+    import pandas as pd
+    from Uncertainty import monte_carlo_realizations, uncertainty_envelope
+    from Pickett import DEFAULT_PICKETT_PARAMETERS
+    from Zonation import DEFAULT_ZONE_PARAMETERS, zone_tops, zone_well
+    return (np, pd, monte_carlo_realizations, uncertainty_envelope, DEFAULT_ZONE_PARAMETERS, zone_tops, zone_well,
+            DEFAULT_PICKETT_PARAMETERS)
+
+
+@st.cache_resource(show_spinner='Loading plotting modules...')
+def plotting_modules():
+    # matplotlib, the plotters and the comparison view
+    from SecondWellLogPlotter import SecondWellLogPlotter
+    from TrackRenderer import FigureCache, track_images_html
+    from WellComparison import COMPARISON_DPI, ComparisonFigure, comparison_layout, process_wells
+    from WellLogPlotter import WellLogPlotter
+    return (WellLogPlotter, SecondWellLogPlotter, FigureCache, track_images_html, COMPARISON_DPI,
+            ComparisonFigure, comparison_layout, process_wells)
+
+
+@st.cache_resource(show_spinner='Loading well data...')
+def get_well_stores():
+    # Columnar copies of the workbooks, re-ingested only when a workbook changes
+    from WellStore import WellStore
+    return WellStore(file_path, sheet_name='All_Wells'), WellStore('Raster_logs_data.xlsx')
+
+
+@st.cache_resource(show_spinner='Loading plotting modules...')
+def task_functions():
+    # Background tasks of the single well view (they import matplotlib)
+    from DashboardTasks import (bvw_scatter_png, pickett_analysis, plotter_track_images, process_view,
+                                saturation_track_images, viewer_overview)
+    return (process_view, plotter_track_images, saturation_track_images, bvw_scatter_png, viewer_overview,
+            pickett_analysis)
+
+
+@st.cache_resource
+def get_track_viewer():
+    # Custom component drawing the tracks in the browser, declared once per server process
+    import streamlit.components.v1 as components
+    from TrackViewer import VIEWER_DIR
+    return components.declare_component('track_viewer', path=VIEWER_DIR)
+
+
+@st.cache_resource(show_spinner='Loading live well modules...')
+def live_modules():
+    # Tail reader and append-only processing of wells being drilled
+    from LiveWell import LasTail, LiveWell
+    return LasTail, LiveWell
+
+
+@st.cache_resource
+def get_curve_cache(compact=False):
+    # One curve cache per server process and precision, shared by every rerun
+    import numpy as np
+    from CurveCache import CurveCache
+    return CurveCache(dtype=np.float32 if compact else np.float64)
+
 
-# Filter data based on selected well
-filtered_df = df[df['Well_Name'] == selected_well]
+@st.cache_resource
+def get_clusterer():
+    # Fitted BVW crossplot clusters, shared by every rerun; scikit-learn is imported on the first fit
+    from Clustering import BvwClusterer
+    return BvwClusterer()
+
+
+@st.cache_resource
+def get_track_image_cache():
+    # Rendered track images by content hash, shared by every session and kept on disk across restarts
+    from TrackRenderer import TrackImageCache
+    return TrackImageCache(directory='.track_images')
+
+
+@st.cache_resource
+def get_result_cache():
+    # Section results by task name and key, shared by every session; concurrent identical
+    # requests of several sessions are computed once
+    from SharedCache import SingleFlightCache
+    return SingleFlightCache(max_bytes=512 * 1024**2)
+
+
+@st.cache_resource
+def get_executor():
+    # Worker threads for the background sections of every session
+    return ThreadPoolExecutor(max_workers=8, thread_name_prefix='dashboard')
+
+
+# Debug options are read from session state, where their widgets (at the bottom of the sidebar)
+# store them before the rerun starts, so the whole rerun is timed and profiled
+# A rerun that Streamlit stopped for a newer one (a widget changed) never reached
+# show_debug_panel; stop its timer and profiler before starting this run's
+leftover_stack = st.session_state.pop('debug_stack', None)
+if leftover_stack is not None:
+    try:
+        leftover_stack.close()
+    except ValueError:
+        # Entered in another thread's context (a session restarted on a new script thread)
+        pass
+debug_stack = ExitStack()
+st.session_state['debug_stack'] = debug_stack
+stage_timer = StageTimer(trace_memory=st.session_state.get('debug_memory', False))
+if st.session_state.get('debug_timings', False):
+    debug_stack.enter_context(stage_timer.activate())
+if st.session_state.get('debug_profile', False):
+    os.makedirs('.profiles', exist_ok=True)
+    debug_stack.enter_context(profile_to(os.path.join('.profiles', f'rerun-{time.strftime("%Y%m%d-%H%M%S")}.prof')))
+
+
+def show_debug_panel():
+    # Stop this rerun's timer and profiler and show the stage timings
+    debug_stack.close()
+    st.session_state.pop('debug_stack', None)
+    if stage_timer.records:
+        with st.expander('Pipeline timings', expanded=True):
+            st.dataframe(pd.DataFrame.from_dict(stage_timer.totals(), orient='index'))
+            stats = get_result_cache().stats()
+            st.caption(f"Shared results: {stats['hits']:,} hits, {stats['misses']:,} misses, "
+                       f"{stats['waits']:,} waits on other sessions, {stats['evictions']:,} evictions, "
+                       f"{stats['entries']:,} entries ({stats['nbytes'] / 1024**2:,.1f} MB)")
+            st.download_button('Download timings (JSON)', stage_timer.to_json(indent=2), file_name='timings.json')
+
+
+def show_processed_table(container, processed_df, depth_window, well):
+    # Only the current page of the selected columns is sent to the browser; the export writes
+    # the same rows and columns to a file chunk by chunk
+    with container.container():
+        columns = st.multiselect('Columns', list(processed_df.columns), default=list(processed_df.columns),
+                                 key='table_columns')
+        top_col, base_col, size_col, page_col = st.columns(4)
+        table_top = top_col.number_input('Table top depth', value=None, step=1, format="%d", key='table_top')
+        table_base = base_col.number_input('Table base depth', value=None, step=1, format="%d", key='table_base')
+        page_size = size_col.selectbox('Rows per page', [50, 100, 500, 1000], index=1, key='table_page_size')
+        # Rows are sliced out of the viewport by binary search on depth
+        table_df = depth_window.view(processed_df, table_top, table_base)
+        # The widget is kept identical across reruns (a changing label or maximum would reset it);
+        # table_page clamps the page to the rows in the window
+        page = page_col.number_input('Page', min_value=1, value=1, step=1, key='table_page')
+        if not columns:
+            st.caption('Select at least one column.')
+            return
+        rows, first, n_pages = table_page(table_df, page, page_size, columns)
+        st.dataframe(rows, hide_index=True)
+        st.caption(f'Page {first // page_size + 1:,} of {n_pages:,}: rows {first + 1 if len(rows) else 0:,}-'
+                   f'{first + len(rows):,} of {len(table_df):,}')
+
+        format_col, export_col = st.columns(2)
+        fmt = format_col.radio('Export format', ['csv', 'parquet'], horizontal=True, key='export_format')
+        if export_col.button(f'Export {len(table_df):,} rows'):
+            # Written to a temporary file in chunks instead of building the whole file in memory;
+            # Streamlit reads the finished file once to serve the download
+            handle, path = tempfile.mkstemp(suffix=f'.{fmt}')
+            os.close(handle)
+            try:
+                with stage('export'):
+                    export_frame(table_df, path, fmt, columns)
+                with open(path, 'rb') as f:
+                    export_col.download_button(f'Download {fmt.upper()}', f, file_name=f'{well}_processed.{fmt}',
+                                               mime=EXPORT_MIME[fmt])
+            finally:
+                os.remove(path)
+
+
+st.title('Well Log Visualization')
+
+# Sidebar: Well Selection, filled in once the well names are loaded
+well_selection = st.sidebar.container()
+well_selection.header("Well Selection")
 
 # Sidebar: Mandatory Data Inputs
 st.sidebar.header("Mandatory Data")
@@ -30,16 +207,25 @@ shale_phi_n = st.sidebar.slider('Shale Neutron Porosity', min_value=0.0, max_val
 
 # Sidebar: Optional Data Inputs
 st.sidebar.header("Optional Data")
-rw = st.sidebar.number_input('Rw', value=0.05, format="%.2f")
+# Rw and m are keyed, with their defaults in session state, so the Pickett analysis can set them to its suggestion
+st.session_state.setdefault('rw', 0.05)
+st.session_state.setdefault('m', 2.0)
+rw = st.sidebar.number_input('Rw', format="%.4f", key='rw')
 temp_rw = st.sidebar.number_input('Temp Rw', value=78, format="%d")
 a = st.sidebar.slider('a', min_value=0.3, max_value=2.0, value=1.0, step=0.01)
-m = st.sidebar.slider('m', min_value=1.0, max_value=3.0, value=2.0, step=0.01)
+m = st.sidebar.slider('m', min_value=1.0, max_value=3.0, step=0.01, key='m')
 n = st.sidebar.slider('n', min_value=1.0, max_value=3.0, value=2.0, step=0.01)
 maximum_gr = st.sidebar.number_input('Maximum GR', value=150, format="%d")
 minimum_gr = st.sidebar.number_input('Minimum GR', value=15, format="%d")
 sp_shift = st.sidebar.slider('SP Shift', min_value=-100, max_value=100, value=0, step=1)
 rza = st.sidebar.number_input('Rza (Optional)', value=None, step=0.01, format="%.2f", key='rza_input') if st.sidebar.checkbox('Provide Rza') else None
 invasion = st.sidebar.selectbox('Invasion (Optional)', [None, 'very deep', 'deep', 'average', 'shallow', 'very shallow'], index=0)
+# Depth viewport applied to calculation, plotting and clustering
+st.sidebar.header("Depth Viewport")
+view_top = st.sidebar.number_input("Top depth", value=None, step=1, format="%d")
+view_base = st.sidebar.number_input("Base depth", value=None, step=1, format="%d")
+# Pan, zoom and read out the curves in the browser instead of showing rendered images
+interactive = st.sidebar.checkbox('Interactive plots')
 # Depth inputs for scatter plot
 st.sidebar.header("Depth Range for BVW Scatter Plot")
 depth_min = st.sidebar.number_input("Minimum depth for BVW Scatter plot", value=None, step=1, format="%d")
@@ -49,82 +235,365 @@ depth_max = st.sidebar.number_input("Maximum depth for BVW Scatter plot", value=
 st.sidebar.header("Clustering Options")
 n_clusters = st.sidebar.slider('Number of Clusters', min_value=1, max_value=6, value=3, step=1)
 
+# Sidebar: Zonation, filled in once its defaults are loaded
+zonation_options = st.sidebar.container()
+zonation_options.header("Zonation")
 
-# Main Area: Display Plot and Results
-st.title('Well Log Visualization')
-if not filtered_df.empty:
-    # Call process_well_data_optimized with user inputs
-    processed_df = process_well_data_optimized(
-        filtered_df,
-        inputs=inputs_df,
-        ssp=ssp,
-        sp_baseline=sp_baseline,
-        shale_phid=shale_phid,
-        shale_phi_n=shale_phi_n,
-        sp_shift=sp_shift,
-        Maximum_gr=maximum_gr,
-        Minimum_gr=minimum_gr,
-        rw=rw,
-        Temp_rw=temp_rw,
-        invasion=invasion,
-        rza=rza,
-        a=a,
-        m=m,
-        n=n
+# Sidebar: Pickett analysis, filled in once its defaults are loaded
+pickett_options = st.sidebar.container()
+pickett_options.header("Pickett Analysis")
+
+# Sidebar: Monte Carlo uncertainty of the Archie parameters
+st.sidebar.header("Uncertainty")
+show_uncertainty = st.sidebar.checkbox('Show P10-P90 envelope of Sw, BVW and MHI')
+if show_uncertainty:
+    n_realizations = st.sidebar.slider('Realizations', min_value=100, max_value=5000, value=1000, step=100)
+    a_range = st.sidebar.slider('a range', min_value=0.3, max_value=2.0, value=(0.8, 1.2), step=0.01)
+    m_range = st.sidebar.slider('m range', min_value=1.0, max_value=3.0, value=(1.8, 2.2), step=0.01)
+    n_range = st.sidebar.slider('n range', min_value=1.0, max_value=3.0, value=(1.8, 2.2), step=0.01)
+    rw_spread = st.sidebar.slider('Rw uncertainty (±%)', min_value=0, max_value=50, value=20, step=1)
+
+# Sidebar: Debug
+st.sidebar.header("Debug")
+st.sidebar.checkbox('Show pipeline timings', key='debug_timings')
+st.sidebar.checkbox('Trace memory per stage (slower)', key='debug_memory')
+st.sidebar.checkbox('Write a cProfile dump of every rerun to .profiles/', key='debug_profile')
+
+# The sidebar is on screen; load the modules and data it does not need
+with stage('load'):
+    (np, pd, monte_carlo_realizations, uncertainty_envelope, DEFAULT_ZONE_PARAMETERS, zone_tops, zone_well,
+     DEFAULT_PICKETT_PARAMETERS) = calculation_modules()
+    well_store, inputs_store = get_well_stores()
+    inputs_df = inputs_store.load_well()
+    well_names = well_store.wells()
+
+view_mode = well_selection.radio('View', ['Single well', 'Compare wells', 'Live'], horizontal=True)
+if view_mode == 'Live':
+    # A LAS file an acquisition system keeps appending to, e.g. `python LiveWell.py source.las live.las`
+    live_path = well_selection.text_input('LAS file being drilled', key='live_path')
+    live_wells = list(inputs_df['Well'].drop_duplicates())
+    live_well_name = well_selection.selectbox('Well constants of', live_wells)
+    live_span = well_selection.number_input('Trailing window (depth units)', min_value=10, value=500, step=50)
+    live_refresh = well_selection.number_input('Refresh every (s)', min_value=0.5, value=2.0, step=0.5)
+    # The live well is not in the store; the first stored well keeps the loading below valid
+    selected_well = well_names[0]
+elif view_mode == 'Compare wells':
+    compare_wells = well_selection.multiselect('Wells to compare', well_names, default=well_names[:3])
+    compare_tracks = well_selection.multiselect('Tracks', list(COMPARISON_TRACKS), default=list(COMPARISON_TRACKS))
+    flatten = well_selection.checkbox('Flatten on datum')
+    selected_well = compare_wells[0] if compare_wells else well_names[0]
+else:
+    selected_well = well_selection.selectbox('Select Well Name', well_names)
+# float32 curves: half the memory per cached well, within 1e-5 relative of float64
+compact = well_selection.checkbox('Compact float32 curves')
+
+# Zones from Vsh, porosity and Sw cutoffs and BVW steps, drawn on both plots
+show_zones = zonation_options.checkbox('Show zones')
+zone_params = None
+if show_zones:
+    vsh_curves = ['Vsh_gamma_ray', 'Vsh_sp', 'Vsh_porosity']
+    zone_params = dict(
+        vsh_curve=zonation_options.selectbox('Vsh curve', vsh_curves,
+                                             index=vsh_curves.index(DEFAULT_ZONE_PARAMETERS['vsh_curve'])),
+        vsh_cutoff=zonation_options.slider('Vsh cutoff', min_value=0.0, max_value=1.0,
+                                           value=DEFAULT_ZONE_PARAMETERS['vsh_cutoff'], step=0.01),
+        phi_cutoff=zonation_options.slider('Porosity cutoff', min_value=0.0, max_value=0.4,
+                                           value=DEFAULT_ZONE_PARAMETERS['phi_cutoff'], step=0.01),
+        sw_cutoff=zonation_options.slider('Sw cutoff', min_value=0.0, max_value=1.0,
+                                          value=DEFAULT_ZONE_PARAMETERS['sw_cutoff'], step=0.01),
+        change_sigma=zonation_options.slider('BVW step threshold (robust sigma)', min_value=1.0, max_value=10.0,
+                                             value=DEFAULT_ZONE_PARAMETERS['change_sigma'], step=0.5),
+        min_thickness=zonation_options.number_input('Minimum zone thickness', min_value=0.0,
+                                                    value=DEFAULT_ZONE_PARAMETERS['min_thickness'], step=1.0),
     )
-    # Create and plot data using WellLogPlotter
-    plotter = WellLogPlotter(processed_df, sp_shift=sp_shift)
-    plotter.plot_all()
-    st.pyplot(plotter.fig, use_container_width=False)
-    # Create and plot data using WellLogPlotter
-
-    plotter = SecondWellLogPlotter(processed_df,sp_shift)
-    plotter.plot_all()
-    st.pyplot(plotter.fig, use_container_width=False)
-    # Display results below the plot
-    st.subheader('Processed Data Results')
-    st.dataframe(processed_df)
 
-    # Scatter Plot with Clustering
+# Water line fits of log(Rt) against log(phi) over sliding depth windows, suggesting Rw and m
+show_pickett = pickett_options.checkbox('Suggest Rw and m from a Pickett plot')
+pickett_params = None
+if show_pickett:
+    pickett_params = dict(
+        DEFAULT_PICKETT_PARAMETERS,
+        window=pickett_options.number_input('Window length (depth units)', min_value=5.0,
+                                            value=DEFAULT_PICKETT_PARAMETERS['window'], step=5.0),
+        min_r2=pickett_options.slider('Minimum R²', min_value=0.0, max_value=1.0,
+                                      value=DEFAULT_PICKETT_PARAMETERS['min_r2'], step=0.01),
+    )
+
+# Load only the selected well from the store, with its sorted depth index
+with stage('load'):
+    filtered_df = well_store.load_well(selected_well)
+    depth_index = well_store.depth_index(selected_well)
+
+with stage('load'):
+    (WellLogPlotter, SecondWellLogPlotter, FigureCache, track_images_html, COMPARISON_DPI, ComparisonFigure,
+     comparison_layout, process_wells) = plotting_modules()
+    (process_view, plotter_track_images, saturation_track_images, bvw_scatter_png, viewer_overview,
+     pickett_analysis) = task_functions()
+
+
+# Main Area: Display Plot and Results
+# Figure skeletons are built once per session and only get new data on reruns
+figure_cache = st.session_state.setdefault('figure_cache', FigureCache())
+# Background tasks of this session; tasks of earlier reruns that have not started are dropped, and
+# results are shared with every other session through the result cache
+task_runner = st.session_state.setdefault('task_runner', TaskRunner(get_executor(), get_result_cache()))
+task_runner.start_run()
+
+params = dict(
+    ssp=ssp,
+    sp_baseline=sp_baseline,
+    shale_phid=shale_phid,
+    shale_phi_n=shale_phi_n,
+    sp_shift=sp_shift,
+    Maximum_gr=maximum_gr,
+    Minimum_gr=minimum_gr,
+    rw=rw,
+    Temp_rw=temp_rw,
+    invasion=invasion,
+    rza=rza,
+    a=a,
+    m=m,
+    n=n
+)
+
+if view_mode == 'Live':
+    LasTail, LiveWell = live_modules()
+    live_key = (os.path.abspath(live_path), live_well_name) if live_path else None
+    if live_key is not None and st.session_state.get('live_key') != live_key:
+        try:
+            st.session_state['live_tail'] = LasTail(live_path)
+        except (OSError, ValueError) as exc:
+            live_key = None
+            st.write(f'Cannot read {live_path}: {exc}')
+        else:
+            st.session_state['live_well'] = LiveWell(live_well_name, inputs_df, **params)
+            st.session_state['live_key'] = live_key
+    if live_key is None:
+        if not live_path:
+            st.write('Enter the path of a LAS file that is being written.')
+        show_debug_panel()
+        st.stop()
+    live_well, live_tail = st.session_state['live_well'], st.session_state['live_tail']
+    # New parameters reprocess the stored samples once; every refresh after that only processes new samples
+    with stage('process'):
+        live_well.set_parameters(**params)
+
+    @st.fragment(run_every=live_refresh)
+    def show_live_well():
+        # Only this fragment reruns on every refresh: read the new lines, process them, redraw the trailing window
+        with stage('load'):
+            new_rows = live_tail.read()
+        with stage('process'):
+            added = live_well.append(new_rows)
+        if not len(live_well):
+            st.caption('Waiting for data...')
+            return
+        window_df = live_well.frame(top=live_well.last_depth - live_span)
+        st.caption(f'{len(live_well):,} samples down to {live_well.last_depth:,.1f}, {added:,} new')
+        for plotter_class in (WellLogPlotter, SecondWellLogPlotter):
+            plotter = plotter_class(window_df, sp_shift=sp_shift, figure_cache=figure_cache)
+            with stage('render'):
+                plotter.plot_tail(live_span)
+            with stage('rasterize'):
+                # Without st.pyplot's tight bounding box, which draws the figure twice
+                png = io.BytesIO()
+                plotter.fig.savefig(png, format='png', dpi=LIVE_DPI)
+                st.image(png.getvalue(), use_container_width=True)
+        st.dataframe(window_df.iloc[::-1].head(20), hide_index=True)
+
+    show_live_well()
+    show_debug_panel()
+    st.stop()
+
+if view_mode == 'Compare wells':
+    if not compare_wells or not compare_tracks:
+        st.write('Select at least one well and one track to compare.')
+        show_debug_panel()
+        st.stop()
+    datums = None
+    if flatten:
+        # Datum depth per well, the top of each well by default; depths are shown relative to it
+        datum_df = st.sidebar.data_editor(
+            pd.DataFrame({'Well': compare_wells, 'Datum': [well_store.depth_index(w).top for w in compare_wells]}),
+            disabled=['Well'], hide_index=True)
+        datums = dict(zip(datum_df['Well'], datum_df['Datum']))
+
+    # Wells are loaded and processed concurrently and cached one by one
+    with stage('process'):
+        frames = process_wells(
+            well_store.load_well, compare_wells, inputs_df, get_curve_cache(compact),
+            well_key=lambda well: (well_store.fingerprint, well),
+            ssp=ssp, sp_baseline=sp_baseline, shale_phid=shale_phid, shale_phi_n=shale_phi_n, sp_shift=sp_shift,
+            Maximum_gr=maximum_gr, Minimum_gr=minimum_gr, rw=rw, Temp_rw=temp_rw, invasion=invasion, rza=rza,
+            a=a, m=m, n=n
+        )
+    with stage('comparison_plot'):
+        comparison = figure_cache.get(comparison_layout(tuple(compare_wells), tuple(compare_tracks)), ComparisonFigure)
+        with stage('render'):
+            comparison.render(frames, datums)
+        with stage('rasterize'):
+            st.pyplot(comparison.fig, dpi=COMPARISON_DPI, use_container_width=False)
+    show_debug_panel()
+    st.stop()
+
+# Only the viewport's samples are sliced out (without copying), plus one sample above it so
+# delta_Bvw at the top of the viewport matches the full well
+view_start, view_stop = depth_index.bounds(view_top, view_base, lead=1)
+lead = depth_index.bounds(view_top, view_base)[0] - view_start
+view_df = depth_index.view(filtered_df, view_top, view_base, lead=1)
+if len(view_df) > lead:
+    well_key = (well_store.fingerprint, inputs_store.fingerprint, selected_well, view_start, view_stop)
+    process_key = (well_key, compact, tuple(params.items()))
+    image_cache = get_track_image_cache()
+
+    # Sections are laid out up front and filled in as their background tasks finish
+    status = st.empty()
+    logs_section = st.empty()
+    saturation_section = st.empty()
+    if show_zones:
+        st.subheader('Zones')
+        zones_section = st.empty()
+        zones_section.caption('Computing...')
+    st.subheader('Processed Data Results')
+    table_section = st.empty()
     st.subheader("BVW Scatter Plot")
-    fig, ax = plt.subplots(figsize=(10, 6))
-
-    # Plot lines y = k/x for k in 0.02, 0.04, ..., 0.14
-    x = np.linspace(0.01, 0.4, 100)  # Avoid division by zero
-    for k in np.arange(0.02, 0.16, 0.02):
-        ax.plot(x, k / x, label=f'y={k:.2f}/x')
-
-    # Filter scatter data by depth range
-    scatter_df = processed_df
-    if depth_min is not None:
-        scatter_df = scatter_df[scatter_df['DEPTH'] >= depth_min]
-    if depth_max is not None:
-        scatter_df = scatter_df[scatter_df['DEPTH'] <= depth_max]
-
-    # Scatter plot of phi_avg_calc vs Sw
-    phi_values = scatter_df['phi_avg_calc'].values.reshape(-1, 1)
-    sw_values = scatter_df['Sw'].values.reshape(-1, 1)
-    scatter_data = np.hstack((phi_values, sw_values))
-
-    # Apply KMeans clustering
-    kmeans = KMeans(n_clusters=n_clusters, random_state=0)
-    scatter_df['Cluster'] = kmeans.fit_predict(scatter_data)
-
-    # Plot scatter points with cluster colors
-    for cluster in range(n_clusters):
-        cluster_data = scatter_df[scatter_df['Cluster'] == cluster]
-        ax.scatter(cluster_data['phi_avg_calc'], cluster_data['Sw'], label=f'Cluster {cluster + 1}')
-
-    # Plot cluster centers
-    centers = kmeans.cluster_centers_
-    ax.scatter(centers[:, 0], centers[:, 1], c='black', s=200, marker='X', label='Centers')
-
-    ax.set_xlim(0, 0.4)
-    ax.set_ylim(0, 1)
-    ax.set_xlabel('Porosity (Phi)')
-    ax.set_ylabel('Water Saturation (Sw)')
-    ax.legend()
-    st.pyplot(fig)
-else:
+    scatter_section = st.empty()
+    if show_pickett:
+        st.subheader('Pickett Analysis')
+        pickett_section = st.empty()
+        pickett_section.caption('Computing...')
+    for section in (logs_section, saturation_section, table_section, scatter_section):
+        section.caption('Computing...')
+
+    # Future -> (section name, callback that draws its result); callbacks may submit more tasks
+    pending = {}
+
+    envelope, uncertainty_key = None, None
+    if show_uncertainty:
+        # All realizations are evaluated at once; only the P10/P50/P90 curves are kept
+        realizations = monte_carlo_realizations(
+            n_realizations,
+            a=('uniform', *a_range),
+            m=('uniform', *m_range),
+            n=('uniform', *n_range),
+            rw=('uniform', rw * (1 - rw_spread / 100), rw * (1 + rw_spread / 100)),
+            Temp_rw=temp_rw,
+            invasion=[invasion],
+            rza=[rza]
+        )
+        uncertainty_key = (well_key, n_realizations, a_range, m_range, n_range, rw, rw_spread, temp_rw, invasion, rza)
+        envelope = task_runner.submit('uncertainty', uncertainty_key, uncertainty_envelope, view_df.iloc[lead:],
+                                      inputs_df, realizations)
+
+    def show_zones_table(result):
+        summary, zones = result
+        with zones_section.container():
+            st.dataframe(zones, hide_index=True)
+            # Any interval is summarized from the zonation's cumulative sums in O(1)
+            viewport = summary.interval()
+            st.caption(f"Viewport: gross {viewport['Gross']:,.1f}, net {viewport['Net']:,.1f}, "
+                       f"pay {viewport['Pay']:,.1f}, net/gross {viewport['Net_to_Gross']:.2f}, "
+                       f"net porosity {viewport['Phi_avg']:.3f}, Sw {viewport['Sw_avg']:.3f}, "
+                       f"BVW {viewport['Bvw_avg']:.3f}")
+
+    def show_viewer(section, key, result):
+        viewer, (overview, overview_index) = result
+
+        @st.fragment
+        def track_viewer():
+            # When the browser zooms in beyond the overview it sets the component value to the depth
+            # window it needs; only this fragment reruns, encoding the window's samples
+            window = st.session_state.get(key)
+            detail, detail_index = viewer.detail(window['top'], window['base']) if window else (None, {})
+            get_track_viewer()(spec=viewer.spec, overview=overview, overview_index=overview_index, detail=detail,
+                               detail_index=detail_index,
+                               detail_window=[window['top'], window['base']] if window else None,
+                               height=VIEWER_HEIGHT, key=key, default=None)
+
+        with section.container():
+            track_viewer()
+
+    def apply_pickett(suggestion):
+        # Runs before the next rerun, so the keyed sidebar widgets are drawn with the suggestion
+        st.session_state['rw'] = suggestion['rw']
+        st.session_state['m'] = min(max(suggestion['m'], 1.0), 3.0)
+
+    def show_pickett_result(result):
+        suggestion, candidates, png = result
+        with pickett_section.container():
+            if suggestion is None:
+                st.caption(f"No window of {pickett_params['window']:g} depth units has a water line with "
+                           f"R² of at least {pickett_params['min_r2']:.2f}.")
+            else:
+                st.caption(f"Best water line {suggestion['top']:,.1f}-{suggestion['base']:,.1f}: "
+                           f"Rw {suggestion['rw']:.4f} at {temp_rw} (minimum Rwa {suggestion['rwa_rw']:.4f}), "
+                           f"m {suggestion['m']:.2f}, R² {suggestion['r2']:.3f} over {suggestion['samples']} samples")
+                st.button(f"Use Rw = {suggestion['rw']:.4f} and m = {suggestion['m']:.2f}", key='apply_pickett',
+                          on_click=apply_pickett, args=(suggestion,))
+            st.caption('Lowest minimum-Rwa depths (water zone candidates)')
+            st.dataframe(candidates, hide_index=True)
+            st.image(png, use_container_width=True)
+
+    def show_processed(processed_df):
+        show_processed_table(table_section, processed_df, depth_index.window(view_top, view_base), selected_well)
+        zones, zone_key = None, None
+        if show_zones:
+            zone_key = (process_key, tuple(zone_params.items()))
+            zones = task_runner.submit('zonation', zone_key, zone_well, processed_df, **zone_params)
+            pending[zones] = ('zones', show_zones_table)
+        if interactive:
+            # Only the decimated curves go to the browser, which draws them itself
+            logs = task_runner.submit('logs_viewer', (process_key, zone_key), viewer_overview, WELL_LOG_LAYOUT,
+                                      processed_df, None, sp_shift, zones)
+            pending[logs] = ('logs plot', lambda result: show_viewer(logs_section, 'logs_viewer', result))
+            saturation = task_runner.submit('saturation_viewer', (process_key, uncertainty_key, zone_key),
+                                            viewer_overview, SECOND_WELL_LOG_LAYOUT, processed_df, envelope,
+                                            sp_shift, zones)
+            pending[saturation] = ('saturation plot', lambda result: show_viewer(saturation_section,
+                                                                                 'saturation_viewer', result))
+        else:
+            # Only tracks whose data, parameters or layout changed are rasterized again
+            logs = task_runner.submit('logs_plot', (process_key, zone_key), plotter_track_images, WellLogPlotter,
+                                      processed_df, sp_shift, figure_cache, image_cache, zones)
+            pending[logs] = ('logs plot', lambda images: logs_section.markdown(track_images_html(images),
+                                                                               unsafe_allow_html=True))
+            saturation = task_runner.submit('saturation_plot', (process_key, uncertainty_key, zone_key),
+                                            saturation_track_images, SecondWellLogPlotter, processed_df, envelope,
+                                            sp_shift, figure_cache, image_cache, zones)
+            pending[saturation] = ('saturation plot', lambda images: saturation_section.markdown(
+                track_images_html(images), unsafe_allow_html=True))
+        # Slice the scatter depth range out of the viewport by binary search
+        scatter_df = depth_index.window(view_top, view_base).view(processed_df, depth_min, depth_max)
+        scatter_top = max((d for d in (view_top, depth_min) if d is not None), default=None)
+        scatter_base = min((d for d in (view_base, depth_max) if d is not None), default=None)
+        scatter = task_runner.submit('bvw_scatter', (process_key, n_clusters, scatter_top, scatter_base),
+                                     bvw_scatter_png, scatter_df, n_clusters, get_clusterer(),
+                                     (well_store.fingerprint, selected_well), (scatter_top, scatter_base))
+        pending[scatter] = ('BVW scatter plot', lambda png: scatter_section.image(png, use_container_width=True))
+        if show_pickett:
+            pickett = task_runner.submit('pickett', (process_key, tuple(pickett_params.items())), pickett_analysis,
+                                         processed_df, a, n, temp_rw, pickett_params)
+            pending[pickett] = ('Pickett analysis', show_pickett_result)
+
+    # Compute the derived curves with user inputs, reusing every cached curve whose parameters did not change
+    processing = task_runner.submit('process', process_key, process_view, get_curve_cache(compact), view_df,
+                                    inputs_df, well_key, lead, params)
+    pending[processing] = ('curves', show_processed)
+
+    started = time.perf_counter()
+    while pending:
+        done, _ = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+        for future in done:
+            name, show = pending.pop(future)
+            show(future.result())
+        if pending:
+            # Updating the page regularly also lets Streamlit stop this rerun as soon as a widget changes
+            status.caption(f"Computing {', '.join(name for name, _ in pending.values())}... "
+                           f"{time.perf_counter() - started:.1f} s")
+    status.empty()
+elif filtered_df.empty:
     st.write('No data available for the selected well.')
+else:
+    st.write('No data in the selected depth viewport.')
 
+show_debug_panel()
@@ -0,0 +1,110 @@
+"""
+Benchmark the vectorized process_well_data_optimized against the previous row-wise implementation.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_calculations
+    python -m benchmarks.bench_calculations --sizes 10000 1000000 10000000 --legacy-limit 10000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from Calculations import process_well_data_optimized, calculate_shale_volume
+from benchmarks.synthetic import synthetic_wells
+
+PARAMS = dict(ssp=-100, sp_baseline=0, shale_phid=0.2, shale_phi_n=0.3, sp_shift=0,
+              Maximum_gr=150, Minimum_gr=15, rw=0.05, Temp_rw=78, a=1, m=2, n=2)
+
+
+def process_well_data_rowwise(df_, inputs, ssp, sp_baseline, shale_phid, shale_phi_n,
+                              sp_shift=0, Maximum_gr=150, Minimum_gr=15, rw=0.05, Temp_rw=78, invasion=None, rza=None,
+                              a=1, m=2, n=2):
+    # Reference copy of the original row-wise implementation, kept only for comparison
+    def temp_grad(well):
+        well_data = inputs.loc[inputs['Well'] == well]
+        gradient = (well_data['T_max'].squeeze() - well_data['T_values'].squeeze()) * 100 / well_data['TVD'].squeeze()
+        surf_temp = well_data['T_values'].squeeze()
+        return gradient, surf_temp
+
+    temp_grad_dict = {well: temp_grad(well) for well in inputs['Well'].unique()}
+
+    def rmf_corr(well):
+        well_data = inputs.loc[inputs['Well'] == well]
+        return well_data['Rmf'].squeeze(), well_data['T_values'].squeeze()
+
+    rmf_corr_dict = {well: rmf_corr(well) for well in inputs['Well'].unique()}
+
+    df_['phi_avg_calc'] = np.sqrt((df_['PHIN']**2 + df_['PHID']**2) / 2)
+    df_['phi_avg_calc_filtered'] = df_['phi_avg_calc'].apply(lambda x: x if x >= 0 else np.nan)
+    df_['T'] = df_.apply(lambda row: temp_grad_dict[row['Well_Name']][0] * row['DEPTH'] / 100 +
+                         temp_grad_dict[row['Well_Name']][1], axis=1)
+    df_['Rmf_corrected'] = df_.apply(lambda row: rmf_corr_dict[row['Well_Name']][0] *
+                                     (rmf_corr_dict[row['Well_Name']][1] + 6.77) /
+                                     (row['T'] + 6.77), axis=1)
+    df_['Rw_corrected'] = df_.apply(lambda row: rw * (Temp_rw + 6.77) / (row['T'] + 6.77), axis=1)
+    df_['Rwa'] = df_['Deep_Resistivity'] * df_['phi_avg_calc']**m / a
+    df_['Sw'] = (df_['Rw_corrected'] * a / (df_['Deep_Resistivity'] * df_['phi_avg_calc_filtered']**m))**(1 / n)
+
+    if rza is not None:
+        df_['Sxo'] = df_.apply(lambda row: (a * rza /
+                                            (row['Shallow_Resistivity'] * row['phi_avg_calc_filtered']**m))**(1 / n),
+                               axis=1)
+    elif invasion is None:
+        df_['Sxo'] = df_.apply(lambda row: (a * row['Rmf_corrected'] /
+                                            (row['Shallow_Resistivity'] * row['phi_avg_calc_filtered']**m))**(1 / n),
+                               axis=1)
+    else:
+        inv_depths = {'very deep': 0.025, 'deep': 0.035, 'average': 0.05, 'shallow': 0.075, 'very shallow': 0.1}
+        z = inv_depths[invasion]
+        df_['Sxo'] = df_.apply(lambda row: (a * (1 / ((z / row['Rw_corrected']) + ((1 - z) / row['Rmf_corrected']))) /
+                                            (row['Shallow_Resistivity'] * row['phi_avg_calc_filtered']**m))**(1 / n),
+                               axis=1)
+
+    df_['MHI'] = df_['Sw'] / df_['Sxo']
+    df_['Bvw'] = df_['phi_avg_calc_filtered'] * df_['Sw']
+    df_['delta_Bvw'] = df_['Bvw'].diff().fillna(0)
+    return calculate_shale_volume(df_, Maximum_gr=Maximum_gr, Minimum_gr=Minimum_gr, ssp=ssp,
+                                  sp_baseline=sp_baseline, sp_shift=sp_shift,
+                                  shale_phid=shale_phid, shale_phi_n=shale_phi_n)
+
+
+def check_equivalence(n_samples=5000):
+    """Assert that both implementations agree for every Sxo branch."""
+    df, inputs = synthetic_wells(n_samples)
+    for extra in ({}, {'invasion': 'average'}, {'rza': 0.8}):
+        expected = process_well_data_rowwise(df.copy(), inputs, **PARAMS, **extra)
+        result = process_well_data_optimized(df.copy(), inputs, **PARAMS, **extra)
+        pd.testing.assert_frame_equal(result, expected, check_exact=False, rtol=1e-12)
+
+
+def time_call(func, df, inputs):
+    frame = df.copy()
+    start = time.perf_counter()
+    func(frame, inputs, **PARAMS)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument('--legacy-limit', type=int, default=1_000_000,
+                        help='Largest sample count the row-wise implementation is timed at')
+    args = parser.parse_args()
+
+    check_equivalence()
+    print(f"{'samples':>12} {'row-wise (s)':>14} {'vectorized (s)':>16} {'speedup':>9}")
+    for size in args.sizes:
+        df, inputs = synthetic_wells(size)
+        vectorized = time_call(process_well_data_optimized, df, inputs)
+        if size <= args.legacy_limit:
+            rowwise = time_call(process_well_data_rowwise, df, inputs)
+            print(f"{size:>12,} {rowwise:>14.3f} {vectorized:>16.3f} {rowwise / vectorized:>8.0f}x")
+        else:
+            print(f"{size:>12,} {'skipped':>14} {vectorized:>16.3f} {'-':>9}")
+
+
+if __name__ == '__main__':
+    main()
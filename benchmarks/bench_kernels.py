@@ -0,0 +1,114 @@
+"""
+Microbenchmark the fused petrophysics and shale volume kernels against per-curve NumPy expressions.
+
+Every kernel is timed (best of --repeat) and its peak temporary allocation is measured with
+tracemalloc, writing into a preallocated output buffer. The compiled column is Numba when it
+is installed and is skipped otherwise. Run from the repository root:
+
+    python -m benchmarks.bench_kernels
+    python -m benchmarks.bench_kernels --sizes 10000 1000000 10000000
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+import Calculations as calc
+from Kernels import (NUMBA_AVAILABLE, PETROPHYSICS_CURVES, SHALE_CURVES, SXO_INVASION, as_float_array,
+                     petrophysics_compiled, petrophysics_numpy, shale_volume_compiled, shale_volume_numpy)
+from benchmarks.synthetic import synthetic_wells
+
+PARAMS = dict(rw=0.05, Temp_rw=78, a=1, m=2, n=2)
+SHALE_PARAMS = dict(Maximum_gr=150, Minimum_gr=15, ssp=-100, sp_baseline=0, sp_shift=0, shale_phid=0.2,
+                    shale_phi_n=0.3)
+
+
+def petrophysics_unfused(depth, phin, phid, deep_res, shallow_res, gradient, surf_temp, rmf, out):
+    """Per-curve expressions, one temporary per operation, copied into the output buffer."""
+    phi_avg = calc.average_porosity(phin, phid)
+    phi = calc.filter_porosity(phi_avg)
+    T = calc.formation_temperature(depth, gradient, surf_temp)
+    rmf_corrected = calc.rmf_at_temperature(rmf, surf_temp, T)
+    rw_corrected = calc.rw_at_temperature(T, PARAMS['rw'], PARAMS['Temp_rw'])
+    sw = calc.archie_saturation(rw_corrected, deep_res, phi, PARAMS['a'], PARAMS['m'], PARAMS['n'])
+    rxo_water = calc.flushed_zone_water_resistivity(rw_corrected, rmf_corrected, 'average')
+    sxo = calc.archie_saturation(rxo_water, shallow_res, phi, PARAMS['a'], PARAMS['m'], PARAMS['n'])
+    bvw = phi * sw
+    curves = (phi_avg, phi, T, rmf_corrected, rw_corrected,
+              calc.apparent_water_resistivity(deep_res, phi_avg, PARAMS['a'], PARAMS['m']),
+              sw, sxo, sw / sxo, bvw, calc.depth_difference(bvw))
+    for row, values in zip(out, curves):
+        row[:] = values
+    return out
+
+
+def shale_volume_unfused(gr, sp, phin, phid, out):
+    out[0] = calc.vsh_gamma_ray(gr, SHALE_PARAMS['Maximum_gr'], SHALE_PARAMS['Minimum_gr'])
+    out[1] = calc.vsh_sp(sp, SHALE_PARAMS['ssp'], SHALE_PARAMS['sp_baseline'], SHALE_PARAMS['sp_shift'])
+    out[2] = calc.vsh_porosity(phin, phid, SHALE_PARAMS['shale_phid'], SHALE_PARAMS['shale_phi_n'])
+    return out
+
+
+def measure(func, repeat):
+    """Best wall time over repeat calls and peak bytes allocated during one call."""
+    func()  # Warm up, compiles Numba kernels on first use
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def kernel_cases(size):
+    """(name, unfused, fused NumPy, compiled) callables of every kernel on size synthetic samples."""
+    df, inputs = synthetic_wells(size)
+    gradient, surf_temp, rmf = calc.well_parameter_arrays(df['Well_Name'], inputs)
+    logs = [as_float_array(df[column]) for column in ('DEPTH', 'PHIN', 'PHID', 'Deep_Resistivity',
+                                                      'Shallow_Resistivity')]
+    arrays = logs + [gradient, surf_temp, rmf]
+    scalars = (PARAMS['rw'], PARAMS['Temp_rw'], SXO_INVASION, calc.INVASION_DEPTHS['average'], np.nan,
+               PARAMS['a'], PARAMS['m'], PARAMS['n'], np.nan)
+    petro_out = np.empty((len(PETROPHYSICS_CURVES), size))
+
+    shale = [as_float_array(df[column]) for column in ('GR', 'SP', 'PHIN', 'PHID')]
+    shale_scalars = tuple(float(value) for value in SHALE_PARAMS.values())
+    shale_out = np.empty((len(SHALE_CURVES), size))
+
+    return [
+        ('petrophysics',
+         lambda: petrophysics_unfused(*arrays, petro_out),
+         lambda: petrophysics_numpy(*arrays, *scalars, petro_out),
+         lambda: petrophysics_compiled(*arrays, *scalars, petro_out)),
+        ('shale_volume',
+         lambda: shale_volume_unfused(*shale, shale_out),
+         lambda: shale_volume_numpy(*shale, *shale_scalars, shale_out),
+         lambda: shale_volume_compiled(*shale, *shale_scalars, shale_out)),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"compiled backend: {'numba' if NUMBA_AVAILABLE else 'not installed (NumPy fallback)'}")
+    print(f"{'kernel':>14} {'samples':>12} {'variant':>10} {'time (s)':>10} {'peak temp (MB)':>15}")
+    for size in args.sizes:
+        for name, unfused, fused, compiled in kernel_cases(size):
+            variants = [('unfused', unfused), ('numpy', fused)]
+            if NUMBA_AVAILABLE:
+                variants.append(('numba', compiled))
+            for variant, func in variants:
+                seconds, peak = measure(func, args.repeat)
+                print(f"{name:>14} {size:>12,} {variant:>10} {seconds:>10.4f} {peak / 1e6:>15.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark the sliding-window Pickett analysis against fitting every window on its own.
+
+A synthetic well is processed and Pickett.pickett_windows fits the water line of every
+window from prefix sums and finds every window's minimum Rwa with van Herk/Gil-Werman. The
+reference slices every window, fits it with np.polyfit and takes its minimum Rwa, so it costs
+O(n × window). Run from the repository root:
+
+    python -m benchmarks.bench_pickett
+    python -m benchmarks.bench_pickett --sizes 10000 100000 --window 100
+"""
+import argparse
+import time
+
+import numpy as np
+
+from BatchRunner import DEFAULT_PARAMETER_SET
+from Calculations import process_well_data_optimized
+from Pickett import DEFAULT_PICKETT_PARAMETERS, pickett_windows
+from Zonation import valid_porosity
+from benchmarks.synthetic import synthetic_wells
+
+
+def windows_per_slice(df, width, vsh_cutoff, phi_cutoff):
+    """Reference: slope and minimum Rwa of every window, fitted one window at a time."""
+    phi = valid_porosity(df['phi_avg_calc'].to_numpy())
+    with np.errstate(invalid='ignore', divide='ignore'):
+        clean = ((df['Vsh_gamma_ray'].to_numpy() <= vsh_cutoff) & (phi >= phi_cutoff)
+                 & (df['Deep_Resistivity'].to_numpy() > 0) & np.isfinite(df['T'].to_numpy()))
+        x = np.log10(phi)
+        y = np.log10(df['Deep_Resistivity'].to_numpy())
+    rwa = df['Rwa'].to_numpy()
+    slopes, minima = [], []
+    for start in range(len(df) - width + 1):
+        keep = clean[start:start + width]
+        slopes.append(np.polyfit(x[start:start + width][keep], y[start:start + width][keep], 1)[0]
+                      if keep.sum() >= 3 else np.nan)
+        minima.append(rwa[start:start + width][keep].min() if keep.any() else np.nan)
+    return -np.array(slopes), np.array(minima)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 50_000], help='Samples of the well')
+    parser.add_argument('--window', type=float, default=DEFAULT_PICKETT_PARAMETERS['window'],
+                        help='Window length in ft (samples are 0.5 ft apart)')
+    args = parser.parse_args()
+    vsh_cutoff, phi_cutoff = DEFAULT_PICKETT_PARAMETERS['vsh_cutoff'], DEFAULT_PICKETT_PARAMETERS['phi_cutoff']
+
+    print(f"{'samples':>10} {'per window (s)':>15} {'sliding (s)':>12} {'speedup':>8} {'max |diff m|':>13}")
+    for n_samples in args.sizes:
+        df, inputs = synthetic_wells(n_samples, n_wells=1)
+        df = process_well_data_optimized(df, inputs, **DEFAULT_PARAMETER_SET)
+
+        start = time.perf_counter()
+        windows = pickett_windows(df, args.window, vsh_cutoff=vsh_cutoff, phi_cutoff=phi_cutoff)
+        sliding = time.perf_counter() - start
+
+        start = time.perf_counter()
+        m, rwa_min = windows_per_slice(df, max(int(round(args.window / 0.5)), 2), vsh_cutoff, phi_cutoff)
+        per_window = time.perf_counter() - start
+
+        if not np.array_equal(np.isnan(rwa_min), np.isnan(windows['Rwa_min'].to_numpy())):
+            raise AssertionError('Windows with clean samples differ')
+        diff = float(np.nanmax(np.abs(windows['m'].to_numpy() - m), initial=0.0))
+        print(f'{n_samples:>10} {per_window:>15.3f} {sliding:>12.3f} {per_window / sliding:>8.1f} {diff:>13.2e}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark rendering of both plotter figures against sample count, with and without decimation,
+and re-rendering with a reused figure skeleton.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_plotting
+    python -m benchmarks.bench_plotting --sizes 10000 100000 1000000
+"""
+import argparse
+import io
+import time
+
+import matplotlib
+
+matplotlib.use('Agg')
+
+from Calculations import process_well_data_optimized
+from SecondWellLogPlotter import SecondWellLogPlotter
+from TrackRenderer import FigureCache
+from WellLogPlotter import WellLogPlotter
+from benchmarks.bench_calculations import PARAMS
+from benchmarks.synthetic import synthetic_wells
+
+
+def render(plotter_class, df, decimate, figure_cache):
+    """Build, plot and rasterize one figure the way st.pyplot does; returns seconds and plotted points."""
+    start = time.perf_counter()
+    plotter = plotter_class(df, sp_shift=0, figure_cache=figure_cache)
+    plotter.decimator.points_per_pixel = 2 if decimate else None
+    plotter.plot_all()
+    plotter.fig.savefig(io.BytesIO(), format='png', dpi=200, bbox_inches='tight')
+    elapsed = time.perf_counter() - start
+    points = sum(len(line.get_xdata()) for ax in plotter.fig.axes for line in ax.get_lines())
+    return elapsed, points
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--full-limit', type=int, default=1_000_000,
+                        help='Largest sample count rendered without decimation')
+    args = parser.parse_args()
+
+    print(f"{'plotter':>22} {'samples':>10} {'full (s)':>9} {'points':>10} "
+          f"{'decimated (s)':>14} {'points':>8} {'rerender (s)':>13}")
+    for size in args.sizes:
+        df, inputs = synthetic_wells(size, n_wells=1)
+        df = process_well_data_optimized(df, inputs, **PARAMS)
+        for plotter_class in (WellLogPlotter, SecondWellLogPlotter):
+            # First render builds the skeleton, the second one reuses it like a Streamlit rerun
+            figure_cache = FigureCache()
+            decimated, decimated_points = render(plotter_class, df, True, figure_cache)
+            rerender, _ = render(plotter_class, df, True, figure_cache)
+            figure_cache.clear()
+            if size <= args.full_limit:
+                full, full_points = render(plotter_class, df, False, FigureCache())
+                full_text = f'{full:>9.2f} {full_points:>10,}'
+            else:
+                full_text = f"{'skipped':>9} {'-':>10}"
+            print(f'{plotter_class.__name__:>22} {size:>10,} {full_text} '
+                  f'{decimated:>14.2f} {decimated_points:>8,} {rerender:>13.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark merging logging runs with mixed depth steps onto one depth grid.
+
+A synthetic well is logged at 0.1 ft and split into three runs: the main curves every 0.5 ft
+with a depth shift and an interval missing, the microlog every 0.1 ft, and the caliper and
+bit size every 1 ft with null values. Resampling.iter_resampled merges them onto a 0.5 ft
+grid (batched per run, in chunks) and is compared with a per-curve loop of np.interp plus
+gap and null masking, which locates every grid depth again for every curve. Run from the
+repository root:
+
+    python -m benchmarks.bench_resampling
+    python -m benchmarks.bench_resampling --sizes 100000 1000000 10000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from Resampling import GAP_FACTOR, CurveRun, depth_grid, iter_resampled
+from benchmarks.synthetic import synthetic_wells
+
+NULL = -999.25
+MAIN_CURVES = ['GR', 'SP', 'PHIN', 'PHID', 'Deep_Resistivity', 'Medium_Resistivity', 'Shallow_Resistivity', 'CORR']
+MICRO_CURVES = ['RNML', 'RLML']
+HOLE_CURVES = ['CALI', 'BIT']
+SHIFT = 0.3
+
+
+def logging_runs(n_samples):
+    """Depth and curve arrays of the three runs of a well logged at 0.1 ft, as (depth, curves, shift, null) tuples."""
+    df, _ = synthetic_wells(n_samples, n_wells=1, depth_step=0.1)
+    depth = df['DEPTH'].to_numpy()
+    main = df.iloc[::5]
+    # A tenth of the main run is missing, e.g. between two logging passes
+    main = main[(main['DEPTH'] < depth[len(depth) // 2]) | (main['DEPTH'] > depth[len(depth) * 6 // 10])]
+    hole = df.iloc[::10].copy()
+    hole.loc[hole.index[::50], HOLE_CURVES] = NULL
+    return [
+        (main['DEPTH'].to_numpy(), {c: main[c].to_numpy() for c in MAIN_CURVES}, SHIFT, None),
+        (depth, {c: df[c].to_numpy() for c in MICRO_CURVES}, 0.0, None),
+        (hole['DEPTH'].to_numpy(), {c: hole[c].to_numpy() for c in HOLE_CURVES}, 0.0, NULL),
+    ]
+
+
+def resample_per_curve(runs, grid):
+    """Reference: np.interp curve by curve, with the runs' shifts, nulls and gaps masked per curve."""
+    frame = {'DEPTH': grid}
+    for depth, curves, shift, null in runs:
+        shifted = depth + shift
+        max_gap = GAP_FACTOR * np.median(np.diff(depth))
+        for name, values in curves.items():
+            valid = values != null if null is not None else np.ones(len(values), dtype=bool)
+            d, v = shifted[valid], values[valid]
+            out = np.interp(grid, d, v, left=np.nan, right=np.nan)
+            hi = np.clip(np.searchsorted(d, grid), 1, len(d) - 1)
+            out[(d[hi] - d[hi - 1] > max_gap) & (grid != d[hi]) & (grid != d[hi - 1])] = np.nan
+            frame[name] = out
+    return pd.DataFrame(frame)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000],
+                        help='Samples of the 0.1 ft well')
+    parser.add_argument('--step', type=float, default=0.5, help='Grid depth step')
+    parser.add_argument('--chunk-size', type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"{'samples':>10} {'grid':>9} {'per curve (s)':>14} {'batched (s)':>12} {'speedup':>8} {'max |diff|':>11}")
+    for n_samples in args.sizes:
+        runs = logging_runs(n_samples)
+        top = min(depth[0] + shift for depth, _, shift, _ in runs)
+        base = max(depth[-1] + shift for depth, _, shift, _ in runs)
+        grid = depth_grid(top, base, args.step)
+
+        start = time.perf_counter()
+        reference = resample_per_curve(runs, grid)
+        per_curve = time.perf_counter() - start
+
+        start = time.perf_counter()
+        # Linear for every run, like the reference; finer runs than the grid are averaged by default
+        curve_runs = [CurveRun(depth, curves, shift=shift, null=null, method='linear')
+                      for depth, curves, shift, null in runs]
+        chunks = list(iter_resampled(curve_runs, args.step, top, base, chunk_size=args.chunk_size))
+        batched = time.perf_counter() - start
+
+        merged = pd.concat(chunks, ignore_index=True)
+        diff = 0.0
+        for name in MAIN_CURVES + MICRO_CURVES + HOLE_CURVES:
+            got, expected = merged[name].to_numpy(), reference[name].to_numpy()
+            if not np.array_equal(np.isnan(got), np.isnan(expected)):
+                diff = np.inf
+            diff = max(diff, float(np.nanmax(np.abs(got - expected), initial=0.0)))
+
+        print(f'{n_samples:>10} {len(grid):>9} {per_curve:>14.3f} {batched:>12.3f} {per_curve / batched:>8.1f} '
+              f'{diff:>11.2e}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Load test of concurrent dashboard sessions against the dashboard's background task functions.
+
+Every simulated session has its own TaskRunner and figure skeletons, like a browser tab,
+and shares the worker pool, curve cache, track image cache and BVW clusterer with the other
+sessions, like sessions of one Streamlit server. All sessions start a view at once (the
+curves, both log plots and the BVW crossplot of a well), then move the SP shift slider and
+request the view again. Runs with the shared single-flight result cache are compared to runs
+without it; both start from empty caches. Run from the repository root:
+
+    python -m benchmarks.bench_sessions
+    python -m benchmarks.bench_sessions --sessions 1 4 16 --wells 2 --samples 50000
+"""
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import matplotlib
+
+matplotlib.use('Agg')
+
+from BackgroundTasks import TaskRunner
+from Clustering import BvwClusterer
+from CurveCache import CurveCache
+from DashboardTasks import bvw_scatter_png, plotter_track_images, process_view, saturation_track_images
+from SecondWellLogPlotter import SecondWellLogPlotter
+from SharedCache import SingleFlightCache
+from TrackRenderer import FigureCache, TrackImageCache
+from WellLogPlotter import WellLogPlotter
+from benchmarks.bench_calculations import PARAMS
+from benchmarks.synthetic import synthetic_wells
+
+
+def request_view(runner, figure_cache, well_df, inputs, well, params, shared):
+    """Submit one view the way app.py does and wait for every section; returns the seconds it took."""
+    start = time.perf_counter()
+    runner.start_run()
+    process_key = (('synthetic', well), False, tuple(params.items()))
+    processed = runner.submit('process', process_key, process_view, shared['curve_cache'], well_df, inputs,
+                              ('synthetic', well), 0, params).result()
+    sp_shift = params['sp_shift']
+    sections = [
+        runner.submit('logs_plot', (process_key, None), plotter_track_images, WellLogPlotter, processed, sp_shift,
+                      figure_cache, shared['image_cache']),
+        runner.submit('saturation_plot', (process_key, None, None), saturation_track_images, SecondWellLogPlotter,
+                      processed, None, sp_shift, figure_cache, shared['image_cache']),
+        runner.submit('bvw_scatter', (process_key, 3, None, None), bvw_scatter_png, processed, 3,
+                      shared['clusterer'], ('synthetic', well), (None, None)),
+    ]
+    wait(sections)
+    for section in sections:
+        section.result()
+    return time.perf_counter() - start
+
+
+def run_sessions(n_sessions, frames, inputs, sp_shifts, single_flight):
+    """
+    Run n_sessions concurrent sessions, each requesting the view once per SP shift.
+
+    Returns:
+    - dict: Wall time, median and slowest view time, CPU time, and the cache counters.
+    """
+    executor = ThreadPoolExecutor(max_workers=8)
+    cache = SingleFlightCache() if single_flight else None
+    shared = {
+        'curve_cache': CurveCache(),
+        'image_cache': TrackImageCache(),
+        'clusterer': BvwClusterer(),
+    }
+    wells = list(frames)
+    barrier = threading.Barrier(n_sessions)
+    view_seconds = []
+    lock = threading.Lock()
+
+    def session(index):
+        runner, figure_cache = TaskRunner(executor, cache), FigureCache()
+        well = wells[index % len(wells)]
+        barrier.wait()
+        for sp_shift in sp_shifts:
+            params = dict(PARAMS, sp_shift=sp_shift)
+            seconds = request_view(runner, figure_cache, frames[well], inputs, well, params, shared)
+            with lock:
+                view_seconds.append(seconds)
+
+    threads = [threading.Thread(target=session, args=(index,)) for index in range(n_sessions)]
+    cpu, start = time.process_time(), time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall, cpu = time.perf_counter() - start, time.process_time() - cpu
+    executor.shutdown()
+
+    view_seconds.sort()
+    result = {
+        'wall_seconds': wall,
+        'cpu_seconds': cpu,
+        'median_view_seconds': view_seconds[len(view_seconds) // 2],
+        'slowest_view_seconds': view_seconds[-1],
+        'curve_misses': shared['curve_cache'].misses,
+    }
+    if cache is not None:
+        result.update(cache.stats())
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--wells', type=int, default=1, help='Distinct wells the sessions look at')
+    parser.add_argument('--samples', type=int, default=20_000, help='Samples per well')
+    parser.add_argument('--sp-shifts', type=int, nargs='+', default=[0, 10],
+                        help='SP shift of every successive view request of a session')
+    args = parser.parse_args()
+
+    df, inputs = synthetic_wells(args.samples * args.wells, n_wells=args.wells)
+    frames = {well: rows.reset_index(drop=True) for well, rows in df.groupby('Well_Name', sort=False)}
+
+    print(f"{'sessions':>8} {'cache':>13} {'wall (s)':>9} {'cpu (s)':>8} {'median view':>12} {'slowest':>8} "
+          f"{'hits':>5} {'misses':>6} {'waits':>5}")
+    for n_sessions in args.sessions:
+        for single_flight in (False, True):
+            result = run_sessions(n_sessions, frames, inputs, args.sp_shifts, single_flight)
+            print(f"{n_sessions:>8} {'single-flight' if single_flight else 'per session':>13} "
+                  f"{result['wall_seconds']:>9.2f} {result['cpu_seconds']:>8.2f} "
+                  f"{result['median_view_seconds']:>12.2f} {result['slowest_view_seconds']:>8.2f} "
+                  f"{result.get('hits', '-'):>5} {result.get('misses', '-'):>6} {result.get('waits', '-'):>5}")
+
+
+if __name__ == '__main__':
+    main()
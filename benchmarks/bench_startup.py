@@ -0,0 +1,96 @@
+"""
+Measure dashboard cold-start time: eager imports, time to the drawn sidebar, the first run and a second session.
+
+Every measurement runs in a fresh interpreter so nothing is imported or cached beforehand.
+The app runs headlessly through Streamlit's AppTest with the pipeline timer enabled, and
+the sidebar is considered drawn when the first 'load' stage starts. Run from the repository
+root:
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --clear-store    # also re-ingest the workbooks
+"""
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+
+from WellStore import STORE_DIR
+
+# Modules app.py imports eagerly, and the heavy ones it loads after drawing the sidebar
+EAGER_MODULES = ['streamlit', 'BackgroundTasks', 'DataExport', 'Profiling', 'TrackLayouts']
+DEFERRED_MODULES = ['numpy', 'pandas', 'WellStore', 'CurveCache', 'Uncertainty', 'matplotlib.pyplot',
+                    'TrackRenderer', 'WellLogPlotter', 'SecondWellLogPlotter', 'WellComparison', 'sklearn.cluster']
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+for module in sys.argv[1:]:
+    __import__(module)
+print(json.dumps(time.perf_counter() - start))
+"""
+
+APP_SCRIPT = """
+import json, time
+import Profiling
+from streamlit.testing.v1 import AppTest
+
+# The app creates one StageTimer per run; keep them to read when its first 'load' stage started
+timers = []
+
+class RecordedTimer(Profiling.StageTimer):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        timers.append(self)
+
+Profiling.StageTimer = RecordedTimer
+
+def run():
+    app = AppTest.from_file('app.py', default_timeout=600)
+    app.session_state['debug_timings'] = True
+    start = time.perf_counter()
+    app.run()
+    seconds = time.perf_counter() - start
+    if app.exception:
+        raise RuntimeError(app.exception[0].value)
+    timer = timers[-1]
+    load = min(record['start'] for record in timer.records if record['stage'] == 'load')
+    return seconds, timer._origin - start + load
+
+first, sidebar = run()
+second, _ = run()
+print(json.dumps({'first_run': first, 'sidebar': sidebar, 'second_session': second}))
+"""
+
+
+def python(script, *args):
+    """Run script in a fresh interpreter and return its JSON output."""
+    result = subprocess.run([sys.executable, '-c', script, *args], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--clear-store', action='store_true',
+                        help=f'Delete {STORE_DIR}/ first, so the first run also parses the workbooks')
+    args = parser.parse_args()
+
+    print(f"{'module':>24} {'import (s)':>11}")
+    for module in EAGER_MODULES + DEFERRED_MODULES:
+        print(f"{module:>24} {python(IMPORT_SCRIPT, module):>11.3f}")
+
+    eager = python(IMPORT_SCRIPT, *EAGER_MODULES)
+    everything = python(IMPORT_SCRIPT, *EAGER_MODULES, *DEFERRED_MODULES)
+    print(f"\neager imports of app.py:           {eager:8.3f} s")
+    print(f"all imports (previously eager):    {everything:8.3f} s")
+
+    if args.clear_store:
+        shutil.rmtree(STORE_DIR, ignore_errors=True)
+    runs = python(APP_SCRIPT)
+    print(f"first run in a fresh process:      {runs['first_run']:8.3f} s")
+    print(f"sidebar drawn after:               {runs['sidebar']:8.3f} s")
+    print(f"second session, same process:      {runs['second_session']:8.3f} s")
+
+
+if __name__ == '__main__':
+    main()
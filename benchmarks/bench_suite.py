@@ -0,0 +1,236 @@
+"""
+Regression benchmark suite of the pipeline stages on synthetic wells from 1e3 to 1e7 samples.
+
+Every case (ingest, float64 and compact float32 processing, shale volume, both plotters, BVW
+clustering and chunked CSV/Parquet export) is timed (best of --repeat after one warm-up call)
+and its peak Python/NumPy allocation is measured with tracemalloc in a separate call. Results
+are written as JSON so runs on the same machine can be compared; --compare reports the cases
+that got slower than a previous run and exits with status 1 if any did. Run from the repository root:
+
+    python -m benchmarks.bench_suite
+    python -m benchmarks.bench_suite --sizes 1000 100000 --cases process_well_data calculate_shale_volume
+    python -m benchmarks.bench_suite --compare benchmarks/results/baseline.json
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+import tracemalloc
+from collections import namedtuple
+
+import matplotlib
+
+matplotlib.use('Agg')
+
+import numpy as np
+import pandas as pd
+
+from Calculations import calculate_shale_volume, process_well_data_optimized
+from Clustering import BvwClusterer
+from CompactFrame import compact_frame, process_well_data_compact
+from DataExport import export_frame
+from Kernels import NUMBA_AVAILABLE
+from LasReader import process_las
+from SecondWellLogPlotter import SecondWellLogPlotter
+from TrackRenderer import FigureCache
+from WellLogPlotter import WellLogPlotter
+from WellStore import WellStore
+from benchmarks.bench_calculations import PARAMS
+from benchmarks.synthetic import LOG_COLUMNS, synthetic_wells, write_las
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+RESULTS_DIR = os.path.join('benchmarks', 'results')
+
+# setup(data) -> callable timed by the suite; cases are skipped above max_size samples
+Case = namedtuple('Case', 'setup max_size')
+
+
+class SuiteData:
+    """Synthetic wells of one size, shared by the cases; processed curves are added on first use."""
+
+    def __init__(self, size, n_wells, workdir):
+        self.size = size
+        self.workdir = workdir
+        self.df, self.inputs = synthetic_wells(size, n_wells=n_wells)
+        # Wells are contiguous blocks of rows, so the first well is a slice
+        self.well_rows = int(np.sum(self.df['Well_Name'].to_numpy() == self.df['Well_Name'].iloc[0]))
+
+    def processed_well(self):
+        if 'Sw' not in self.df.columns:
+            process_well_data_optimized(self.df, self.inputs, **PARAMS)
+        return self.df.iloc[:self.well_rows]
+
+
+def ingest_excel(data):
+    path = os.path.join(data.workdir, f'wells_{data.size}.xlsx')
+    data.df[['Well_Name', 'DEPTH'] + LOG_COLUMNS].to_excel(path, sheet_name='All_Wells', index=False)
+    store = WellStore(path, sheet_name='All_Wells', store_dir=os.path.join(data.workdir, 'store'))
+    return store.ingest
+
+
+def las_stream(data):
+    path = os.path.join(data.workdir, f'well_{data.size}.las')
+    write_las(data.df.iloc[:data.well_rows], path)
+
+    def run():
+        for _ in process_las(path, data.inputs, **PARAMS):
+            pass
+    return run
+
+
+def process_well_data(data):
+    return lambda: process_well_data_optimized(data.df, data.inputs, **PARAMS)
+
+
+def process_well_data_float32(data):
+    df = compact_frame(data.df[['Well_Name', 'DEPTH'] + LOG_COLUMNS])
+    return lambda: process_well_data_compact(df, data.inputs, **PARAMS)
+
+
+def shale_volume(data):
+    shale_params = {k: PARAMS[k] for k in ('Maximum_gr', 'Minimum_gr', 'ssp', 'sp_baseline', 'sp_shift',
+                                           'shale_phid', 'shale_phi_n')}
+    return lambda: calculate_shale_volume(data.df, **shale_params)
+
+
+def plot(plotter_class):
+    def setup(data):
+        df = data.processed_well()
+        figure_cache = FigureCache()
+
+        def run():
+            # plot_all plus rasterization the way st.pyplot saves the figure
+            plotter = plotter_class(df, sp_shift=0, figure_cache=figure_cache)
+            plotter.plot_all()
+            plotter.fig.savefig(io.BytesIO(), format='png', dpi=200, bbox_inches='tight')
+        return run
+    return setup
+
+
+def export(fmt):
+    def setup(data):
+        df = data.processed_well()
+        path = os.path.join(data.workdir, f'export_{data.size}.{fmt}')
+        return lambda: export_frame(df, path, fmt)
+    return setup
+
+
+def clustering(data):
+    df = data.processed_well()
+    phi, sw = df['phi_avg_calc'].to_numpy(), df['Sw'].to_numpy()
+    # A fresh clusterer per call, so every call is a cold fit
+    return lambda: BvwClusterer().fit_predict(phi, sw, 3)
+
+
+CASES = {
+    # Excel has a 1,048,576-row limit and openpyxl writes the test workbook slowly
+    'ingest_excel': Case(ingest_excel, 100_000),
+    'las_stream': Case(las_stream, 1_000_000),
+    'process_well_data': Case(process_well_data, None),
+    'process_well_data_compact': Case(process_well_data_float32, None),
+    'calculate_shale_volume': Case(shale_volume, None),
+    'well_log_plot': Case(plot(WellLogPlotter), None),
+    'second_well_log_plot': Case(plot(SecondWellLogPlotter), None),
+    'bvw_clustering': Case(clustering, None),
+    # CSV formatting allocates a string per value, which tracemalloc makes very slow above 1e5 samples
+    'export_csv': Case(export('csv'), 100_000),
+    'export_parquet': Case(export('parquet'), None),
+}
+
+
+def measure(func, repeat):
+    """Best wall time over repeat calls after a warm-up call, and peak bytes allocated during one call."""
+    func()
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def run_suite(sizes, cases, repeat, n_wells):
+    results = []
+    workdir = tempfile.mkdtemp(prefix='bench_suite_')
+    try:
+        for size in sizes:
+            data = SuiteData(size, n_wells, workdir)
+            for name in cases:
+                setup, max_size = CASES[name]
+                if max_size is not None and size > max_size:
+                    continue
+                seconds, peak = measure(setup(data), repeat)
+                results.append({'case': name, 'size': size, 'seconds': seconds, 'peak_bytes': peak})
+                print(f"{name:>24} {size:>12,} {seconds:>10.4f} {peak / 1e6:>12.1f}", flush=True)
+            del data
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Cases of results slower than baseline by more than threshold (a ratio), as printable lines."""
+    previous = {(entry['case'], entry['size']): entry['seconds'] for entry in baseline['results']}
+    regressions = []
+    for entry in results:
+        before = previous.get((entry['case'], entry['size']))
+        if before and entry['seconds'] / before > threshold:
+            regressions.append(f"{entry['case']:>24} {entry['size']:>12,} {before:>10.4f} -> "
+                               f"{entry['seconds']:.4f} s ({entry['seconds'] / before:.2f}x)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--wells', type=int, default=1,
+                        help='Wells the samples are split into; plots and clustering use the first well')
+    parser.add_argument('--output', default=None,
+                        help=f'Results JSON (default: {RESULTS_DIR}/suite-<timestamp>.json)')
+    parser.add_argument('--compare', default=None, help='Results JSON of an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='Slowdown ratio reported as a regression by --compare')
+    args = parser.parse_args()
+
+    print(f"{'case':>24} {'samples':>12} {'time (s)':>10} {'peak (MB)':>12}")
+    results = run_suite(args.sizes, args.cases, args.repeat, args.wells)
+
+    report = {
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'machine': {'platform': platform.platform(), 'processor': platform.processor(), 'cpus': os.cpu_count()},
+        'versions': {'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+                     'matplotlib': matplotlib.__version__, 'numba': NUMBA_AVAILABLE},
+        'repeat': args.repeat,
+        'wells': args.wells,
+        'results': results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"suite-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            raise SystemExit(1)
+        print(f"no regressions against {args.compare} (threshold {args.threshold:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
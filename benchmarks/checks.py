@@ -0,0 +1,110 @@
+"""
+Correctness checks of the pipeline on the repository's Work_data.xlsx and on synthetic wells.
+
+Every check raises AssertionError with what went wrong; the script runs them all, reports each
+one and exits with status 1 if any failed. Run from the repository root:
+
+    python -m benchmarks.checks
+    python -m benchmarks.checks --checks zonation_nulls
+"""
+import argparse
+import sys
+import traceback
+
+import numpy as np
+
+from BatchRunner import DEFAULT_PARAMETER_SET
+from Calculations import process_well_data_optimized
+from CompactFrame import compact_errors, compact_frame, process_well_data_compact
+from Pickett import pickett_windows
+from WellStore import WellStore
+from Zonation import zone_well
+from benchmarks.synthetic import LOG_COLUMNS, synthetic_wells
+
+WORKBOOK = 'Work_data.xlsx'
+SHEET = 'All_Wells'
+INPUTS = 'Raster_logs_data.xlsx'
+
+# WKU40 has null (-999.25) PHIN and PHID from its top at 2464 ft to 2479.5 ft
+NULL_POROSITY_WELL = 'WKU40'
+NULL_POROSITY_BASE = 2479.5
+
+# Synthetic wells of the compact tolerance check: (samples, wells, fraction of null samples)
+COMPACT_CASES = [(100_000, 4, 0.0), (100_000, 4, 0.01)]
+
+
+def processed_well(well):
+    """One well of Work_data.xlsx processed with the batch runner's default parameters."""
+    inputs = WellStore(INPUTS).load_well()
+    df = WellStore(WORKBOOK, sheet_name=SHEET).load_well(well)
+    return process_well_data_optimized(df, inputs, **DEFAULT_PARAMETER_SET)
+
+
+def zonation_nulls():
+    """Null porosity at the top of WKU40 is neither net nor pay and stays out of the zone averages."""
+    df = processed_well(NULL_POROSITY_WELL)
+    summary, zones = zone_well(df)
+    nulls = summary.interval(base=NULL_POROSITY_BASE)
+    assert nulls['Net'] == 0 and nulls['Pay'] == 0, f'Null porosity counted as net: {nulls}'
+    phi = zones['Phi_avg'].dropna()
+    assert ((phi >= 0) & (phi <= 1)).all(), f'Zone porosity averages outside 0-1: {phi.tolist()}'
+
+
+def pickett_nulls():
+    """Null porosity at the top of WKU40 is left out of the Pickett windows, as if it were NaN."""
+    df = processed_well(NULL_POROSITY_WELL)
+    missing = df.copy()
+    missing.loc[missing['DEPTH'] <= NULL_POROSITY_BASE, 'phi_avg_calc'] = np.nan
+    windows, expected = pickett_windows(df), pickett_windows(missing)
+    assert windows.equals(expected), 'Null porosity samples are fitted as clean'
+
+
+def within_compact_tolerance(df, inputs, label):
+    """Compact curves of df agree with the float64 curves to COMPACT_RTOL and COMPACT_ATOL."""
+    exact = process_well_data_optimized(df, inputs, **DEFAULT_PARAMETER_SET)
+    compact = process_well_data_compact(compact_frame(df), inputs, **DEFAULT_PARAMETER_SET)
+    errors = compact_errors(compact, exact)
+    failed = errors[~errors['within_tolerance']]
+    assert failed.empty, f'{label}: compact curves outside the agreed tolerance\n{failed.to_string()}'
+
+
+def compact_tolerance():
+    """Compact (float32) processing matches float64 processing on Work_data.xlsx and synthetic wells."""
+    inputs = WellStore(INPUTS).load_well()
+    store = WellStore(WORKBOOK, sheet_name=SHEET)
+    for well in store.wells():
+        within_compact_tolerance(store.load_well(well), inputs, well)
+    for n_samples, n_wells, null_fraction in COMPACT_CASES:
+        df, inputs = synthetic_wells(n_samples, n_wells=n_wells, null_fraction=null_fraction)
+        within_compact_tolerance(df[['Well_Name', 'DEPTH'] + LOG_COLUMNS], inputs,
+                                 f'{n_samples:,} synthetic samples, {null_fraction:.0%} nulls')
+
+
+CHECKS = {
+    'zonation_nulls': zonation_nulls,
+    'pickett_nulls': pickett_nulls,
+    'compact_tolerance': compact_tolerance,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--checks', nargs='+', choices=sorted(CHECKS), default=list(CHECKS))
+    args = parser.parse_args()
+
+    failed = []
+    for name in args.checks:
+        try:
+            CHECKS[name]()
+        except AssertionError:
+            failed.append(name)
+            print(f'{name:>28}  FAILED')
+            traceback.print_exc()
+        else:
+            print(f'{name:>28}  ok')
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+import numpy as np
+import pandas as pd
+
+# Raw curves the calculations and plotters read from the All_Wells sheet
+LOG_COLUMNS = ['BIT', 'CALI', 'GR', 'SP', 'Shallow_Resistivity', 'Medium_Resistivity', 'Deep_Resistivity',
+               'PHID', 'PHIN', 'CORR', 'RLML', 'RNML']
+
+# Null value written to synthetic LAS files
+LAS_NULL = -999.25
+
+
+def moving_average(values, window):
+    """Centered moving average over window samples, computed from a cumulative sum in O(n)."""
+    if window <= 1:
+        return values
+    padded = np.concatenate([np.full(window // 2, values[0]), values, np.full(window - window // 2 - 1, values[-1])])
+    cumulative = np.concatenate([[0.0], np.cumsum(padded)])
+    return (cumulative[window:] - cumulative[:-window]) / window
+
+
+def bed_sequence(rng, n_samples, depth_step, mean_thickness):
+    """Bed number of every sample for beds with exponentially distributed thickness (in ft)."""
+    mean_samples = max(mean_thickness / depth_step, 1.0)
+    n_beds = int(n_samples / mean_samples * 1.5) + 16
+    thickness = np.maximum(rng.exponential(mean_samples, n_beds).astype(np.int64), 1)
+    while thickness.sum() < n_samples:
+        thickness = np.concatenate([thickness, np.maximum(rng.exponential(mean_samples, n_beds).astype(np.int64), 1)])
+    return np.repeat(np.arange(len(thickness)), thickness)[:n_samples], len(thickness)
+
+
+def synthetic_wells(n_samples, n_wells=4, depth_step=0.5, top_depth=2500.0, seed=0, mean_bed_thickness=8.0,
+                    null_fraction=0.0):
+    """
+    Build a synthetic All_Wells-style DataFrame and a matching inputs sheet.
+
+    The logs follow a layered sand/shale model: beds of random thickness get a shale volume,
+    porosity and water saturation, and every curve is derived from them with the usual tool
+    responses (GR and SP from shale volume, neutron/density separation in shale, Archie
+    resistivity with an invaded zone, caliper washouts in shale and mud cake on permeable
+    sands, microlog separation), smoothed to the tool's vertical resolution and given noise.
+    Everything is vectorized, so 1e7 samples take a few seconds.
+
+    Parameters:
+    - n_samples (int): Total number of depth samples across all wells
+    - n_wells (int): Number of wells the samples are split into
+    - depth_step (float): Depth sampling interval in ft
+    - top_depth (float): Depth of the first sample of every well
+    - seed (int): Random seed
+    - mean_bed_thickness (float): Mean bed thickness in ft
+    - null_fraction (float): Fraction of samples of every log (except depth) set to NaN, as tool gaps
+
+    Returns:
+    - tuple: (log DataFrame, inputs DataFrame)
+    """
+    rng = np.random.default_rng(seed)
+    per_well = np.diff(np.linspace(0, n_samples, n_wells + 1).astype(int))
+    names = [f'SYN{i + 1:02d}' for i in range(n_wells)]
+    depth = np.concatenate([top_depth + depth_step * np.arange(count) for count in per_well])
+    bed, n_beds = bed_sequence(rng, n_samples, depth_step, mean_bed_thickness)
+
+    def samples(feet):
+        return max(int(round(feet / depth_step)), 1)
+
+    def noise(scale):
+        return rng.normal(0, scale, n_samples)
+
+    # Bed properties: bimodal shale volume, sand porosity, hydrocarbon-bearing sands with low Sw
+    vsh_bed = rng.beta(0.5, 0.5, n_beds)
+    phi_bed = np.clip(rng.normal(0.22, 0.05, n_beds), 0.02, 0.35)
+    sw_bed = np.where(rng.random(n_beds) < 0.3, rng.uniform(0.15, 0.5, n_beds), 1.0)
+    gas_bed = (sw_bed < 1) & (rng.random(n_beds) < 0.3)
+
+    vsh = np.clip(moving_average(vsh_bed[bed], samples(2.0)) + noise(0.02), 0, 1)
+    phi = np.clip(phi_bed[bed] * (1 - vsh), 0.005, None)
+    sw = np.clip(moving_average(sw_bed[bed], samples(1.0)), 0.05, 1)
+    permeable = (vsh < 0.4) & (phi > 0.08)
+
+    gr = 15 + 135 * vsh + noise(4.0)
+    sp = moving_average(-80 * (1 - vsh), samples(6.0)) + np.cumsum(noise(0.02)) + noise(0.5)
+
+    phin = phi + 0.3 * vsh - np.where(gas_bed[bed], 0.06, 0.0) + noise(0.01)
+    phid = phi + 0.2 * vsh + np.where(gas_bed[bed], 0.03, 0.0) + noise(0.01)
+
+    # Archie sands in parallel with shale, Rw and Rmf at formation conditions
+    rt_sand = 0.05 / (phi**2 * sw**2)
+    rxo_sand = 0.6 / (phi**2 * sw**0.4)
+    r_shale = rng.uniform(2, 5, n_beds)[bed]
+    deep = np.clip(1 / ((1 - vsh) / rt_sand + vsh / r_shale), 0.2, 2000)
+    deep = moving_average(deep, samples(4.0)) * np.exp(noise(0.03))
+    shallow = np.clip(1 / ((1 - vsh) / np.where(permeable, rxo_sand, rt_sand) + vsh / r_shale), 0.2, 2000)
+    shallow = moving_average(shallow, samples(1.5)) * np.exp(noise(0.03))
+    medium = np.sqrt(deep * shallow) * np.exp(noise(0.02))
+
+    bit = np.full(n_samples, 7.875)
+    washout = np.where(vsh > 0.6, rng.gamma(2.0, 0.4, n_beds)[bed], 0.0)
+    mud_cake = np.where(permeable, rng.uniform(0.1, 0.4, n_beds)[bed], 0.0)
+    cali = bit + moving_average(washout - mud_cake, samples(1.0)) + noise(0.05)
+    corr = 0.02 * washout + noise(0.01)
+
+    # Microlog: positive separation (normal > lateral) across mud cake on permeable beds
+    rlml = np.clip(1.5 + 3 * (1 - vsh) + noise(0.2), 0.2, None)
+    rnml = rlml * np.where(permeable, 1.6, 1.0) + noise(0.1)
+
+    df = pd.DataFrame({
+        'Well_Name': np.repeat(names, per_well),
+        'DEPTH': depth,
+        'BIT': bit,
+        'CALI': cali,
+        'GR': gr,
+        'SP': sp,
+        'Shallow_Resistivity': shallow,
+        'Medium_Resistivity': medium,
+        'Deep_Resistivity': deep,
+        'PHID': phid,
+        'PHIN': phin,
+        'CORR': corr,
+        'RLML': rlml,
+        'RNML': rnml,
+    })
+    if null_fraction:
+        for column in LOG_COLUMNS:
+            df.loc[rng.random(n_samples) < null_fraction, column] = np.nan
+    inputs = pd.DataFrame({
+        'Well': names,
+        'TVD': rng.integers(2800, 4700, n_wells),
+        'T_max': rng.integers(80, 110, n_wells),
+        'T_values': rng.integers(60, 75, n_wells),
+        'Rmf': rng.uniform(0.5, 1.5, n_wells).round(2),
+    })
+    return df, inputs
+
+
+def write_las(df, path, well=None):
+    """
+    Write one well of a synthetic frame as an unwrapped LAS 2.0 file LasReader can read.
+
+    Parameters:
+    - df (pd.DataFrame): Rows of a single well with DEPTH and the LOG_COLUMNS curves
+    - path (str): Output file
+    - well (str): WELL header value, the frame's Well_Name by default
+    """
+    well = well if well is not None else df['Well_Name'].iloc[0]
+    columns = ['DEPTH'] + [column for column in LOG_COLUMNS if column in df.columns]
+    depth = df['DEPTH'].to_numpy()
+    step = depth[1] - depth[0] if len(depth) > 1 else 0
+    header = [
+        '~Version Information',
+        ' VERS.   2.0 : CWLS LOG ASCII STANDARD - VERSION 2.0',
+        ' WRAP.   NO  : ONE LINE PER DEPTH STEP',
+        '~Well Information',
+        f' STRT.FT {depth[0]:.4f} : START DEPTH',
+        f' STOP.FT {depth[-1]:.4f} : STOP DEPTH',
+        f' STEP.FT {step:.4f} : STEP',
+        f' NULL.   {LAS_NULL} : NULL VALUE',
+        f' WELL.   {well} : WELL',
+        '~Curve Information',
+    ]
+    header += [f' {"DEPT" if column == "DEPTH" else column.upper()}.  : {column}' for column in columns]
+    header.append('~A')
+    values = df[columns].to_numpy(dtype=float)
+    values = np.where(np.isnan(values), LAS_NULL, values)
+    np.savetxt(path, values, fmt='%.5f', header='\n'.join(header), comments='')